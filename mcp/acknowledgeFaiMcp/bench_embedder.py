@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Compare CPU embedding backends on the same machine: ONNX fp32, ONNX INT8
+(quantize_onnx.py) and sentence-transformers.
+
+For every backend it reports encode throughput (docs/s) and, against the
+reference backend (ONNX fp32 by default), recall@k of exact nearest-neighbour
+search over the corpus plus the mean cosine similarity of the document vectors.
+
+Usage:
+    python bench_embedder.py                                  # documents from knowledge_db_path
+    python bench_embedder.py --corpus docs.txt --limit 5000   # one document per line
+    python bench_embedder.py --intra-op-threads 8 --output bench_embedder.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from faiss_mcp_server import _read_embedder_config, _resolve_module_path, encode_texts, get_embedder_for_AMD_gpu
+
+
+def load_corpus(args, cfg) -> List[str]:
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            docs = [line.strip() for line in f if line.strip()]
+    else:
+        db_path = _resolve_module_path(args.db or cfg.get("knowledge_db_path", "knowledge.db"))
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT content FROM knowledge_entries WHERE content IS NOT NULL AND content != '' ORDER BY id LIMIT ?",
+                (args.limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+        docs = [r[0] for r in rows]
+    docs = docs[:args.limit]
+    if len(docs) < args.k + 1:
+        raise SystemExit(f"Need more than k={args.k} documents, got {len(docs)}")
+    return docs
+
+
+def make_queries(docs: List[str], n: int, seed: int = 1234) -> List[str]:
+    """Use the leading part of sampled documents as queries."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(docs), size=min(n, len(docs)), replace=False)
+    return [docs[i][:64] for i in rows]
+
+
+def onnx_backend(cfg, onnx_path: str, args):
+    gpu_cfg = dict(cfg.get("gpu", {}))
+    gpu_cfg["onnx_path"] = onnx_path
+    gpu_cfg["cpu_onnx_path"] = None
+    session_cfg = dict(gpu_cfg.get("session_options", {}))
+    session_cfg["providers"] = ["CPUExecutionProvider"]
+    if args.intra_op_threads is not None:
+        session_cfg["intra_op_num_threads"] = args.intra_op_threads
+    if args.graph_optimization_level:
+        session_cfg["graph_optimization_level"] = args.graph_optimization_level
+    gpu_cfg["session_options"] = session_cfg
+    return get_embedder_for_AMD_gpu({"gpu": gpu_cfg}, "gpu")
+
+
+def st_backend(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def encode(embedder, texts: List[str]) -> np.ndarray:
+    # Same length-bucketed batching as the server (max_tokens_per_batch / batch_size)
+    emb = encode_texts(embedder, texts)
+    emb = emb.reshape(emb.shape[0], -1)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb / np.where(norms == 0, 1.0, norms)
+
+
+def exact_topk(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return top
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def run_backend(name: str, embedder, docs: List[str], queries: List[str], args) -> Dict[str, Any]:
+    encode(embedder, docs[:32])  # warm-up
+    started = time.perf_counter()
+    doc_emb = encode(embedder, docs)
+    elapsed = time.perf_counter() - started
+    query_emb = encode(embedder, queries)
+    return {
+        "backend": name,
+        "docs": len(docs),
+        "dim": int(doc_emb.shape[1]),
+        "seconds": round(elapsed, 3),
+        "docs_per_s": round(len(docs) / elapsed, 1),
+        "_doc_emb": doc_emb,
+        "_topk": exact_topk(doc_emb, query_emb, args.k),
+    }
+
+
+def markdown_table(results: List[Dict[str, Any]], k: int) -> str:
+    lines = [
+        f"| backend | dim | docs/s | recall@{k} | mean cos vs ref |",
+        "|---|---|---|---|---|",
+    ]
+    for r in results:
+        recall = "-" if r.get("recall") is None else f"{r['recall']:.4f}"
+        cos = "-" if r.get("mean_cosine") is None else f"{r['mean_cosine']:.4f}"
+        lines.append(f"| {r['backend']} | {r['dim']} | {r['docs_per_s']} | {recall} | {cos} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ONNX fp32 / INT8 and sentence-transformers embedders on CPU")
+    parser.add_argument("--corpus", default=None, help="text file with one document per line (default: knowledge_entries.content)")
+    parser.add_argument("--db", default=None, help="knowledge.db path (default: knowledge_db_path from embedder_config.json)")
+    parser.add_argument("--limit", type=int, default=2000, help="max documents to encode")
+    parser.add_argument("--queries", type=int, default=200, help="number of queries for recall")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--fp32", default=None, help="fp32 ONNX model (default: gpu.onnx_path)")
+    parser.add_argument("--int8", default=None, help="INT8 ONNX model (default: gpu.cpu_onnx_path or <fp32>.int8.onnx)")
+    parser.add_argument("--st-model", default=None, help="sentence-transformers model (default: gpu.tokenizer); 'none' to skip")
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--graph-optimization-level", default=None, choices=["disable", "basic", "extended", "all"])
+    parser.add_argument("--output", default="bench_embedder.json")
+    args = parser.parse_args()
+
+    cfg = _read_embedder_config()
+    gpu_cfg = cfg.get("gpu", {})
+    docs = load_corpus(args, cfg)
+    queries = make_queries(docs, args.queries)
+    print(f"Corpus: {len(docs)} docs, {len(queries)} queries, k={args.k}")
+
+    fp32_path = _resolve_module_path(args.fp32 or gpu_cfg.get("onnx_path"))
+    int8_path = _resolve_module_path(args.int8 or gpu_cfg.get("cpu_onnx_path")) or (
+        os.path.splitext(fp32_path)[0] + ".int8.onnx" if fp32_path else None)
+    st_model = args.st_model or gpu_cfg.get("tokenizer")
+
+    backends = []
+    if fp32_path and os.path.exists(fp32_path):
+        backends.append(("onnx_fp32", lambda: onnx_backend(cfg, fp32_path, args)))
+    if int8_path and os.path.exists(int8_path):
+        backends.append(("onnx_int8", lambda: onnx_backend(cfg, int8_path, args)))
+    else:
+        print(f"INT8 model not found ({int8_path}); run quantize_onnx.py first")
+    if st_model and st_model.lower() != "none":
+        backends.append(("sentence_transformers", lambda: st_backend(st_model)))
+
+    results: List[Dict[str, Any]] = []
+    for name, factory in backends:
+        print(f"Running {name} ...")
+        results.append(run_backend(name, factory(), docs, queries, args))
+
+    reference: Optional[Dict[str, Any]] = results[0] if results else None
+    for r in results:
+        r["recall"] = None
+        r["mean_cosine"] = None
+        if reference is not None and r["dim"] == reference["dim"]:
+            r["recall"] = round(recall_at_k(r["_topk"], reference["_topk"]), 4)
+            r["mean_cosine"] = round(float(np.mean(np.sum(r["_doc_emb"] * reference["_doc_emb"], axis=1))), 4)
+
+    report = {
+        "reference": reference["backend"] if reference else None,
+        "docs": len(docs),
+        "queries": len(queries),
+        "k": args.k,
+        "cpu_count": os.cpu_count(),
+        "results": [{key: v for key, v in r.items() if not key.startswith("_")} for r in results],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(markdown_table(results, args.k))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Recall-versus-latency benchmark of FAISS index configurations for the knowledge store.
+
+Vectors come from the real knowledge base (documents of knowledge_db_path encoded
+with the configured embedder, or the vectors of the server's index file) or from a
+synthetic clustered corpus. Exact ground truth is computed with a flat inner-product
+scan, then every Flat / IVF-Flat / HNSW / IVF-PQ / SQ / IVF-SQ configuration of the
+sweep is built with the server's `build_index` and searched over its query-time
+parameters (nprobe, efSearch). For every point it reports recall@k, QPS at batch
+size 1 and 32, build time, resident memory growth during the build and the size
+of the written index file.
+
+Usage:
+    python bench_index.py                                   # documents from knowledge_db_path
+    python bench_index.py --source index                    # vectors of faiss.<device>.index_path
+    python bench_index.py --synthetic 100000 --dim 384      # also 10000 / 1000000
+    python bench_index.py --synthetic 1000000 --types ivf_flat,ivf_pq --nprobe 8,32,128
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from faiss_index import LOSSY_INDEX_TYPES, build_index, extract_vectors, open_index, search_parameters
+from faiss_mcp_server import _faiss_config_from, _read_embedder_config, _resolve_module_path, get_embedder
+
+
+DEFAULT_TYPES = "flat,ivf_flat,hnsw,ivf_pq,sq,ivf_sq"
+BATCH_SIZES = (1, 32)
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return (x / np.where(norms == 0, 1.0, norms)).astype("float32")
+
+
+def synthetic_vectors(n: int, nq: int, dim: int, seed: int = 1234) -> Tuple[np.ndarray, np.ndarray]:
+    """Unit vectors drawn around random cluster centres, so IVF/PQ see structure like real embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = normalize(rng.standard_normal((max(16, n // 1000), dim), dtype="float32"))
+
+    def draw(count: int) -> np.ndarray:
+        out = np.empty((count, dim), dtype="float32")
+        for start in range(0, count, 65536):
+            rows = min(65536, count - start)
+            picked = centres[rng.integers(0, len(centres), rows)]
+            # Noise of norm ~1 around each unit centre: clusters overlap like topics do
+            out[start:start + rows] = normalize(picked + rng.standard_normal((rows, dim), dtype="float32") / np.sqrt(dim))
+        return out
+
+    return draw(n), draw(nq)
+
+
+def held_out(vectors: np.ndarray, nq: int, seed: int = 1234) -> Tuple[np.ndarray, np.ndarray]:
+    """Split `nq` random rows off as queries so no query is in the database."""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[rng.choice(len(vectors), size=min(nq, len(vectors) // 10), replace=False)] = True
+    return np.ascontiguousarray(vectors[~mask]), np.ascontiguousarray(vectors[mask])
+
+
+def load_vectors(args, cfg) -> Tuple[np.ndarray, np.ndarray, str]:
+    if args.synthetic:
+        xb, xq = synthetic_vectors(args.synthetic, args.queries, args.dim or _faiss_config_from(cfg).dim)
+        return xb, xq, f"synthetic:{args.synthetic}"
+    if args.source == "index":
+        path = _resolve_module_path(args.index or _faiss_config_from(cfg).index_path)
+        _, vectors = extract_vectors(open_index(path, "ram"))
+        xb, xq = held_out(normalize(vectors), args.queries)
+        return xb, xq, f"index:{path}"
+    # Documents of knowledge.db (or --corpus), encoded like the server does
+    from bench_embedder import encode, load_corpus, make_queries
+    docs = load_corpus(args, cfg)
+    embedder = get_embedder()
+    print(f"Encoding {len(docs)} documents ...")
+    return encode(embedder, docs), encode(embedder, make_queries(docs, args.queries)), "knowledge_db"
+
+
+def exact_ground_truth(xb: np.ndarray, xq: np.ndarray, k: int) -> np.ndarray:
+    flat = faiss.IndexFlatIP(xb.shape[1])
+    flat.add(xb)
+    _, I = flat.search(xq, k)
+    return I
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[f >= 0]) & set(t)) / k for f, t in zip(found[:, :k], truth)]))
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def sweep(args, dim: int, n: int) -> List[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+    """`(index_type, build params, [search params, ...])` for every configuration to build."""
+    nlist = args.nlist or max(1, int(4 * np.sqrt(n)))
+    ivf_search = [{"nprobe": p} for p in args.nprobe]
+    configs = []
+    for index_type in args.types.split(","):
+        index_type = index_type.strip()
+        if index_type == "flat":
+            configs.append(("flat", {}, [{}]))
+        elif index_type == "ivf_flat":
+            configs.append(("ivf_flat", {"nlist": nlist}, ivf_search))
+        elif index_type == "hnsw":
+            for m in args.hnsw_m:
+                configs.append(("hnsw", {"hnsw_m": m, "ef_construction": args.ef_construction},
+                                [{"ef_search": ef} for ef in args.ef_search]))
+        elif index_type == "ivf_pq":
+            for m in args.pq_m:
+                if dim % m:
+                    print(f"Skipping ivf_pq pq_m={m}: does not divide dim={dim}")
+                    continue
+                configs.append(("ivf_pq", {"nlist": nlist, "pq_m": m, "pq_nbits": 8}, ivf_search))
+        elif index_type == "sq":
+            for sq_type in args.sq_type.split(","):
+                configs.append(("sq", {"sq_type": sq_type.strip()}, [{}]))
+        elif index_type == "ivf_sq":
+            configs.append(("ivf_sq", {"nlist": nlist, "sq_type": "sq8"}, ivf_search))
+        else:
+            raise SystemExit(f"Unknown index type '{index_type}'")
+    return configs
+
+
+def search(index: faiss.Index, xq: np.ndarray, xb: np.ndarray, k: int, batch: int,
+           knobs: Dict[str, Any], rescore_factor: int) -> Tuple[np.ndarray, float]:
+    """Search all queries in batches of `batch`; returns `(I, queries per second)`."""
+    params = search_parameters(index, nprobe=knobs.get("nprobe"), ef_search=knobs.get("ef_search"))
+    fetch_k = k * rescore_factor if rescore_factor else k
+    out = np.empty((len(xq), k), dtype="int64")
+    started = time.perf_counter()
+    for start in range(0, len(xq), batch):
+        q = xq[start:start + batch]
+        if params is not None:
+            _, I = index.search(q, fetch_k, params=params)
+        else:
+            _, I = index.search(q, fetch_k)
+        if rescore_factor:
+            # Same exact re-ranking the server does with its full-precision vector store
+            scores = np.einsum("qcd,qd->qc", xb[np.where(I >= 0, I, 0)], q)
+            scores[I < 0] = -np.inf
+            I = np.take_along_axis(I, np.argsort(-scores, axis=1, kind="stable")[:, :k], axis=1)
+        out[start:start + len(q)] = I
+    elapsed = time.perf_counter() - started
+    return out, len(xq) / max(elapsed, 1e-9)
+
+
+def run_config(index_type: str, build_params: Dict[str, Any], searches: List[Dict[str, Any]],
+               xb: np.ndarray, xq: np.ndarray, truth: np.ndarray, args) -> List[Dict[str, Any]]:
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    index = build_index(index_type, xb.shape[1], xb, np.arange(len(xb), dtype="int64"),
+                        train_sample_size=args.train_sample_size, **build_params)
+    build_s = time.perf_counter() - started
+    rss_after = rss_bytes()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.index")
+        faiss.write_index(index, path)
+        disk_bytes = os.path.getsize(path)
+
+    results = []
+    rescore_options = [0, args.rescore_factor] if index_type in LOSSY_INDEX_TYPES and args.rescore_factor else [0]
+    for knobs in searches:
+        for rescore_factor in rescore_options:
+            row = {
+                "index_type": index_type,
+                "build": build_params,
+                "search": dict(knobs, rescore_factor=rescore_factor) if rescore_factor else knobs,
+                "build_s": round(build_s, 3),
+                "memory_mb": round((rss_after - rss_before) / 2 ** 20, 1) if rss_before is not None and rss_after is not None else None,
+                "disk_mb": round(disk_bytes / 2 ** 20, 1),
+            }
+            for batch in BATCH_SIZES:
+                queries = xq[:args.qps_queries] if batch == 1 else xq
+                found, qps = search(index, queries, xb, args.k, batch, knobs, rescore_factor)
+                row[f"qps_b{batch}"] = round(qps, 1)
+                if batch == max(BATCH_SIZES):
+                    row["recall"] = round(recall_at_k(found, truth), 4)
+            print(f"  {label(row)}: recall@{args.k}={row['recall']:.4f} qps_b1={row['qps_b1']} qps_b32={row['qps_b32']}")
+            results.append(row)
+    del index
+    return results
+
+
+def label(row: Dict[str, Any]) -> str:
+    parts = [f"{k}={v}" for k, v in {**row["build"], **row["search"]}.items()]
+    return row["index_type"] + (f" ({', '.join(parts)})" if parts else "")
+
+
+def markdown_table(results: List[Dict[str, Any]], k: int) -> str:
+    lines = [
+        f"| index | recall@{k} | QPS b=1 | QPS b=32 | build s | memory MB | disk MB |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        memory = "-" if r["memory_mb"] is None else r["memory_mb"]
+        lines.append(f"| {label(r)} | {r['recall']:.4f} | {r['qps_b1']} | {r['qps_b32']} | {r['build_s']} | {memory} | {r['disk_mb']} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types: recall@k vs QPS, build time, memory and disk size")
+    parser.add_argument("--source", choices=["db", "index"], default="db",
+                        help="db: encode knowledge_entries.content (or --corpus); index: vectors of the server's index file")
+    parser.add_argument("--synthetic", type=int, default=None, help="use N synthetic clustered vectors instead (e.g. 10000, 100000, 1000000)")
+    parser.add_argument("--dim", type=int, default=None, help="synthetic dimensionality (default: configured dim)")
+    parser.add_argument("--corpus", default=None, help="text file with one document per line (--source db)")
+    parser.add_argument("--db", default=None, help="knowledge.db path (default: knowledge_db_path from embedder_config.json)")
+    parser.add_argument("--index", default=None, help="index file for --source index (default: faiss.<device>.index_path)")
+    parser.add_argument("--limit", type=int, default=100000, help="max documents to encode (--source db)")
+    parser.add_argument("--queries", type=int, default=1000, help="number of queries")
+    parser.add_argument("--qps-queries", type=int, default=200, help="queries timed at batch size 1")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", default=DEFAULT_TYPES, help=f"comma-separated index types (default: {DEFAULT_TYPES})")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default: 4 * sqrt(N))")
+    parser.add_argument("--nprobe", type=int_list, default=[1, 4, 16, 64], help="IVF nprobe sweep")
+    parser.add_argument("--hnsw-m", type=int_list, default=[16, 32], help="HNSW M values")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int_list, default=[16, 64, 256], help="HNSW efSearch sweep")
+    parser.add_argument("--pq-m", type=int_list, default=[16, 32], help="IVF-PQ sub-quantizer counts")
+    parser.add_argument("--sq-type", default="sq8,fp16", help="sq code types")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="also measure lossy types re-scored at full precision (0 = off)")
+    parser.add_argument("--train-sample-size", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=None, help="FAISS OpenMP threads (default: all cores)")
+    parser.add_argument("--output", default="bench_index.json")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+    cfg = _read_embedder_config()
+    xb, xq, source = load_vectors(args, cfg)
+    if len(xb) <= args.k:
+        raise SystemExit(f"Need more than k={args.k} vectors, got {len(xb)}")
+    print(f"Corpus: {source}, {len(xb)} vectors, dim={xb.shape[1]}, {len(xq)} queries, k={args.k}")
+
+    started = time.perf_counter()
+    truth = exact_ground_truth(xb, xq, args.k)
+    print(f"Exact ground truth in {time.perf_counter() - started:.1f}s")
+
+    results: List[Dict[str, Any]] = []
+    for index_type, build_params, searches in sweep(args, xb.shape[1], len(xb)):
+        print(f"Building {index_type} {build_params} ...")
+        results.extend(run_config(index_type, build_params, searches, xb, xq, truth, args))
+
+    report = {
+        "source": source,
+        "vectors": len(xb),
+        "dim": int(xb.shape[1]),
+        "queries": len(xq),
+        "k": args.k,
+        "cpu_count": os.cpu_count(),
+        "faiss_threads": faiss.omp_get_max_threads(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(markdown_table(results, args.k))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Start one writer and N reader processes of faiss_mcp_server.py.
+
+The writer listens on --port and owns faiss_add_items / faiss_delete / faiss_save;
+readers listen on --port+1 .. --port+N and serve faiss_search / faiss_hybrid_search
+from the writer's latest published snapshot. Put a load balancer in front of the
+readers, or point search clients at them directly.
+
+Usage:
+    python faiss_cluster.py --readers 4 --port 8401 --device cpu
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER = os.path.join(HERE, "faiss_mcp_server.py")
+
+
+def server_command(role: str, port: int, args) -> list:
+    cmd = [sys.executable, SERVER, "--role", role, "--host", args.host, "--port", str(port), "--transport", args.transport]
+    if args.device:
+        cmd += ["--device", args.device]
+    return cmd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a FAISS writer plus read-only replicas")
+    parser.add_argument("--readers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8401, help="writer port; readers use the following ports")
+    parser.add_argument("--transport", choices=["streamable_http", "sse"], default="streamable_http")
+    parser.add_argument("--device", choices=["cpu", "gpu", "nv_gpu"], default=None)
+    args = parser.parse_args()
+
+    procs = [subprocess.Popen(server_command("writer", args.port, args), cwd=HERE)]
+    # The writer publishes its first snapshot during startup; readers that start
+    # earlier serve the last saved index and switch over on their next poll.
+    for i in range(args.readers):
+        procs.append(subprocess.Popen(server_command("reader", args.port + 1 + i, args), cwd=HERE))
+    print(f"writer: {args.host}:{args.port}, readers: {args.host}:{args.port + 1}-{args.port + args.readers}")
+
+    try:
+        while all(p.poll() is None for p in procs):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Stop readers first so the writer's shutdown snapshot is the last one published
+        for p in reversed(procs):
+            if p.poll() is None:
+                p.send_signal(signal.SIGINT)
+                try:
+                    p.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+FAISS index helpers shared by the MCP server and offline tools.
+
+All indexes use inner product on L2-normalized vectors (cosine similarity) and
+are addressed by external int64 IDs that match `knowledge_entries.id`.
+
+Supported `index_type` values:
+- flat      IndexIDMap(IndexFlatIP)                  exact, exhaustive scan
+- ivf_flat  IndexIVFFlat                             nlist / nprobe
+- ivf_pq    IndexIVFPQ                               nlist / nprobe / pq_m / pq_nbits
+- hnsw      IndexIDMap(IndexHNSWFlat)                hnsw_m / ef_construction / ef_search
+- sq        IndexIDMap(IndexScalarQuantizer)         sq_type (sq8: 1 byte/dim, fp16: 2 bytes/dim)
+- ivf_sq    IndexIVFScalarQuantizer                  nlist / nprobe / sq_type
+"""
+
+import logging
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import faiss
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq", "ivf_sq")
+
+# Index types that score compressed codes; their top candidates can be re-scored
+# against full-precision vectors
+LOSSY_INDEX_TYPES = ("ivf_pq", "sq", "ivf_sq")
+
+SQ_TYPES = {
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+}
+
+# How an index file is opened:
+# - ram     read_index loads everything into process memory
+# - mmap    IVF inverted lists stay in the index file and are paged in by the OS
+#           (read-only; shared between processes through the page cache)
+# - ondisk  IVF inverted lists live in `<index_path>.ivfdata` (OnDiskInvertedLists),
+#           memory-mapped and writable
+LOAD_MODES = ("ram", "mmap", "ondisk")
+
+# FAISS k-means wants ~39 training points per centroid to avoid warnings
+MIN_POINTS_PER_CENTROID = 39
+
+
+def new_flat_index(dim: int) -> faiss.Index:
+    """Empty exact index; the starting point before migrating to an ANN index."""
+    return faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+
+
+def unwrap_index(index: faiss.Index) -> faiss.Index:
+    """Return the index wrapped by an IndexIDMap, or the index itself."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index: faiss.Index) -> str:
+    """Classify an index as 'flat', 'ivf', 'hnsw' or its class name."""
+    inner = unwrap_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexFlat):
+        return "flat"
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return "sq"
+    return type(inner).__name__
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Map an existing index back to its `index_type` name."""
+    kind = index_kind(index)
+    if kind == "ivf":
+        ivf = faiss.downcast_index(faiss.extract_index_ivf(index))
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            return "ivf_pq"
+        if isinstance(ivf, faiss.IndexIVFScalarQuantizer):
+            return "ivf_sq"
+        return "ivf_flat"
+    return kind
+
+
+def supports_remove(index: faiss.Index) -> bool:
+    """Whether `remove_ids` physically drops vectors (HNSW graphs cannot)."""
+    return index_kind(index) in ("flat", "ivf", "sq")
+
+
+def supports_range_search(index: faiss.Index) -> bool:
+    """Whether `range_search` scores are exact, so a threshold on them is reliable (flat and IVF-flat)."""
+    return index_type_of(index) in ("flat", "ivf_flat")
+
+
+def sample_training_set(vectors: np.ndarray, max_samples: int, seed: int = 1234) -> np.ndarray:
+    """Uniformly sample at most `max_samples` rows for index training."""
+    if max_samples <= 0 or vectors.shape[0] <= max_samples:
+        return vectors
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(vectors.shape[0], size=max_samples, replace=False)
+    return vectors[np.sort(rows)]
+
+
+def build_index(
+    index_type: str,
+    dim: int,
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    *,
+    nlist: int = 1024,
+    pq_m: int = 16,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    train_sample_size: int = 100000,
+    sq_type: str = "sq8",
+) -> faiss.Index:
+    """Build (train if needed) an index of `index_type` and add `vectors` with `ids`."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index_type '{index_type}', expected one of {INDEX_TYPES}")
+    if sq_type not in SQ_TYPES:
+        raise ValueError(f"Unknown sq_type '{sq_type}', expected one of {tuple(SQ_TYPES)}")
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    ids = np.ascontiguousarray(ids, dtype="int64")
+
+    if index_type == "flat":
+        index = new_flat_index(dim)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = ef_construction
+        index = faiss.IndexIDMap(base)
+    elif index_type == "sq":
+        train = sample_training_set(vectors, train_sample_size)
+        if train.shape[0] == 0:
+            raise ValueError("sq requires training vectors")
+        base = faiss.IndexScalarQuantizer(dim, SQ_TYPES[sq_type], faiss.METRIC_INNER_PRODUCT)
+        # Learns per-dimension value ranges (a no-op for fp16)
+        base.train(train)
+        index = faiss.IndexIDMap(base)
+    else:
+        train = sample_training_set(vectors, train_sample_size)
+        if train.shape[0] == 0:
+            raise ValueError(f"{index_type} requires training vectors")
+        # Clamp nlist so every centroid gets enough training points
+        effective_nlist = max(1, min(nlist, train.shape[0] // MIN_POINTS_PER_CENTROID))
+        if effective_nlist != nlist:
+            logger.info(f"Clamping nlist from {nlist} to {effective_nlist} for {train.shape[0]} training vectors")
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, effective_nlist, faiss.METRIC_INNER_PRODUCT)
+        elif index_type == "ivf_sq":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, effective_nlist, SQ_TYPES[sq_type], faiss.METRIC_INNER_PRODUCT)
+        else:
+            if dim % pq_m != 0:
+                raise ValueError(f"pq_m ({pq_m}) must divide the embedding dimension ({dim})")
+            index = faiss.IndexIVFPQ(quantizer, dim, effective_nlist, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+        index.train(train)
+
+    if vectors.shape[0]:
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def index_ids(index: faiss.Index) -> np.ndarray:
+    """Return all external IDs stored in `index`."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map).astype("int64")
+    ivf = faiss.extract_index_ivf(index)
+    invlists = ivf.invlists
+    parts = []
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if size == 0:
+            continue
+        ptr = invlists.get_ids(list_no)
+        parts.append(faiss.rev_swig_ptr(ptr, size).copy())
+        invlists.release_ids(list_no, ptr)
+    if not parts:
+        return np.empty(0, dtype="int64")
+    return np.concatenate(parts).astype("int64")
+
+
+def extract_vectors(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """Return `(ids, vectors)` for every entry of `index`.
+
+    Vectors are reconstructed from the stored codes, so this is exact for Flat,
+    IVF-Flat and HNSW, and approximate for PQ- and SQ-compressed indexes.
+    """
+    index = faiss.downcast_index(index)
+    ids = index_ids(index)
+    if ids.size == 0:
+        return ids, np.empty((0, index.d), dtype="float32")
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        inner = faiss.downcast_index(index.index)
+        return ids, inner.reconstruct_n(0, inner.ntotal)
+    ivf = faiss.extract_index_ivf(index)
+    ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    try:
+        vectors = np.vstack([ivf.reconstruct(int(i)) for i in ids]).astype("float32")
+    finally:
+        ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    return ids, vectors
+
+
+def open_index(path: str, load_mode: str = "ram") -> faiss.Index:
+    """Open an index file according to `load_mode` (see LOAD_MODES)."""
+    if load_mode not in LOAD_MODES:
+        raise ValueError(f"Unknown index load mode '{load_mode}', expected one of {LOAD_MODES}")
+    if load_mode == "mmap":
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    if load_mode == "ondisk":
+        # .ivfdata is resolved next to the index file, wherever it was written from
+        return faiss.read_index(path, faiss.IO_FLAG_ONDISK_SAME_DIR)
+    return faiss.read_index(path)
+
+
+def has_ondisk_invlists(index: faiss.Index) -> bool:
+    """Whether the inverted lists of an IVF index are memory-mapped from disk."""
+    if index_kind(index) != "ivf":
+        return False
+    invlists = faiss.downcast_InvertedLists(faiss.extract_index_ivf(index).invlists)
+    return isinstance(invlists, faiss.OnDiskInvertedLists)
+
+
+def move_invlists_ondisk(index: faiss.Index, ivfdata_path: str) -> None:
+    """Move the in-RAM inverted lists of an IVF index into an OnDiskInvertedLists file.
+
+    The index keeps working (adds and removes go to the mapped file); `write_index`
+    then only stores the coarse quantizer and a reference to `ivfdata_path`.
+    """
+    ivf = faiss.extract_index_ivf(index)
+    invlists = faiss.OnDiskInvertedLists(ivf.nlist, ivf.code_size, ivfdata_path)
+    sources = faiss.InvertedListsPtrVector()
+    sources.push_back(ivf.invlists)
+    merge = getattr(invlists, "merge_from_multiple", None) or invlists.merge_from
+    merge(sources.data(), sources.size())
+    ivf.replace_invlists(invlists, True)
+    # The index owns the lists now
+    invlists.this.disown()
+
+
+def search_parameters(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    sel: Optional[faiss.IDSelector] = None,
+) -> Optional[faiss.SearchParameters]:
+    """Per-query recall/latency knobs and ID selector for `index`, or None when there is nothing to set.
+
+    The caller must keep `sel` (and any array it points to) alive while searching.
+    """
+    kind = index_kind(index)
+    if kind == "ivf":
+        params = faiss.SearchParametersIVF()
+        params.nprobe = int(nprobe) if nprobe else faiss.extract_index_ivf(index).nprobe
+    elif kind == "hnsw":
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = int(ef_search) if ef_search else unwrap_index(index).hnsw.efSearch
+    elif sel is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+    if sel is not None:
+        params.sel = sel
+    return params
+
+
+def apply_default_search_params(index: faiss.Index, nprobe: int, ef_search: int) -> None:
+    """Store default nprobe / efSearch on the index itself."""
+    kind = index_kind(index)
+    if kind == "ivf":
+        faiss.extract_index_ivf(index).nprobe = int(nprobe)
+    elif kind == "hnsw":
+        unwrap_index(index).hnsw.efSearch = int(ef_search)
+
+
+class IdBitmap:
+    """Bitmap over non-negative int64 IDs in FAISS `IDSelectorBitmap` layout.
+
+    Bit `i % 8` of byte `i // 8` is set when ID `i` is a member. Updates replace the
+    underlying array instead of mutating it, so a selector handed to a running search
+    keeps pointing at valid memory.
+    """
+
+    def __init__(self, bits: Optional[np.ndarray] = None):
+        self.bits = np.zeros(0, dtype="uint8") if bits is None else np.ascontiguousarray(bits, dtype="uint8")
+        self.count = int(np.unpackbits(self.bits).sum()) if self.bits.size else 0
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int]) -> "IdBitmap":
+        bitmap = cls()
+        bitmap.add(ids)
+        return bitmap
+
+    def add(self, ids: Iterable[int]) -> None:
+        ids = np.asarray(list(ids), dtype="int64")
+        if ids.size == 0:
+            return
+        nbytes = max(self.bits.size, int(ids.max() >> 3) + 1)
+        bits = np.zeros(nbytes, dtype="uint8")
+        bits[:self.bits.size] = self.bits
+        np.bitwise_or.at(bits, ids >> 3, (1 << (ids & 7)).astype("uint8"))
+        self.bits = bits
+        self.count = int(np.unpackbits(bits).sum())
+
+    def discard(self, ids: Iterable[int]) -> None:
+        ids = np.asarray([i for i in ids if (i >> 3) < self.bits.size], dtype="int64")
+        if ids.size == 0:
+            return
+        bits = self.bits.copy()
+        np.bitwise_and.at(bits, ids >> 3, (~(1 << (ids & 7))).astype("uint8"))
+        self.bits = bits
+        self.count = int(np.unpackbits(bits).sum())
+
+    def difference(self, other: "IdBitmap") -> "IdBitmap":
+        """Members of this bitmap that are not in `other`."""
+        bits = self.bits.copy()
+        n = min(bits.size, other.bits.size)
+        bits[:n] &= ~other.bits[:n]
+        return IdBitmap(bits)
+
+    def __contains__(self, id_: int) -> bool:
+        i = int(id_)
+        return 0 <= (i >> 3) < self.bits.size and bool((self.bits[i >> 3] >> (i & 7)) & 1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def mask(self, ids: np.ndarray) -> np.ndarray:
+        """Boolean membership mask for an array of IDs."""
+        ids = np.asarray(ids, dtype="int64")
+        inside = (ids >= 0) & ((ids >> 3) < self.bits.size)
+        out = np.zeros(ids.shape, dtype=bool)
+        sel = ids[inside]
+        out[inside] = ((self.bits[sel >> 3] >> (sel & 7)) & 1).astype(bool)
+        return out
+
+    def selector(self, exclude: bool = False) -> Tuple[faiss.IDSelector, np.ndarray]:
+        """Return `(selector, bits)`; keep `bits` referenced for as long as the selector is used."""
+        bits = self.bits if self.bits.size else np.zeros(1, dtype="uint8")
+        sel = faiss.IDSelectorBitmap(bits.size, faiss.swig_ptr(bits))
+        if exclude:
+            inner = sel
+            sel = faiss.IDSelectorNot(inner)
+            sel.referenced_objects = [inner]
+        return sel, bits
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IdBitmap":
+        return cls(np.load(path))
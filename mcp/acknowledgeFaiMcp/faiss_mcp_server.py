@@ -14,20 +14,63 @@ Notes:
 
 import os
 import json
+import asyncio
+import hashlib
 import logging
-from contextlib import asynccontextmanager
-from typing import Optional, List, Dict, Any
+import sqlite3
+import threading
+import time
+import functools
+import glob
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+# Startup phase timings (seconds), logged by app_lifespan and reported by /health
+_imports_started = time.perf_counter()
+_startup_timings: Dict[str, float] = {}
 
 import numpy as np
 import faiss
 import importlib
+try:
+    import orjson
+except ImportError:  # optional: /call_tool falls back to json
+    orjson = None
 from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
 
 from pydantic import BaseModel, Field, ConfigDict
 from mcp.server.fastmcp import FastMCP, Context
 from datetime import datetime, timezone
-from memory_api import MemoryAPIClient
+from memory_api import MemoryAPIClient, set_faiss_kb
+from faiss_index import (
+    INDEX_TYPES,
+    LOAD_MODES,
+    LOSSY_INDEX_TYPES,
+    SQ_TYPES,
+    IdBitmap,
+    apply_default_search_params,
+    build_index,
+    extract_vectors,
+    has_ondisk_invlists,
+    index_ids,
+    index_kind,
+    index_type_of,
+    move_invlists_ondisk,
+    new_flat_index,
+    open_index,
+    search_parameters,
+    supports_range_search,
+    supports_remove,
+)
+from vector_log import OP_ADD, VectorLog, write_bytes_atomic
+from vector_store import VectorStore
+
+
+_startup_timings["imports"] = round(time.perf_counter() - _imports_started, 3)
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -36,6 +79,11 @@ logger = logging.getLogger(__name__)
 
 # -------------------- Configuration --------------------
 
+# single: one process does everything; writer: owns add/delete/save and publishes
+# snapshots; reader: serves searches from the writer's latest published snapshot
+ROLES = ("single", "writer", "reader")
+
+
 class FaissConfig(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
 
@@ -44,18 +92,387 @@ class FaissConfig(BaseModel):
     index_path: str = Field(default="faiss.index", description="Path to faiss index file")
     meta_path: str = Field(default="faiss_meta.json", description="Path to metadata JSON file")
     knowledge_db_path: str = Field(default="knowledge.db", description="Path to SQLite knowledge database")
+    metadata_cache_size: int = Field(default=10000, ge=0, description="Max entries kept in the in-memory metadata LRU cache")
+
+    # Index selection. The store starts as an exact Flat index and migrates to
+    # `index_type` once it holds `migrate_threshold` vectors.
+    index_type: str = Field(default="flat", description=f"One of {INDEX_TYPES}")
+    migrate_threshold: int = Field(default=50000, ge=0, description="ntotal at which a Flat index is rebuilt as `index_type`")
+    train_sample_size: int = Field(default=100000, ge=1, description="Max vectors sampled to train IVF indexes")
+    nlist: int = Field(default=1024, ge=1, description="IVF: number of inverted lists")
+    nprobe: int = Field(default=16, ge=1, description="IVF: default lists visited per query")
+    pq_m: int = Field(default=16, ge=1, description="IVF-PQ: sub-quantizers (must divide dim)")
+    pq_nbits: int = Field(default=8, ge=1, le=16, description="IVF-PQ: bits per sub-quantizer code")
+    hnsw_m: int = Field(default=32, ge=2, description="HNSW: neighbours per node")
+    ef_construction: int = Field(default=200, ge=1, description="HNSW: build-time candidate list size")
+    ef_search: int = Field(default=64, ge=1, description="HNSW: default query-time candidate list size")
+    sq_type: str = Field(default="sq8", description=f"sq / ivf_sq: code type, one of {tuple(SQ_TYPES)}")
+    # Compressed indexes (sq, ivf_sq, ivf_pq) keep float32 copies in <index_path>.vectors
+    # (memory-mapped, not resident) to re-score their top candidates exactly.
+    rescore_factor: int = Field(default=4, ge=0, description="Lossy indexes: re-score the top k * rescore_factor candidates at full precision (0 = off)")
+    index_load_mode: str = Field(default="ram", description=f"How the index file is opened, one of {LOAD_MODES}")
+
+    # Deletion. Indexes without `remove_ids` (HNSW) hide deleted IDs via a tombstone
+    # bitmap and are rebuilt in the background once tombstones pass this ratio of ntotal.
+    compact_tombstone_ratio: float = Field(default=0.2, gt=0, le=1, description="Tombstone/ntotal ratio that triggers compaction")
+
+    # Embedding cache: repeat documents/queries skip the model entirely
+    embedding_cache_enabled: bool = Field(default=True, description="Cache embeddings keyed by (model_id, sha1(text))")
+    embedding_cache_path: Optional[str] = Field(default=None, description="SQLite file for cached embeddings (default: next to index_path)")
+    embedding_cache_size: int = Field(default=4096, ge=0, description="Max embeddings kept in the in-memory LRU for hot queries")
+
+    # Search result cache: repeated identical searches skip encoding and the index scan
+    search_cache_size: int = Field(default=1024, ge=0, description="Max cached search results (0 disables the cache)")
+    search_cache_max_bytes: int = Field(default=16 * 2**20, ge=0, description="Max bytes of cached id/score lists")
+
+    # Micro-batching of concurrent faiss_search calls (window 0 disables batching)
+    search_batch_window_ms: float = Field(default=3.0, ge=0, description="How long a search waits for others to share its batch")
+    search_batch_max_size: int = Field(default=32, ge=1, description="Flush a search batch early once it holds this many queries")
+
+    # Executors. Searches and ingest run on separate thread pools so a large ingest
+    # cannot starve interactive searches; both lanes have a bounded queue.
+    search_workers: int = Field(default=4, ge=1, description="Threads serving index.search (FAISS releases the GIL)")
+    search_queue_size: int = Field(default=256, ge=1, description="Max searches queued or running before callers wait")
+    ingest_workers: int = Field(default=1, ge=1, description="Threads serving add/delete/save")
+    ingest_queue_size: int = Field(default=8, ge=1, description="Max ingest jobs queued or running before callers wait")
+    queue_timeout_s: float = Field(default=30.0, gt=0, description="How long a caller waits for a queue slot before being rejected")
+    embed_processes: int = Field(default=0, ge=0, description="CPU device only: encode in a pool of this many processes (0 = in-process)")
+    embed_shard_size: int = Field(default=256, ge=1, description="Max texts per encode-pool task; larger encodes are split across the processes")
+    embed_process_threads: int = Field(default=0, ge=0, description="torch threads per encode process (0 = cpu_count // embed_processes)")
+
+    # Durability. Adds/deletes are appended to `<index_path>.vlog.*` and replayed on
+    # startup; snapshots rewrite the index file atomically and truncate the log.
+    vector_log_enabled: bool = Field(default=True, description="Append every add/delete to the vector log")
+    vector_log_fsync: bool = Field(default=True, description="fsync the vector log after every append")
+    snapshot_interval_s: float = Field(default=300.0, ge=0, description="Background snapshot period in seconds (0 = only on save/shutdown)")
+
+    # Chunked indexing. Documents longer than `chunk_size_tokens` are split into
+    # overlapping chunks that are indexed separately and aggregated per document on search.
+    chunk_size_tokens: int = Field(default=0, ge=0, description="Tokens per chunk, below the model's max length minus special tokens (0 = one vector per document)")
+    chunk_overlap_tokens: int = Field(default=64, ge=0, description="Tokens shared by consecutive chunks")
+    chunk_aggregation: str = Field(default="max", description="How chunk scores combine into a document score: max or sum")
+    chunk_overfetch: int = Field(default=4, ge=1, description="Search k * chunk_overfetch chunks to find k distinct documents")
+
+    filter_cache_size: int = Field(default=256, ge=0, description="Metadata filters whose allowed-ID bitmaps are kept in memory")
+
+    # Multi-process topology. A writer publishes `<index_path>.snap.NNNNNN` files and
+    # points `<index_path>.generation` at the newest; readers mmap it and follow the pointer.
+    role: str = Field(default="single", description=f"Process role, one of {ROLES}")
+    publish_interval_s: float = Field(default=2.0, gt=0, description="Writer: publish a snapshot at most this often while the index changes")
+    published_snapshots_kept: int = Field(default=2, ge=1, description="Writer: published snapshot files kept for readers still mapping them")
+    reader_poll_interval_s: float = Field(default=1.0, gt=0, description="Reader: how often the generation file is checked")
+
+
+# -------------------- Caching --------------------
+
+class LRUCache:
+    """Small thread-safe LRU cache with a bounded number of entries."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = int(maxsize)
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self) -> List[Any]:
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RWLock:
+    """Readers-writer lock: concurrent searches, exclusive index mutations."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            # Writers take priority so a stream of searches cannot starve an add
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class BoundedExecutor:
+    """Thread pool with a bounded number of queued + running jobs.
+
+    `run` waits up to `timeout` seconds for a free slot (backpressure) and raises
+    once the queue stays full, instead of letting work pile up unboundedly.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int, timeout: float):
+        self.name = name
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+
+    async def run(self, fn, *args, **kwargs):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"{self.name} queue is full ({self.max_pending} pending), retry later")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by `(model_id, sha1(normalized_text))`.
+
+    Vectors are stored as float16 blobs in a small SQLite file, with an in-memory
+    LRU of float32 vectors in front for hot queries.
+    """
+
+    def __init__(self, path: str, model_id: str, lru_size: int = 4096):
+        self.path = path
+        self.model_id = model_id
+        self.lru = LRUCache(lru_size)
+        self.disk_hits = 0
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model_id TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model_id, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return cached vectors aligned with `texts` (None for misses)."""
+        hashes = [self.text_hash(t) for t in texts]
+        found: List[Optional[np.ndarray]] = [self.lru.get(h) for h in hashes]
+        missing = sorted({h for h, v in zip(hashes, found) if v is None})
+        if missing:
+            rows: Dict[str, np.ndarray] = {}
+            with self._lock:
+                for start in range(0, len(missing), 900):
+                    chunk = missing[start:start + 900]
+                    placeholders = ",".join("?" * len(chunk))
+                    cur = self._conn.execute(
+                        f"SELECT text_hash, dim, vector FROM embeddings WHERE model_id = ? AND text_hash IN ({placeholders})",
+                        [self.model_id, *chunk],
+                    )
+                    for text_hash, dim, blob in cur.fetchall():
+                        rows[text_hash] = np.frombuffer(blob, dtype=np.float16, count=dim).astype(np.float32)
+            self.disk_hits += len(rows)
+            for i, h in enumerate(hashes):
+                if found[i] is None and h in rows:
+                    found[i] = rows[h]
+                    self.lru.put(h, rows[h])
+        return found
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        records = []
+        for text, vec in zip(texts, vectors):
+            h = self.text_hash(text)
+            vec = np.asarray(vec, dtype=np.float32)
+            self.lru.put(h, vec)
+            records.append((self.model_id, h, int(vec.shape[0]), vec.astype(np.float16).tobytes()))
+        if not records:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                records,
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SearchResultCache:
+    """LRU of search hits keyed by `(query hash, k, nprobe, ef_search, filter key)`.
+
+    Only id/score arrays are stored; metadata is resolved on every hit. Each entry
+    remembers the index generation it was computed at, and since every add and
+    delete bumps the generation, older entries miss and are dropped on access.
+    """
+
+    # Rough per-entry cost of the key, tuple and array headers
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self._data: "OrderedDict[Any, Tuple[int, np.ndarray, np.ndarray, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def query_key(embedding: Optional[List[float]], query_text: Optional[str]) -> Tuple[str, str]:
+        if embedding is not None:
+            return ("e", hashlib.sha1(np.asarray(embedding, dtype='float32').tobytes()).hexdigest())
+        return ("t", EmbeddingCache.text_hash(query_text))
+
+    def get(self, key, generation: int) -> Optional[List[Tuple[int, float]]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != generation:
+                self._drop(key)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return list(zip(entry[1].tolist(), entry[2].tolist()))
+
+    def put(self, key, generation: int, hits: List[Tuple[int, float]]) -> None:
+        ids = np.array([idx for idx, _ in hits], dtype='int64')
+        scores = np.array([score for _, score in hits], dtype='float32')
+        size = ids.nbytes + scores.nbytes + self.ENTRY_OVERHEAD
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (generation, ids, scores, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key) -> None:
+        self.bytes -= self._data.pop(key)[3]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
 
 
 # -------------------- FAISS Knowledge Store --------------------
 
 _embedder = None
+_embedder_lock = threading.Lock()
+
+
+@contextmanager
+def _startup_phase(name: str):
+    """Record how long a startup phase took in `_startup_timings`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup_timings[name] = round(time.perf_counter() - started, 3)
 
 
 def _read_embedder_config(cli_device =  None):
     global _embed_cfg
     if _embed_cfg:
         return _embed_cfg
+    _embed_cfg = _parse_embedder_config(cli_device)
+    return _embed_cfg
+
 
+def _parse_embedder_config(cli_device=None) -> Dict[str, Any]:
     """Read embedder config from `embedder_config.json` if present, otherwise use env vars."""
     here = os.path.dirname(__file__)
     cfg_path = os.path.join(here, "embedder_config.json")
@@ -102,9 +519,114 @@ def _read_embedder_config(cli_device =  None):
         cfg['meta_path'] = meta_path
 
     logger.info(f"Using embedder config device: {cfg['device']}")
+    return cfg
+
+
+# Defaults for length-bucketed batching; override per device section with
+# `max_tokens_per_batch` / `batch_size` in embedder_config.json
+DEFAULT_MAX_TOKENS_PER_BATCH = 16384
+DEFAULT_EMBED_BATCH_SIZE = 64
+
+
+def length_buckets(lengths: List[int], max_tokens: int, max_batch: int) -> List[List[int]]:
+    """Group row indices into batches of similar length.
+
+    Rows are sorted by length and packed greedily so that each batch pads to at most
+    `max_tokens` tokens (rows * longest row) and holds at most `max_batch` rows. A row
+    longer than `max_tokens` gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # Sorted ascending, so the row being added is the longest in the batch
+        if current and ((len(current) + 1) * max(lengths[i], 1) > max_tokens or len(current) >= max_batch):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def _batching_limits(device_cfg: Optional[Dict[str, Any]]) -> Tuple[int, int]:
+    device_cfg = device_cfg or {}
+    return (
+        int(device_cfg.get('max_tokens_per_batch', DEFAULT_MAX_TOKENS_PER_BATCH)),
+        int(device_cfg.get('batch_size', DEFAULT_EMBED_BATCH_SIZE)),
+    )
+
+
+def encode_texts(embedder, texts: List[str]) -> np.ndarray:
+    """Encode `texts` in length-sorted, token-bounded batches and return rows in input order.
+
+    The ONNX embedder buckets internally; for SentenceTransformer models the buckets
+    are built here from the model's own tokenizer so one long document does not pad
+    (or blow up the memory of) a whole batch.
+    """
+    if getattr(embedder, 'buckets_by_length', False) or not texts:
+        return np.asarray(embedder.encode(texts, convert_to_numpy=True), dtype='float32')
+    tokenizer = getattr(embedder, 'tokenizer', None)
+    if tokenizer is None:
+        return np.asarray(embedder.encode(texts, convert_to_numpy=True), dtype='float32')
+    cfg = _read_embedder_config()
+    device = cfg.get('device', 'cpu')
+    max_tokens, max_batch = _batching_limits(cfg.get('nv_gpu' if device == 'cuda' else device))
+    max_len = getattr(embedder, 'max_seq_length', None)
+    lengths = [len(ids) for ids in tokenizer(texts, truncation=bool(max_len), max_length=max_len)['input_ids']]
+    out = None
+    for bucket in length_buckets(lengths, max_tokens, max_batch):
+        arr = np.asarray(embedder.encode([texts[i] for i in bucket], batch_size=len(bucket), convert_to_numpy=True), dtype='float32')
+        if out is None:
+            out = np.empty((len(texts),) + arr.shape[1:], dtype='float32')
+        out[bucket] = arr
+    return out
+
+
+_GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL',
+}
+
+
+def _onnx_session_options(ort, opts: Optional[Dict[str, Any]] = None):
+    """Build `ort.SessionOptions` from the `session_options` section of the gpu config.
+
+    Keys: graph_optimization_level (disable/basic/extended/all, default all),
+    intra_op_num_threads / inter_op_num_threads (0 = onnxruntime default),
+    execution_mode (sequential/parallel).
+    """
+    opts = opts or {}
+    so = ort.SessionOptions()
+    level = str(opts.get('graph_optimization_level', 'all')).lower()
+    if level not in _GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Unknown graph_optimization_level '{level}', expected one of {list(_GRAPH_OPTIMIZATION_LEVELS)}")
+    so.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _GRAPH_OPTIMIZATION_LEVELS[level])
+    so.intra_op_num_threads = int(opts.get('intra_op_num_threads', 0))
+    so.inter_op_num_threads = int(opts.get('inter_op_num_threads', 0))
+    if str(opts.get('execution_mode', 'sequential')).lower() == 'parallel':
+        so.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    else:
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    return so
 
-    _embed_cfg = cfg
-    return _embed_cfg
+
+def _resolve_module_path(path: Optional[str]) -> Optional[str]:
+    # Resolve relative paths relative to this module file so configs may use
+    # paths like "./model/foo.onnx" without relying on the current working dir.
+    if path and not os.path.isabs(path):
+        path = os.path.normpath(os.path.join(os.path.dirname(__file__), path))
+    return path
+
+
+def _resolve_config_paths(cfg: FaissConfig) -> FaissConfig:
+    # The index, its side files and the SQLite files all live relative to this module,
+    # whatever directory the server is started from
+    for field in ("index_path", "meta_path", "knowledge_db_path", "embedding_cache_path"):
+        setattr(cfg, field, _resolve_module_path(getattr(cfg, field)))
+    return cfg
 
 
 def get_embedder_for_AMD_gpu(cfg=None, device=None):
@@ -119,44 +641,53 @@ def get_embedder_for_AMD_gpu(cfg=None, device=None):
 
     logger.info(f"Using gpu_cfg: {gpu_cfg}")
 
-    onnx_path = gpu_cfg.get('onnx_path')
-    # Resolve relative ONNX paths relative to this module file so configs may use
-    # paths like "./model/foo.onnx" without relying on the current working dir.
-    if onnx_path and not os.path.isabs(onnx_path):
-        onnx_path = os.path.join(os.path.dirname(__file__), onnx_path)
-        onnx_path = os.path.normpath(onnx_path)
+    onnx_path = _resolve_module_path(gpu_cfg.get('onnx_path'))
+    # Optional INT8 copy (see quantize_onnx.py), used only when running on CPUExecutionProvider
+    cpu_onnx_path = _resolve_module_path(gpu_cfg.get('cpu_onnx_path'))
+    session_cfg = gpu_cfg.get('session_options', {})
+    max_tokens, max_batch = _batching_limits(gpu_cfg)
     tokenizer_model = gpu_cfg.get('tokenizer')
     if not onnx_path or not tokenizer_model:
         raise ValueError("GPU embedder requires 'onnx_path' and 'tokenizer' configured in embedder_config.json")
 
     # Build a robust ONNX-based embedder wrapper that adapts to input/output names
     class ONNXEmbedder:
+        # encode() sorts inputs by token length and batches them itself (see encode_texts)
+        buckets_by_length = True
+
         def __init__(self, onnx_path, tokenizer_model):
             # Lazy import heavy deps
             from transformers import AutoTokenizer
 
             self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_model, use_fast=True)
 
-            # Choose provider: prefer DirectML (Windows), then CUDA, then CPU
-            providers = ort.get_all_providers()
-            chosen = None
-            if 'DmlExecutionProvider' in providers:
-                chosen = ['DmlExecutionProvider']
-            elif 'CUDAExecutionProvider' in providers:
-                chosen = ['CUDAExecutionProvider']
-            else:
-                chosen = ['CPUExecutionProvider']
+            # Choose provider: explicit `providers` from config, else prefer DirectML (Windows), then CUDA, then CPU
+            providers = ort.get_available_providers()
+            chosen = session_cfg.get('providers')
+            if not chosen:
+                if 'DmlExecutionProvider' in providers:
+                    chosen = ['DmlExecutionProvider']
+                elif 'CUDAExecutionProvider' in providers:
+                    chosen = ['CUDAExecutionProvider']
+                else:
+                    chosen = ['CPUExecutionProvider']
+            if chosen[0] == 'CPUExecutionProvider' and cpu_onnx_path:
+                if os.path.exists(cpu_onnx_path):
+                    onnx_path = cpu_onnx_path
+                else:
+                    logger.warning(f"cpu_onnx_path {cpu_onnx_path} not found, using {onnx_path}")
 
-            self.session = ort.InferenceSession(onnx_path, providers=chosen)
+            self.onnx_path = onnx_path
+            self.providers = chosen
+            self.session = ort.InferenceSession(onnx_path, sess_options=_onnx_session_options(ort, session_cfg), providers=chosen)
+            logger.info(f"ONNX session: model={onnx_path}, providers={self.session.get_providers()}")
 
             # Inspect expected input/output names
             self.input_names = [inp.name for inp in self.session.get_inputs()]
             self.output_names = [out.name for out in self.session.get_outputs()]
 
-        def _prepare_inputs(self, texts):
-            # Tokenize to numpy arrays
-            toks = self.tokenizer(texts, padding=True, truncation=True, return_tensors='np')
-
+        def _prepare_inputs(self, toks, batch_size):
+            # `toks` is the padded tokenizer output (numpy arrays) for one batch
             ort_inputs = {}
             for name in self.input_names:
                 lname = name.lower()
@@ -172,7 +703,7 @@ def get_embedder_for_AMD_gpu(cfg=None, device=None):
                     # Try to find compatible tensor by dtype/shape; fallback to zeros
                     # If input is integer type, provide zeros of appropriate shape
                     inp = next(i for i in self.session.get_inputs() if i.name == name)
-                    shape = [s if isinstance(s, int) else len(texts) for s in inp.shape]
+                    shape = [s if isinstance(s, int) else batch_size for s in inp.shape]
                     import numpy as _np
                     if inp.type.startswith('tensor(int') or 'int' in inp.type:
                         v = _np.zeros(shape, dtype=_np.int64)
@@ -180,6 +711,7 @@ def get_embedder_for_AMD_gpu(cfg=None, device=None):
                         v = _np.zeros(shape, dtype=_np.float32)
                 # Ensure correct dtype
                 import numpy as _np
+                v = _np.asarray(v)
                 if v.dtype.kind == 'i':
                     v = v.astype(_np.int64)
                 elif v.dtype.kind == 'f':
@@ -188,14 +720,41 @@ def get_embedder_for_AMD_gpu(cfg=None, device=None):
 
             return ort_inputs
 
-        def encode(self, texts, convert_to_numpy=True):
+        def encode(self, texts, convert_to_numpy=True, **kwargs):
             # Accept a single string or list
             single = False
             if isinstance(texts, str):
                 texts = [texts]
                 single = True
 
-            ort_inputs = self._prepare_inputs(texts)
+            import numpy as _np
+            if not texts:
+                return _np.empty((0, 0), dtype=_np.float32)
+
+            # Tokenize once without padding, then pad each length bucket to its own
+            # longest row: short documents no longer pay for the longest one, and
+            # every session.run is bounded by max_tokens.
+            enc = self.tokenizer(texts, truncation=True)
+            lengths = [len(ids) for ids in enc['input_ids']]
+            emb = None
+            for bucket in length_buckets(lengths, max_tokens, max_batch):
+                toks = self.tokenizer.pad(
+                    {key: [enc[key][i] for i in bucket] for key in enc.keys()},
+                    padding=True,
+                    return_tensors='np',
+                )
+                arr = self._run(toks, len(bucket))
+                if emb is None:
+                    emb = _np.empty((len(texts), arr.shape[1]), dtype=_np.float32)
+                emb[bucket] = arr
+
+            # If single input, return 1-D vector
+            if single:
+                return emb[0]
+            return emb
+
+        def _run(self, toks, batch_size):
+            ort_inputs = self._prepare_inputs(toks, batch_size)
 
             outs = self.session.run(self.output_names, ort_inputs)
 
@@ -206,38 +765,31 @@ def get_embedder_for_AMD_gpu(cfg=None, device=None):
             # 3) If only token-level outputs (ndim==3) are available, average across sequence axis
             import numpy as _np
             chosen = None
-            chosen_name = None
             for name, out in zip(self.output_names, outs):
                 arr = _np.asarray(out)
                 lname = name.lower()
                 if arr.ndim == 2 and any(k in lname for k in ('sentence', 'pool', 'cls')):
                     chosen = arr
-                    chosen_name = name
                     break
             if chosen is None:
                 for name, out in zip(self.output_names, outs):
                     arr = _np.asarray(out)
                     if arr.ndim == 2:
                         chosen = arr
-                        chosen_name = name
                         break
             if chosen is None:
                 # fallback: take first output and if it's token-level (B, S, D) average over S
                 arr0 = _np.asarray(outs[0])
                 if arr0.ndim == 3:
-                    chosen = arr0.mean(axis=1)
-                    chosen_name = self.output_names[0] + " (mean over seq)"
+                    # Mask out padding so a row's vector does not depend on its batch
+                    mask = _np.asarray(toks.get('attention_mask', _np.ones(arr0.shape[:2])), dtype=_np.float32)[:, :, None]
+                    chosen = (arr0 * mask).sum(axis=1) / _np.maximum(mask.sum(axis=1), 1.0)
                 else:
                     # As a last resort, try to reshape to (batch, -1)
-                    chosen = arr0.reshape((len(texts), -1))
-                    chosen_name = self.output_names[0] + " (reshaped)"
+                    chosen = arr0.reshape((batch_size, -1))
 
             # Ensure float32
-            emb = _np.asarray(chosen, dtype=_np.float32)
-            # If single input, return 1-D vector
-            if single:
-                return emb[0]
-            return emb
+            return _np.asarray(chosen, dtype=_np.float32)
 
     logger.info('Initializing ONNX embedder with model path: %s', onnx_path)
     embedder = ONNXEmbedder(onnx_path, tokenizer_model)
@@ -285,20 +837,25 @@ def get_embedder(model_name: Optional[str] = None):
     global _embedder
     if _embedder is not None:
         return _embedder
+    # Searches and ingest run on worker threads; make sure the model is loaded once
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = _load_embedder()
+    return _embedder
 
+
+def _load_embedder(cfg=None):
     # Determine device and model source from config
-    cfg = _read_embedder_config()
+    cfg = cfg or _read_embedder_config()
     device = cfg.get('device', 'cpu')
 
     logger.info(f"Using embedder device: {device}")
 
     # 根据设备确定embedder
     if device == 'gpu':
-        _embedder = get_embedder_for_AMD_gpu(cfg, device)
-        return _embedder
+        return get_embedder_for_AMD_gpu(cfg, device)
     elif device == 'nv_gpu' or device == 'cuda':
-        _embedder = get_embedder_for_NVIDIA_gpu(cfg, device)
-        return _embedder
+        return get_embedder_for_NVIDIA_gpu(cfg, device)
 
     # Default to CPU sentence-transformers
     try:
@@ -308,123 +865,754 @@ def get_embedder(model_name: Optional[str] = None):
 
     cpu_cfg = cfg.get('cpu', {})
     model_name = cpu_cfg.get('model_name', "sentence-transformers/all-MiniLM-L6-v2")
-    _embedder = SentenceTransformer(model_name)
-    return _embedder
+    return SentenceTransformer(model_name)
+
+
+def _encode_worker_init(embed_cfg, threads: int = 0):
+    """ProcessPoolExecutor initializer: load the model once per worker process."""
+    global _embed_cfg
+    _embed_cfg = embed_cfg
+    get_embedder()
+    if threads > 0:
+        # N processes each running torch's default cpu_count threads oversubscribe the cores
+        try:
+            importlib.import_module('torch').set_num_threads(threads)
+        except ImportError:
+            pass
+
+
+def _make_encode_pool(processes: int, threads: int, embed_cfg) -> ProcessPoolExecutor:
+    """Pool of `processes` encoder processes, one model each (cf. sentence-transformers' start_multi_process_pool)."""
+    threads = threads or max(1, (os.cpu_count() or 1) // processes)
+    logger.info(f"Encoding on a pool of {processes} processes, {threads} threads each")
+    return ProcessPoolExecutor(max_workers=processes, initializer=_encode_worker_init, initargs=(embed_cfg, threads))
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return encode_texts(get_embedder(), texts)
+
+
+def get_embedder_model_id(cfg=None) -> str:
+    """Stable identifier of the configured embedding model, used to key cached embeddings."""
+    cfg = cfg or _read_embedder_config()
+    device = cfg.get('device', 'cpu')
+    # 'cuda' is an alias for the nv_gpu section (see get_embedder)
+    section = 'nv_gpu' if device == 'cuda' else device
+    device_cfg = cfg.get(section, {}) if isinstance(cfg.get(section), dict) else {}
+    if device == 'gpu':
+        # An INT8 cpu_onnx_path produces different vectors than the fp32 model
+        source = device_cfg.get('onnx_path')
+        if device_cfg.get('cpu_onnx_path'):
+            source = f"{source}|{device_cfg['cpu_onnx_path']}"
+    else:
+        source = device_cfg.get('model_path') or device_cfg.get('model_name', "sentence-transformers/all-MiniLM-L6-v2")
+    return f"{device}:{source}:{device_cfg.get('dim', '')}"
+
+
+
+CHUNK_AGGREGATIONS = ("max", "sum")
+
+FILTER_FIELDS = ("category", "type", "source", "tags")
 
 
+def filter_key(filters: Optional[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, Tuple[str, ...]], ...]]:
+    """Canonical, hashable form of a metadata filter `{field: value or [values]}`; None when empty."""
+    if not filters:
+        return None
+    items = []
+    for field in FILTER_FIELDS:
+        values = filters.get(field)
+        if values is None or values == [] or values == "":
+            continue
+        if isinstance(values, str):
+            values = [values]
+        items.append((field, tuple(sorted({str(v) for v in values}))))
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filter fields {sorted(unknown)}, expected {FILTER_FIELDS}")
+    return tuple(items) or None
+
+
+def chunk_spans(text: str, tokenizer, size: int, overlap: int) -> List[Tuple[int, int]]:
+    """Split `text` into overlapping windows of at most `size` tokens.
+
+    Returns character `(start, end)` spans taken from the tokenizer's offset mapping.
+    Without a fast tokenizer (no offsets) one character is counted as one token,
+    which is close for CJK text and conservative for everything else.
+    """
+    offsets = None
+    if tokenizer is not None:
+        try:
+            offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+        except Exception:
+            offsets = None
+    if offsets is None:
+        offsets = [(i, i + 1) for i in range(len(text))]
+    if len(offsets) <= size:
+        return [(0, len(text))]
+    step = max(1, size - overlap)
+    spans = []
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + size]
+        spans.append((window[0][0], window[-1][1]))
+        if start + size >= len(offsets):
+            break
+    return spans
+
+
+class ReindexJob:
+    """State of a background `faiss_reindex` run (one per FaissKB at a time)."""
+
+    def __init__(self, embed_cfg: Dict[str, Any], cfg: FaissConfig, batch_size: int):
+        self.embed_cfg = embed_cfg
+        self.cfg = cfg
+        self.batch_size = batch_size
+        self.model_id = get_embedder_model_id(embed_cfg)
+        # running -> swapping -> done | failed | cancelled
+        self.state = "running"
+        self.entries = 0
+        self.vectors = 0
+        self.total_entries = 0
+        self.resumed_from: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at: Optional[str] = None
+        self.cancel = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("running", "swapping")
+
+    def finish(self, state: str, error: Optional[str] = None):
+        self.state = state
+        self.error = error
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "device": self.embed_cfg.get("device", "cpu"),
+            "model_id": self.model_id,
+            "dim": self.cfg.dim,
+            "index_type": self.cfg.index_type,
+            "index_path": self.cfg.index_path,
+            "entries": self.entries,
+            "total_entries": self.total_entries,
+            "vectors": self.vectors,
+            "resumed_from": self.resumed_from,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
 
 class FaissKB:
     def __init__(self, cfg: FaissConfig):
         self.cfg = cfg
+        _resolve_config_paths(cfg)
         self.dim = int(cfg.dim)
         self.index: Optional[faiss.Index] = None
-        self.metadatas: Dict[str, Any] = {}
+        # Bounded LRU in front of the knowledge DB; entries are resolved lazily on search
+        self.metadatas = LRUCache(cfg.metadata_cache_size)
         self.memory_client: Optional[MemoryAPIClient] = None
-        self._ensure_index()
-        self._init_database()
+        # IDs deleted from indexes that cannot remove vectors; filtered out at search time
+        self.tombstones = IdBitmap()
+        # Searches share the read side; add / remove / swap after a background rebuild take the write side
+        self._lock = RWLock()
+        self._rebuilding = False
+        # While a migration or compaction runs, adds and deletes are recorded here and replayed on the new index
+        self._rebuild_log: Optional[List[Any]] = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        # Optional process pool for CPU embedding (set up by app_lifespan)
+        self.encode_pool: Optional[ProcessPoolExecutor] = None
+        # True while self.index is a read-only mapping of index_path (index_load_mode=mmap)
+        self._mapped = False
+        self.vector_log: Optional[VectorLog] = None
+        # Full-precision vectors for re-scoring a lossy index (see rescore_factor)
+        self.vector_store: Optional[VectorStore] = None
+        # Serializes snapshots (faiss_save, shutdown and the background thread)
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        # chunk id -> {"parent_id", "chunk_index"}; plain entries map to themselves with chunk_index None
+        self.chunk_parents = LRUCache(cfg.metadata_cache_size)
+        self._has_chunks = False
+        # Bumped on every add/delete; cached per-filter bitmaps from older generations are recomputed
+        self.generation = 0
+        self.filter_bitmaps = LRUCache(cfg.filter_cache_size)
+        self.search_cache: Optional[SearchResultCache] = None
+        if cfg.search_cache_size > 0:
+            self.search_cache = SearchResultCache(cfg.search_cache_size, cfg.search_cache_max_bytes)
+        self.reindex_job: Optional[ReindexJob] = None
+        # While a reindex runs, deleted vector IDs are recorded here and removed from the new index on swap
+        self._reindex_deletes: Optional[List[int]] = None
+        # Readers never write: no vector log, migration, compaction or snapshots
+        self.read_only = cfg.role == "reader"
+        # Generation covered by the last snapshot; background snapshots skip when unchanged
+        self._snapshot_generation = 0
+        # Sequence number of the published snapshot this process wrote (writer) or serves (reader)
+        self.published_seq = 0
+        if cfg.role not in ROLES:
+            raise ValueError(f"Unknown role '{cfg.role}', expected one of {ROLES}")
+        if cfg.role == "reader" and cfg.index_load_mode != "mmap":
+            logger.info(f"role=reader maps the published snapshot; ignoring index_load_mode={cfg.index_load_mode}")
+            cfg.index_load_mode = "mmap"
+        elif cfg.role == "writer" and cfg.index_load_mode != "ram":
+            # Published snapshots must be self-contained files, so the writer keeps the whole index in RAM
+            logger.info(f"role=writer keeps the index in RAM; ignoring index_load_mode={cfg.index_load_mode}")
+            cfg.index_load_mode = "ram"
+        with _startup_phase("index_load"):
+            self._ensure_index()
+            self._init_vector_store()
+        with _startup_phase("metadata"):
+            self._init_database()
+            self._init_embedding_cache()
+        with _startup_phase("vector_log"):
+            self._init_vector_log()
+        if cfg.role == "writer":
+            # Readers start from exactly the state the log replay produced
+            with _startup_phase("publish"):
+                self.save()
+        self._start_background_thread()
+
+    @property
+    def tombstone_path(self) -> str:
+        return self.cfg.index_path + ".tombstones.npy"
+
+    @property
+    def ivfdata_path(self) -> str:
+        return self.cfg.index_path + ".ivfdata"
+
+    @property
+    def vector_log_prefix(self) -> str:
+        return self.cfg.index_path + ".vlog"
+
+    @property
+    def vector_store_path(self) -> str:
+        return self.cfg.index_path + ".vectors"
+
+    @property
+    def generation_path(self) -> str:
+        return self.cfg.index_path + ".generation"
+
+    def _snapshot_file(self, seq: int) -> str:
+        return f"{self.cfg.index_path}.snap.{seq:06d}"
+
+    def read_published(self) -> Optional[Dict[str, Any]]:
+        """The writer's generation file: `{"seq", "index", "tombstones", "ntotal", "published_at"}`, or None."""
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                published = json.load(f)
+        except FileNotFoundError:
+            return None
+        base = os.path.dirname(os.path.abspath(self.cfg.index_path))
+        for key in ("index", "tombstones"):
+            if published.get(key):
+                published[key] = os.path.join(base, published[key])
+        return published
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("This FAISS process is a read-only replica (role=reader); send writes to the writer")
 
     # 注释： 初始化创建faiss索引
     def _ensure_index(self):
-        # Use IndexFlatIP wrapped by an ID map for cosine similarity (inner product)
+        # Start with IndexFlatIP wrapped by an ID map for cosine similarity (inner product);
+        # `_maybe_migrate` swaps in the configured ANN index once the corpus is large enough.
         # Note: For cosine similarity, vectors should be L2-normalized before adding to index
+        if self.cfg.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index_type '{self.cfg.index_type}', expected one of {INDEX_TYPES}")
+        if self.cfg.chunk_aggregation not in CHUNK_AGGREGATIONS:
+            raise ValueError(f"Unknown chunk_aggregation '{self.cfg.chunk_aggregation}', expected one of {CHUNK_AGGREGATIONS}")
+        if self.cfg.sq_type not in SQ_TYPES:
+            raise ValueError(f"Unknown sq_type '{self.cfg.sq_type}', expected one of {tuple(SQ_TYPES)}")
+        if self.cfg.index_load_mode not in LOAD_MODES:
+            raise ValueError(f"Unknown index_load_mode '{self.cfg.index_load_mode}', expected one of {LOAD_MODES}")
         if self.index is None:
-            base_index = faiss.IndexFlatIP(self.dim)
-            self.index = faiss.IndexIDMap(base_index)
+            self.index = new_flat_index(self.dim)
 
         logger.info(f"Loaded faiss conf from {self.cfg}")
 
+        index_path, tombstone_path = self.cfg.index_path, self.tombstone_path
+        if self.read_only:
+            published = self.read_published()
+            if published is not None:
+                index_path, tombstone_path = published["index"], published.get("tombstones")
+                self.published_seq = int(published["seq"])
+
         # load index if exists
-        if os.path.exists(self.cfg.index_path):
+        if os.path.exists(index_path):
             try:
-                self.index = faiss.read_index(self.cfg.index_path)
-                logger.info(f"Loaded faiss index from {self.cfg.index_path}")
+                started = time.perf_counter()
+                self.index = open_index(index_path, self.cfg.index_load_mode)
+                # Only IVF inverted lists are mapped; Flat/HNSW are read into RAM in every mode
+                self._mapped = self.cfg.index_load_mode == "mmap" and index_kind(self.index) == "ivf"
+                logger.info(
+                    f"Loaded faiss index from {index_path} ({index_kind(self.index)}, ntotal={self.index.ntotal}, "
+                    f"mode={self.cfg.index_load_mode}, mapped={self._mapped or has_ondisk_invlists(self.index)}) "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
             except Exception:
                 logger.warning("Failed to read faiss index file, using empty index")
+        if tombstone_path and os.path.exists(tombstone_path):
+            try:
+                self.tombstones = IdBitmap.load(tombstone_path)
+                logger.info(f"Loaded {len(self.tombstones)} tombstones from {tombstone_path}")
+            except Exception:
+                logger.warning("Failed to read tombstone file, deleted vectors may reappear in results")
+        apply_default_search_params(self.index, self.cfg.nprobe, self.cfg.ef_search)
+        if not self.read_only:
+            self._maybe_migrate()
+
+    def _make_writable(self):
+        """Replace a read-only mmap'd index with an in-RAM copy before the first write.
+
+        Caller holds the write lock. Until then the mapped file matches the in-memory
+        state, so reloading it loses nothing.
+        """
+        if not self._mapped:
+            return
+        logger.info(f"Loading mmap'd faiss index into RAM for writing: {self.cfg.index_path}")
+        self.index = faiss.read_index(self.cfg.index_path)
+        apply_default_search_params(self.index, self.cfg.nprobe, self.cfg.ef_search)
+        self._mapped = False
+
+    def _index_build_params(self, cfg: Optional[FaissConfig] = None) -> Dict[str, Any]:
+        cfg = cfg or self.cfg
+        return {
+            "nlist": cfg.nlist,
+            "pq_m": cfg.pq_m,
+            "pq_nbits": cfg.pq_nbits,
+            "hnsw_m": cfg.hnsw_m,
+            "ef_construction": cfg.ef_construction,
+            "train_sample_size": cfg.train_sample_size,
+            "sq_type": cfg.sq_type,
+        }
+
+    def _maybe_migrate(self):
+        """Start a background rebuild of a Flat index as the configured ANN index once ntotal crosses the threshold."""
+        target = self.cfg.index_type
+        if target == "flat" or self.index is None or index_kind(self.index) != "flat":
+            return
+        if self._rebuilding or self.index.ntotal == 0 or self.index.ntotal < self.cfg.migrate_threshold:
+            return
+        # Training an ANN index takes seconds to minutes; searches and adds keep using the flat index meanwhile
+        self._rebuilding = True
+        threading.Thread(target=self._rebuild, args=(target,), name="faiss-migration", daemon=True).start()
+
+    @staticmethod
+    def _live_vectors(index: faiss.Index, tombstones: Optional[IdBitmap] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """`(ids, vectors)` of `index` without tombstoned entries."""
+        ids, vectors = extract_vectors(index)
+        if tombstones is not None and len(tombstones):
+            keep = ~tombstones.mask(ids)
+            ids, vectors = ids[keep], vectors[keep]
+        return ids, vectors
+
+    def _build(self, index_type: str, ids: np.ndarray, vectors: np.ndarray) -> faiss.Index:
+        """Build a fresh `index_type` index holding `vectors` under `ids`."""
+        new_index = build_index(index_type, self.dim, vectors, ids, **self._index_build_params())
+        apply_default_search_params(new_index, self.cfg.nprobe, self.cfg.ef_search)
+        return new_index
+
+    def _maybe_compact(self):
+        """Start a background rebuild once tombstones exceed `compact_tombstone_ratio`."""
+        ntotal = self.index.ntotal if self.index is not None else 0
+        if self._rebuilding or not len(self.tombstones) or ntotal == 0:
+            return
+        if len(self.tombstones) / ntotal < self.cfg.compact_tombstone_ratio:
+            return
+        self._rebuilding = True
+        threading.Thread(target=self._rebuild, name="faiss-compaction", daemon=True).start()
+
+    def _rebuild(self, index_type: Optional[str] = None):
+        """Rebuild the live vectors as `index_type` (default: the current type) and swap it in.
+
+        Used for both flat->ANN migration and compaction.
+        """
+        try:
+            # Copy the live vectors under the read lock (searches continue, writers wait),
+            # then build the new index without holding any lock.
+            with self._lock.read():
+                source = self.index
+                source_type = index_type_of(source)
+                index_type = index_type or source_type
+                logger.info(
+                    f"Rebuilding {source_type} index as {index_type}: "
+                    f"ntotal={source.ntotal}, tombstones={len(self.tombstones)}"
+                )
+                ids, vectors = self._live_vectors(source, self.tombstones)
+                self._rebuild_log = []
+            new_index = self._build(index_type, ids, vectors)
+            with self._lock.write():
+                if self.index is not source:
+                    # faiss_reindex swapped in a new index meanwhile
+                    logger.info("Index was replaced during the rebuild; dropping the rebuilt copy")
+                    self._rebuild_log = None
+                    return
+                # Replay writes that happened while the new index was being built
+                new_tombstones = IdBitmap()
+                removable = supports_remove(new_index)
+                for op, payload in self._rebuild_log:
+                    if op == "add":
+                        vectors, ids = payload
+                        new_index.add_with_ids(vectors, ids)
+                    elif removable:
+                        new_index.remove_ids(np.asarray(payload, dtype='int64'))
+                    else:
+                        new_tombstones.add(payload)
+                self.index = new_index
+                self._mapped = False
+                self.tombstones = new_tombstones
+                self._rebuild_log = None
+                # Cached results were ranked by the old index
+                self.generation += 1
+            logger.info(f"Rebuild finished: {type(new_index).__name__}, ntotal={new_index.ntotal}")
+        except Exception:
+            logger.exception("Faiss index rebuild failed")
+            with self._lock.write():
+                self._rebuild_log = None
+        finally:
+            self._rebuilding = False
 
     def _init_database(self):
         """Initialize SQLite database using MemoryAPIClient."""
-        db_path = self.cfg.knowledge_db_path
-        # Resolve relative path
-        if not os.path.isabs(db_path):
-            db_path = os.path.join(os.path.dirname(__file__), db_path)
-        
-        # Initialize MemoryAPIClient
-        self.memory_client = MemoryAPIClient(db_path)
-        
-        # Load existing data from database using memory client
+        # Initialize MemoryAPIClient. Metadata is looked up on demand in `search`,
+        # so startup does not scale with the number of stored memories.
+        self.memory_client = MemoryAPIClient(self.cfg.knowledge_db_path)
+        self._has_chunks = self.memory_client.has_chunks()
+
+    def _init_vector_store(self):
+        if self.cfg.rescore_factor <= 0 or self.cfg.index_type not in LOSSY_INDEX_TYPES:
+            return
+        if self.read_only and not os.path.exists(self.vector_store_path):
+            return
+        try:
+            store = VectorStore(self.vector_store_path, self.dim, read_only=self.read_only)
+        except Exception as e:
+            logger.warning(f"Full-precision re-scoring disabled: {e}")
+            return
+        if store.created and self.index is not None and self.index.ntotal:
+            # Existing index: exact while it is still Flat, reconstructed from the codes otherwise
+            ids, vectors = self._live_vectors(self.index, self.tombstones)
+            store.put(ids, vectors)
+            store.flush()
+            logger.info(f"Copied {len(ids)} vectors into {self.vector_store_path}")
+        self.vector_store = store
+
+    def _init_vector_log(self):
+        """Replay log segments newer than the index snapshot, then start a fresh segment."""
+        if not self.cfg.vector_log_enabled or self.read_only:
+            return
+        # The log segments sit next to an index file that may not have been written yet
+        os.makedirs(os.path.dirname(self.cfg.index_path) or ".", exist_ok=True)
+        log = VectorLog(self.vector_log_prefix, self.dim, fsync=self.cfg.vector_log_fsync)
+        if log.segments():
+            self._replay_vector_log(log)
+        log.open()
+        self.vector_log = log
+
+    def _start_background_thread(self):
+        if self.read_only:
+            threading.Thread(target=self._watch_loop, name="faiss-watch", daemon=True).start()
+        elif self.cfg.role == "writer":
+            threading.Thread(target=self._snapshot_loop, args=(self.cfg.publish_interval_s,), name="faiss-publish", daemon=True).start()
+        elif self.vector_log is not None and self.cfg.snapshot_interval_s > 0:
+            threading.Thread(target=self._snapshot_loop, args=(self.cfg.snapshot_interval_s,), name="faiss-snapshot", daemon=True).start()
+
+    def _replay_vector_log(self, log: VectorLog):
+        started = time.perf_counter()
+        added = deleted = 0
+        with self._lock.write():
+            present = set(index_ids(self.index).tolist())
+            for op, ids, vectors in log.replay():
+                # Only reload a mapped index when there is something to apply
+                self._make_writable()
+                if op == OP_ADD:
+                    # Skip vectors the snapshot already has, and rows that never made it
+                    # into SQLite (crash between the index add and store_memory) or were deleted since
+                    keep = np.array([int(i) not in present for i in ids], dtype=bool)
+                    if keep.any() and self.memory_client:
+                        alive = self.memory_client.existing_ids(ids[keep].tolist())
+                        keep &= np.array([int(i) in alive for i in ids], dtype=bool)
+                    if keep.any():
+                        self.index.add_with_ids(vectors[keep], ids[keep])
+                        if self.vector_store is not None:
+                            self.vector_store.put(ids[keep], vectors[keep])
+                        present.update(ids[keep].tolist())
+                        added += int(keep.sum())
+                else:
+                    if supports_remove(self.index):
+                        self.index.remove_ids(ids)
+                    else:
+                        self.tombstones.add(ids.tolist())
+                    present.difference_update(ids.tolist())
+                    deleted += len(ids)
+            self._maybe_migrate()
+        logger.info(
+            f"Replayed vector log: {added} adds, {deleted} deletes in {time.perf_counter() - started:.2f}s "
+            f"(ntotal={self.index.ntotal})"
+        )
+
+    def _snapshot_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            if self.generation == self._snapshot_generation:
+                continue
+            try:
+                self.save()
+            except Exception:
+                logger.exception("Background faiss snapshot failed")
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.cfg.reader_poll_interval_s):
+            try:
+                self.reload_published()
+            except Exception:
+                logger.exception("Failed to load published faiss snapshot")
+
+    def reload_published(self) -> bool:
+        """Reader: swap in the writer's newest published snapshot; True if it changed."""
+        published = self.read_published()
+        if published is None or int(published["seq"]) == self.published_seq:
+            return False
+        started = time.perf_counter()
+        # Open outside the lock so searches keep running on the old snapshot meanwhile
+        index = open_index(published["index"], "mmap")
+        if index.d != self.dim:
+            # The writer ran faiss_reindex with another model; this process still embeds with the old one
+            logger.error(f"Published snapshot {published['seq']} has dim={index.d}, this reader dim={self.dim}; restart readers")
+            self.published_seq = int(published["seq"])
+            return False
+        apply_default_search_params(index, self.cfg.nprobe, self.cfg.ef_search)
+        tombstones = IdBitmap.load(published["tombstones"]) if published.get("tombstones") else IdBitmap()
+        has_chunks = self.memory_client.has_chunks() if self.memory_client else self._has_chunks
+        if self.vector_store is None:
+            self._init_vector_store()
+        with self._lock.write():
+            self.index = index
+            self._mapped = index_kind(index) == "ivf"
+            self.tombstones = tombstones
+            self._has_chunks = has_chunks
+            self.published_seq = int(published["seq"])
+            self.generation += 1
+        # Rows may have been updated or deleted by the writer
+        self.metadatas.clear()
+        self.chunk_parents.clear()
+        logger.info(
+            f"Loaded published snapshot {published['seq']} (ntotal={index.ntotal}, mapped={index_kind(index) == 'ivf'}) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return True
+
+    def close(self):
+        """Stop the background snapshot thread and close the vector log."""
+        self._stop.set()
+        with self._snapshot_lock:
+            if self.vector_log is not None:
+                self.vector_log.close()
+            if self.vector_store is not None:
+                self.vector_store.close()
+
+    def _init_embedding_cache(self):
+        if not self.cfg.embedding_cache_enabled:
+            return
+        path = self.cfg.embedding_cache_path or os.path.join(os.path.dirname(self.cfg.index_path), "embedding_cache.db")
         try:
-            # Get total count first
-            total_count = self.memory_client.get_memory_count()
-            if total_count > 0:
-                # Load all existing memories (in batches if needed)
-                limit = min(total_count, 1000)  # Use reasonable limit
-                memories = self.memory_client.list_memories(limit=limit, offset=0)
-                self.metadatas = {}
-                for memory in memories:
-                    # Convert memory_api format to faiss format
-                    entry = {
-                        'id': memory['id'],
-                        'document': memory['content'],
-                        'metadata': memory['metadata'],
-                        'timestamp': memory['created_at']
-                    }
-                    self.metadatas[str(memory['id'])] = entry
+            self.embedding_cache = EmbeddingCache(path, get_embedder_model_id(), self.cfg.embedding_cache_size)
+            logger.info(f"Embedding cache enabled at {path}")
         except Exception as e:
-            logger.warning(f"Failed to load existing memories: {e}")
-            self.metadatas = {}
+            logger.warning(f"Embedding cache disabled: {e}")
+            self.embedding_cache = None
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed `texts` as a (len(texts), dim) float32 array, reusing cached embeddings."""
+        cached = self.embedding_cache.get_many(texts) if self.embedding_cache else [None] * len(texts)
+        miss_rows = [i for i, v in enumerate(cached) if v is None]
+        out = np.empty((len(texts), self.dim), dtype='float32')
+        if miss_rows:
+            miss_texts = [texts[i] for i in miss_rows]
+            if self.encode_pool is not None:
+                arr = self._encode_in_pool(self.encode_pool, miss_texts)
+            else:
+                embedder = get_embedder(os.getenv("FAISS_EMBEDDER_MODEL", None))
+                arr = encode_texts(embedder, miss_texts)
+            arr = np.asarray(arr, dtype='float32')
+            # Normalize embeddings shape:
+            # - If model returned a single 1-D vector, reshape to (1, D)
+            # - If model returned token-level outputs (B, S, D), average over sequence axis
+            if arr.ndim == 1:
+                arr = arr.reshape(1, -1)
+            elif arr.ndim == 3:
+                arr = arr.mean(axis=1)
+            if arr.ndim != 2 or arr.shape[1] != self.dim or arr.shape[0] != len(miss_rows):
+                raise ValueError(f"Embeddings must be 2-D and have dimensionality {self.dim}")
+            out[miss_rows] = arr
+            if self.embedding_cache:
+                self.embedding_cache.put_many(miss_texts, arr)
+        for i, vec in enumerate(cached):
+            if vec is not None:
+                if vec.shape[0] != self.dim:
+                    raise ValueError(f"Cached embedding has dimensionality {vec.shape[0]}, expected {self.dim}")
+                out[i] = vec
+        if miss_rows and len(miss_rows) < len(texts):
+            logger.info(f"Embedding cache: {len(texts) - len(miss_rows)}/{len(texts)} hits")
+        return out
+
+    def _encode_in_pool(self, pool: ProcessPoolExecutor, texts: List[str]) -> np.ndarray:
+        """Split `texts` into shards encoded concurrently by the pool's processes.
+
+        Shards are contiguous slices of at most `embed_shard_size` texts (and at most
+        an even share per process, so small batches still use every core); `pool.map`
+        yields them back in input order as they complete.
+        """
+        processes = pool._max_workers
+        shard = max(1, min(self.cfg.embed_shard_size, -(-len(texts) // processes)))
+        if len(texts) <= shard:
+            return pool.submit(_encode_in_worker, texts).result()
+        started = time.perf_counter()
+        parts = list(pool.map(_encode_in_worker, [texts[i:i + shard] for i in range(0, len(texts), shard)]))
+        elapsed = time.perf_counter() - started
+        logger.info(f"Encoded {len(texts)} texts in {len(parts)} shards on {processes} processes "
+                    f"({len(texts) / max(elapsed, 1e-9):.0f} texts/s)")
+        return np.concatenate([np.asarray(p, dtype='float32') for p in parts])
+
+    @staticmethod
+    def _memory_to_entry(memory: Dict[str, Any]) -> Dict[str, Any]:
+        # Convert memory_api format to faiss format
+        return {
+            'id': memory['id'],
+            'document': memory['content'],
+            'metadata': memory['metadata'],
+            'timestamp': memory['created_at']
+        }
+
+    def _lookup_metadatas(self, ids: List[int]) -> Dict[int, Any]:
+        """Resolve metadata for `ids` from the LRU cache, fetching misses in one query."""
+        found: Dict[int, Any] = {}
+        missing: List[int] = []
+        for uid in ids:
+            entry = self.metadatas.get(str(uid))
+            if entry is None:
+                missing.append(uid)
+            else:
+                found[uid] = entry
+        if missing and self.memory_client:
+            try:
+                rows = self.memory_client.get_memories_by_ids(missing)
+            except Exception as e:
+                logger.warning(f"Failed to load metadata for ids {missing}: {e}")
+                rows = {}
+            for uid, memory in rows.items():
+                entry = self._memory_to_entry(memory)
+                self.metadatas.put(str(uid), entry)
+                found[int(uid)] = entry
+        return found
 
     def add_items(self, metadatas: Optional[List[Dict[str, Any]]] = None, documents: Optional[List[str]] = None) -> List[int]:
         # Accept embeddings directly, or compute from provided documents using sentence-transformers.
         if documents is None:
             raise ValueError("Either embeddings or documents must be provided")
-        # compute embeddings from documents
-        embedder = get_embedder()
-        arr = embedder.encode(documents, convert_to_numpy=True)
-        arr = np.asarray(arr, dtype='float32')
+        self._check_writable()
+        if self.cfg.chunk_size_tokens > 0:
+            return self._add_chunked(metadatas, documents)
+        # compute embeddings from documents (cached embeddings are reused)
+        arr = self._encode(documents)
         # 获取数据长度用于生成IDs
-        data_length = len(documents)
-
-
-        # Normalize embeddings shape:
-        # - If model returned a single 1-D vector, reshape to (1, D)
-        # - If model returned token-level outputs (B, S, D), average over sequence axis
-        if arr.ndim == 1:
-            arr = arr.reshape(1, -1)
-            data_length = 1
-        elif arr.ndim == 3:
-            # average token embeddings to produce sentence embeddings
-            arr = arr.mean(axis=1)
-            data_length = arr.shape[0]
-
-        if arr.ndim != 2 or arr.shape[1] != self.dim:
-            raise ValueError(f"Embeddings must be 2-D and have dimensionality {self.dim}")
+        data_length = arr.shape[0]
 
         # L2归一化向量以支持余弦相似度 (IP索引)
         arr = self.normalize_embedding(arr)
 
-        # 自动生成连续的ID
-        if self.metadatas:
-            start_id = max(int(k) for k in self.metadatas.keys()) + 1
-        else:
-            start_id = 1
+        # 从SQLite序列中预留连续的ID，FAISS与SQLite使用完全相同的ID
+        start_id = self.memory_client.reserve_ids(data_length)
         ids = list(range(start_id, start_id + data_length))
-        id_array = np.array(ids, dtype='int64')
 
-        logger.info(f"Adding {len(ids)} items to faiss index with auto-generated IDs: {ids}")
+        logger.info(f"Adding {len(ids)} items to faiss index with reserved IDs {start_id}..{start_id + data_length - 1}")
+
+        self._commit_add(arr, np.array(ids, dtype='int64'), self._entry_rows(ids, metadatas, documents))
+        return ids
+
+    def _add_chunked(self, metadatas: Optional[List[Dict[str, Any]]], documents: List[str]) -> List[int]:
+        """Index documents as overlapping token-bounded chunks; returns the document IDs.
+
+        A document that fits in one chunk is indexed under its own ID exactly as
+        without chunking. Longer documents get one vector per chunk, under chunk IDs
+        reserved from the same sequence and recorded in knowledge_chunks.
+        """
+        tokenizer = getattr(get_embedder(os.getenv("FAISS_EMBEDDER_MODEL", None)), 'tokenizer', None)
+        plans = [chunk_spans(doc, tokenizer, self.cfg.chunk_size_tokens, self.cfg.chunk_overlap_tokens) for doc in documents]
+        next_id = self.memory_client.reserve_ids(sum(1 if len(spans) == 1 else 1 + len(spans) for spans in plans))
+
+        parent_ids: List[int] = []
+        vector_ids: List[int] = []
+        texts: List[str] = []
+        chunk_rows: List[Dict[str, Any]] = []
+        for doc, spans in zip(documents, plans):
+            parent_id = next_id
+            next_id += 1
+            parent_ids.append(parent_id)
+            if len(spans) == 1:
+                vector_ids.append(parent_id)
+                texts.append(doc)
+                continue
+            for chunk_index, (start, end) in enumerate(spans):
+                vector_ids.append(next_id)
+                texts.append(doc[start:end])
+                chunk_rows.append({"id": next_id, "parent_id": parent_id, "chunk_index": chunk_index,
+                                   "start_offset": start, "end_offset": end})
+                next_id += 1
+
+        logger.info(f"Adding {len(documents)} documents as {len(texts)} chunks to faiss index")
+        arr = self.normalize_embedding(self._encode(texts))
+        self._commit_add(arr, np.array(vector_ids, dtype='int64'), self._entry_rows(parent_ids, metadatas, documents), chunk_rows)
+        if chunk_rows:
+            self._has_chunks = True
+        return parent_ids
+
+    def _commit_add(self, arr: np.ndarray, id_array: np.ndarray, rows: List[Dict[str, Any]],
+                    chunk_rows: Optional[List[Dict[str, Any]]] = None):
+        """Store rows and vectors under the same reserved IDs, so the two stores cannot diverge.
+
+        The vector log record is written first and the SQLite rows in one transaction
+        after it: a crash before the commit leaves a log record without rows, which
+        replay skips, and a crash after it is recovered by replay. Holding the
+        snapshot lock keeps a snapshot from cutting the log between the two steps.
+        """
+        with self._snapshot_lock:
+            if self.vector_log is not None:
+                self.vector_log.append_add(id_array, arr)
+            self.memory_client.store_memories_bulk(rows, chunk_rows)
+            try:
+                self._add_vectors(arr, id_array, logged=True)
+            except Exception:
+                self.memory_client.delete_memories([r["id"] for r in rows])
+                raise
 
+    def _add_vectors(self, arr: np.ndarray, id_array: np.ndarray, logged: bool = False):
         # add to faiss
         try:
             # IndexIDMap supports add_with_ids
             if self.index is not None:
-                self.index.add_with_ids(arr, id_array)
+                with self._lock.write():
+                    self._make_writable()
+                    self.index.add_with_ids(arr, id_array)
+                    if self.vector_store is not None:
+                        self.vector_store.put(id_array, arr)
+                    self.generation += 1
+                    if self.vector_log is not None and not logged:
+                        self.vector_log.append_add(id_array, arr)
+                    if self._rebuild_log is not None:
+                        # The index being built does not have these vectors yet
+                        self._rebuild_log.append(("add", (arr, id_array)))
+                    else:
+                        self._maybe_migrate()
         except Exception as e:
             logger.error(f"Error adding items to faiss index: {e}")
             raise
 
-        logger.info(f"metadatasccc {metadatas} items to faiss index")
+    def _entry_rows(self, ids: List[int], metadatas: Optional[List[Dict[str, Any]]], documents: List[str]) -> List[Dict[str, Any]]:
+        """Build one knowledge_entries row per document (for `store_memories_bulk`) and cache its metadata."""
         currentTime = datetime.now(timezone.utc).isoformat()
-
-        # store metadata using MemoryAPIClient
+        rows = []
         for i, uid in enumerate(ids):
             entry = {"id": int(uid)}
             metadata_dict = {}
@@ -434,75 +1622,300 @@ class FaissKB:
                 entry["timestamp"] = currentTime
             if documents and i < len(documents):
                 entry["document"] = documents[i]
-            self.metadatas[str(uid)] = entry
-            
-            # Store in database using MemoryAPIClient
-            if self.memory_client:
-                # Extract fields for memory_api
-                title = metadata_dict.get("title", f"Document {uid}")
-                content = documents[i] if documents and i < len(documents) else ""
-                doc_type = metadata_dict.get("type", "business_knowledge")
-                category = metadata_dict.get("category")
-                tags = metadata_dict.get("tags")
-                language = metadata_dict.get("language")
-                source = metadata_dict.get("source")
-                confidence = float(metadata_dict.get("confidence", 1.0))
-                
-                try:
-                    # Store memory using memory client
-                    memory_id = self.memory_client.store_memory(
-                        title=title,
-                        content=content,
-                        type=doc_type,
-                        category=category,
-                        tags=tags,
-                        language=language,
-                        source=source,
-                        confidence=confidence
-                    )
-                    # Verify the stored ID matches our generated ID
-                    if memory_id != uid:
-                        logger.warning(f"Generated ID {uid} doesn't match stored ID {memory_id}")
-                except Exception as e:
-                    logger.error(f"Failed to store memory {uid}: {e}")
-                    raise
-
-        return ids
-
-    def search(self, embedding: Optional[List[float]] = None, query_text: Optional[str] = None, k: int = 5) -> List[Dict[str, Any]]:
-        if self.index is None or self.index.ntotal == 0:
-            return []
+            self.metadatas.put(str(uid), entry)
+
+            rows.append({
+                "id": int(uid),
+                "title": metadata_dict.get("title", f"Document {uid}"),
+                "content": documents[i] if documents and i < len(documents) else "",
+                "type": metadata_dict.get("type", "business_knowledge"),
+                "category": metadata_dict.get("category"),
+                "tags": metadata_dict.get("tags"),
+                "language": metadata_dict.get("language"),
+                "source": metadata_dict.get("source"),
+                "confidence": float(metadata_dict.get("confidence", 1.0)),
+            })
+        return rows
+
+    def search(self, embedding: Optional[List[float]] = None, query_text: Optional[str] = None, k: int = 5,
+               nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+               filters: Optional[Dict[str, Any]] = None, min_score: Optional[float] = None,
+               max_results: int = 1000) -> List[Dict[str, Any]]:
+        return self.search_batch([(embedding, query_text)], k=k, nprobe=nprobe, ef_search=ef_search, filters=filters,
+                                 min_score=min_score, max_results=max_results)[0]
+
+    def _allowed_bitmap(self, key) -> IdBitmap:
+        """Bitmap of IDs (entries and their chunks) matching a filter, resolved from SQLite and cached."""
+        generation = self.generation
+        cached = self.filter_bitmaps.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        bitmap = IdBitmap.from_ids(self.memory_client.filter_ids(**{field: list(values) for field, values in key}))
+        self.filter_bitmaps.put(key, (generation, bitmap))
+        return bitmap
+
+    def check_query(self, embedding: Optional[List[float]] = None, query_text: Optional[str] = None):
+        """Validate a single query before it is batched with others."""
         if embedding is None:
             if query_text is None:
                 raise ValueError("Either embedding or query_text must be provided")
-            # compute embedding from text
-            embed_model_name = os.getenv("FAISS_EMBEDDER_MODEL", None)
-            embedder = get_embedder(embed_model_name)
-            vec = embedder.encode([query_text], convert_to_numpy=True)
-            vec = np.asarray(vec, dtype='float32')
-        else:
-            vec = np.asarray(embedding, dtype='float32')
-        if vec.ndim == 1:
-            vec = vec.reshape(1, -1)
-        if vec.shape[1] != self.dim:
+        elif len(embedding) != self.dim:
             raise ValueError(f"Query embedding must have dimensionality {self.dim}")
 
-        # 移到方法中
-        vec = self.normalize_embedding(vec)
+    def search_batch(self, queries: List[Tuple[Optional[List[float]], Optional[str]]], k: int = 5,
+                     nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                     filters: Optional[Dict[str, Any]] = None, min_score: Optional[float] = None,
+                     max_results: int = 1000) -> List[List[Dict[str, Any]]]:
+        """Search several `(embedding, query_text)` queries with one encode and one `index.search`.
+
+        `filters` ({category, type, source, tags}) restricts the scan to matching IDs.
+        With `min_score`, every hit scoring at least `min_score` is returned (best first,
+        at most `max_results`) instead of the top `k`; `k` is then only the first fetch size.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in queries]
+        for embedding, query_text in queries:
+            self.check_query(embedding, query_text)
+        key = filter_key(filters)
+        allowed = self._allowed_bitmap(key) if key else None
+        if allowed is not None and not len(allowed):
+            return [[] for _ in queries]
+
+        hits: List[Optional[List[Tuple[int, float]]]] = [None] * len(queries)
+        cache_keys: List[Any] = [None] * len(queries)
+        cache = self.search_cache
+        if cache is not None:
+            generation = self.generation
+            for i, (embedding, query_text) in enumerate(queries):
+                size = k if min_score is None else ("min_score", min_score, max_results)
+                cache_keys[i] = (cache.query_key(embedding, query_text), size, nprobe, ef_search, key)
+                hits[i] = cache.get(cache_keys[i], generation)
+        todo = [i for i, row in enumerate(hits) if row is None]
+
+        if todo:
+            pending = [queries[i] for i in todo]
+            # faiss_reindex may swap the model and index between embedding a query and searching; re-embed once then
+            for _ in range(2):
+                dim = self.dim
+                try:
+                    vec = self._query_vectors(pending)
+                except ValueError:
+                    if self.dim == dim:
+                        raise
+                    continue
+                found = self._search_vectors(vec, k, nprobe, ef_search, allowed, min_score, max_results)
+                if found is not None:
+                    break
+            else:
+                raise RuntimeError("The index switched to a new embedding model during the search, please retry")
+            rows, generation = found
+            for row, i in enumerate(todo):
+                hits[i] = rows[row]
+                if cache is not None:
+                    cache.put(cache_keys[i], generation, hits[i])
+        logger.debug(f"Search batch: {len(hits)} queries, {len(todo)} searched, {sum(len(row) for row in hits)} hits")
+        if self._has_chunks:
+            return self._aggregate_chunk_hits(hits, k if min_score is None else max_results)
+        metas = self._lookup_metadatas(sorted({idx for row in hits for idx, _ in row}))
+        return [[{"id": idx, "score": dist, "metadata": metas.get(idx)} for idx, dist in row] for row in hits]
+
+    def _query_vectors(self, queries: List[Tuple[Optional[List[float]], Optional[str]]]) -> np.ndarray:
+        vec = np.empty((len(queries), self.dim), dtype='float32')
+        text_rows = [i for i, (embedding, _) in enumerate(queries) if embedding is None]
+        if text_rows:
+            # compute embeddings from text in one batch (repeat queries hit the embedding cache)
+            vec[text_rows] = self._encode([queries[i][1] for i in text_rows])
+        for i, (embedding, _) in enumerate(queries):
+            if embedding is not None:
+                vec[i] = np.asarray(embedding, dtype='float32')
 
-        if self.index is not None:
-            D, I = self.index.search(vec, k)
+        # 移到方法中
+        return self.normalize_embedding(vec)
+
+    def _search_vectors(self, vec: np.ndarray, k: int, nprobe: Optional[int], ef_search: Optional[int],
+                        allowed: Optional[IdBitmap], min_score: Optional[float] = None,
+                        max_results: int = 1000) -> Optional[Tuple[List[List[Tuple[int, float]]], int]]:
+        """`(hits, generation)` for normalized query vectors, or None if the index no longer has their dimensionality.
+
+        `hits` holds one best-first `[(id, score), ...]` list per query.
+        """
+        with self._lock.read():
+            index, tombstones, generation = self.index, self.tombstones, self.generation
+            if index is None:
+                return [[] for _ in range(vec.shape[0])], generation
+            if index.d != vec.shape[1]:
+                return None
+            # Filtered-out and tombstoned IDs are excluded inside the scan so they do not take top-k slots
+            if allowed is not None:
+                sel, _bits = (allowed.difference(tombstones) if len(tombstones) else allowed).selector()
+            elif len(tombstones):
+                sel, _bits = tombstones.selector(exclude=True)
+            else:
+                sel, _bits = None, None
+            # nprobe / ef_search trade recall for latency on IVF / HNSW indexes
+            params = search_parameters(index, nprobe=nprobe, ef_search=ef_search, sel=sel)
+            # Several chunks of one document may rank high; over-fetch to find k documents
+            overfetch = self.cfg.chunk_overfetch if self._has_chunks else 1
+            store = self.vector_store if index_type_of(index) in LOSSY_INDEX_TYPES else None
+            if min_score is None:
+                D, I = self._knn(index, vec, k * overfetch, params, store)
+                rows = [[(int(idx), float(dist)) for dist, idx in zip(D[r], I[r]) if idx != -1] for r in range(vec.shape[0])]
+            elif store is None and supports_range_search(index):
+                rows = self._range(index, vec, min_score, max_results * overfetch, params)
+            else:
+                rows = self._knn_threshold(index, vec, min_score, k * overfetch, max_results * overfetch, params, store)
+        return rows, generation
+
+    def _knn(self, index: faiss.Index, vec: np.ndarray, n: int, params, store: Optional[VectorStore]) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-`n` `(D, I)`; compressed indexes fetch `rescore_factor * n` candidates and re-rank them exactly."""
+        search_k = n * self.cfg.rescore_factor if store is not None else n
+        if params is not None:
+            D, I = index.search(vec, search_k, params=params)
+        else:
+            D, I = index.search(vec, search_k)
+        if store is not None:
+            D, I = self._rescore(store, vec, I, n)
+        return D, I
+
+    @staticmethod
+    def _range(index: faiss.Index, vec: np.ndarray, min_score: float, limit: int, params) -> List[List[Tuple[int, float]]]:
+        """All hits scoring above `min_score` via `index.range_search`, best first, at most `limit` per query."""
+        if params is not None:
+            lims, D, I = index.range_search(vec, float(min_score), params=params)
         else:
-            return []
+            lims, D, I = index.range_search(vec, float(min_score))
+        rows = []
+        for r in range(vec.shape[0]):
+            d, i = D[lims[r]:lims[r + 1]], I[lims[r]:lims[r + 1]]
+            order = np.argsort(-d, kind="stable")[:limit]
+            rows.append([(int(i[j]), float(d[j])) for j in order])
+        return rows
+
+    def _knn_threshold(self, index: faiss.Index, vec: np.ndarray, min_score: float, n: int, limit: int,
+                       params, store: Optional[VectorStore]) -> List[List[Tuple[int, float]]]:
+        """`min_score` for indexes without exact range search: top-`n` searches with `n` doubling.
+
+        A query is finished as soon as its `n`-th hit scores below the threshold (or the
+        index / `limit` is exhausted); only the unfinished queries are searched again.
+        """
+        rows: List[Optional[List[Tuple[int, float]]]] = [None] * vec.shape[0]
+        pending = np.arange(vec.shape[0])
+        n = max(1, min(n, limit))
+        while len(pending):
+            D, I = self._knn(index, vec[pending], n, params, store)
+            more = (I[:, -1] >= 0) & (D[:, -1] >= min_score) & (n < min(limit, index.ntotal))
+            for row, q in enumerate(pending):
+                if not more[row]:
+                    rows[q] = [(int(idx), float(dist)) for dist, idx in zip(D[row], I[row]) if idx != -1 and dist >= min_score]
+            pending = pending[more]
+            n = min(n * 2, limit)
+        return rows
+
+    @staticmethod
+    def _rescore(store: VectorStore, vec: np.ndarray, I: np.ndarray, keep: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Re-rank candidates by exact inner product with their full-precision vectors; keep the best `keep`."""
+        scores = np.einsum("qcd,qd->qc", store.get(np.where(I >= 0, I, 0)), vec)
+        scores[I < 0] = -np.inf
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :keep]
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(I, order, axis=1)
+
+    def _resolve_chunk_parents(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Map hit IDs to their document: `{"parent_id", "chunk_index"}` (chunk_index None for whole documents)."""
+        found: Dict[int, Dict[str, Any]] = {}
+        missing: List[int] = []
+        for uid in ids:
+            entry = self.chunk_parents.get(uid)
+            if entry is None:
+                missing.append(uid)
+            else:
+                found[uid] = entry
+        if missing:
+            rows = self.memory_client.get_chunk_parents(missing) if self.memory_client else {}
+            for uid in missing:
+                entry = rows.get(uid, {"parent_id": uid, "chunk_index": None})
+                self.chunk_parents.put(uid, entry)
+                found[uid] = entry
+        return found
+
+    def _aggregate_chunk_hits(self, hits: List[List[Tuple[int, float]]], k: int) -> List[List[Dict[str, Any]]]:
+        """Fold chunk hits into per-document results scored by max or sum of chunk scores."""
+        parents = self._resolve_chunk_parents(sorted({idx for row in hits for idx, _ in row}))
+        use_sum = self.cfg.chunk_aggregation == "sum"
+        rows = []
+        for row in hits:
+            docs: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+            for idx, dist in row:
+                info = parents[idx]
+                doc = docs.setdefault(info["parent_id"], {"id": info["parent_id"], "score": 0.0 if use_sum else dist, "chunks": []})
+                doc["score"] = doc["score"] + dist if use_sum else max(doc["score"], dist)
+                if info["chunk_index"] is not None:
+                    doc["chunks"].append({"id": idx, "chunk_index": info["chunk_index"], "score": dist})
+            rows.append(sorted(docs.values(), key=lambda d: d["score"], reverse=True)[:k])
+        metas = self._lookup_metadatas(sorted({doc["id"] for row in rows for doc in row}))
         results = []
-        for dist, idx in zip(D[0], I[0]):
-            logger.info(f"Search result idx: {idx}, dist: {dist}")
-            if idx == -1:
-                continue
-            meta = self.metadatas.get(str(int(idx)), None)
-            results.append({"id": int(idx), "score": float(dist), "metadata": meta})
+        for row in rows:
+            out = []
+            for doc in row:
+                item = {"id": doc["id"], "score": doc["score"], "metadata": metas.get(doc["id"])}
+                if doc["chunks"]:
+                    item["chunks"] = doc["chunks"]
+                out.append(item)
+            results.append(out)
         return results
 
+    def text_search(self, query_text: str, k: int, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 ranking over the knowledge_entries FTS5 table: `[{"id", "score"}]`, best first."""
+        key = filter_key(filters)
+        return self.memory_client.bm25_search(query_text, k, filters={field: list(values) for field, values in key} if key else None)
+
+    def fuse_rrf(self, vector_hits: List[Dict[str, Any]], text_hits: List[Dict[str, Any]], k: int,
+                 vector_weight: float = 1.0, text_weight: float = 1.0, rrf_k: int = 60) -> List[Dict[str, Any]]:
+        """Weighted reciprocal rank fusion of vector and BM25 results.
+
+        score(d) = vector_weight / (rrf_k + rank_vector(d)) + text_weight / (rrf_k + rank_text(d)),
+        ranks starting at 1; a list a document is missing from contributes nothing.
+        """
+        fused: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        for source, hits, weight in (("vector", vector_hits, vector_weight), ("text", text_hits, text_weight)):
+            for rank, hit in enumerate(hits, start=1):
+                doc = fused.setdefault(hit["id"], {
+                    "id": hit["id"], "score": 0.0,
+                    "vector_score": None, "vector_rank": None, "text_score": None, "text_rank": None,
+                    "metadata": None,
+                })
+                doc["score"] += weight / (rrf_k + rank)
+                doc[f"{source}_score"] = hit["score"]
+                doc[f"{source}_rank"] = rank
+                if hit.get("metadata") is not None:
+                    doc["metadata"] = hit["metadata"]
+                if hit.get("chunks"):
+                    doc["chunks"] = hit["chunks"]
+        top = sorted(fused.values(), key=lambda d: d["score"], reverse=True)[:k]
+        # BM25-only hits have no metadata yet
+        metas = self._lookup_metadatas([d["id"] for d in top if d["metadata"] is None])
+        for doc in top:
+            if doc["metadata"] is None:
+                doc["metadata"] = metas.get(doc["id"])
+        return top
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and cache counters, served on /faiss/stats."""
+        embedding_cache = None
+        if self.embedding_cache is not None:
+            lru = self.embedding_cache.lru
+            embedding_cache = {"lru_hits": lru.hits, "lru_misses": lru.misses, "disk_hits": self.embedding_cache.disk_hits}
+        return {
+            "ntotal": self.index.ntotal if self.index is not None else 0,
+            "dimension": self.dim,
+            "index_type": index_type_of(self.index) if self.index is not None else None,
+            "generation": self.generation,
+            "tombstones": len(self.tombstones),
+            "search_cache": self.search_cache.stats() if self.search_cache is not None else None,
+            "embedding_cache": embedding_cache,
+            "metadata_cache": {"hits": self.metadatas.hits, "misses": self.metadatas.misses},
+            "filter_bitmaps": {"hits": self.filter_bitmaps.hits, "misses": self.filter_bitmaps.misses},
+        }
+
     def normalize_embedding(self, embedding: np.ndarray) -> np.ndarray:
         # L2归一化向量以支持余弦相似度 (IP索引)
         # 注意：对于IndexFlatIP，输入向量应该已经归一化
@@ -518,49 +1931,499 @@ class FaissKB:
             
         return normalized
 
+    # -------- Re-embedding with a new model (faiss_reindex) --------
+
+    def start_reindex(self, device: Optional[str] = None, batch_size: int = 256, restart: bool = False) -> Dict[str, Any]:
+        """Re-embed every entry with the model now configured in embedder_config.json, in a background thread.
+
+        The new index is built next to the live one and swapped in once complete;
+        until then searches use the old model and index. Progress is checkpointed,
+        so a cancelled or interrupted run resumes where it stopped unless `restart`.
+        """
+        self._check_writable()
+        if self.reindex_job is not None and self.reindex_job.active:
+            return self.reindex_job.status()
+        if device is not None and device not in ("cpu", "gpu", "nv_gpu", "cuda"):
+            raise ValueError(f"Unknown device '{device}', expected cpu, gpu or nv_gpu")
+        # Re-read the file: the point is to pick up the model it names now
+        embed_cfg = _parse_embedder_config()
+        embed_cfg['device'] = device or _read_embedder_config().get('device', 'cpu')
+        # This process keeps its role and load mode; everything else comes from the target device section
+        cfg = _resolve_config_paths(_faiss_config_from(embed_cfg, role=self.cfg.role, index_load_mode=self.cfg.index_load_mode))
+        job = ReindexJob(embed_cfg, cfg, batch_size)
+        with self._lock.write():
+            self._reindex_deletes = []
+        self.reindex_job = job
+        threading.Thread(target=self._run_reindex, args=(job, restart), name="faiss-reindex", daemon=True).start()
+        logger.info(f"Reindex started: model={job.model_id}, dim={cfg.dim}, index_type={cfg.index_type}, index_path={cfg.index_path}")
+        return job.status()
+
+    def cancel_reindex(self) -> Optional[Dict[str, Any]]:
+        """Stop a running reindex after its current batch; its checkpoint is kept for resuming."""
+        job = self.reindex_job
+        if job is not None and job.state == "running":
+            job.cancel.set()
+        return job.status() if job is not None else None
+
+    def _run_reindex(self, job: ReindexJob, restart: bool):
+        staging = job.cfg.index_path + ".reindex"
+        checkpoint_path = staging + ".json"
+        # Re-embedded vectors are staged in a vector log; the checkpoint records the last entry it covers
+        log = VectorLog(staging + ".vlog", job.cfg.dim, fsync=True)
+        try:
+            after = self._reindex_resume_point(job, log, checkpoint_path, restart)
+            embedder = self._reindex_embedder(job)
+            job.total_entries = self.memory_client.get_memory_count()
+            log.open()
+            while not job.cancel.is_set():
+                batch = self._reindex_next(job, embedder, after)
+                if batch is None:
+                    break
+                after, ids, vectors = batch
+                log.append_add(ids, vectors)
+                write_bytes_atomic(checkpoint_path, json.dumps({
+                    "model_id": job.model_id, "dim": job.cfg.dim, "last_id": after,
+                    "entries": job.entries, "vectors": job.vectors,
+                }).encode("utf-8"))
+            log.close()
+            if job.cancel.is_set():
+                logger.info(f"Reindex cancelled after entry {after}; start it again to resume")
+                job.finish("cancelled")
+                return
+
+            ids, vectors = self._read_staged(log, verify=job.resumed_from is not None)
+            new_index, store = self._reindex_build(job, ids, vectors, staging)
+            job.state = "swapping"
+            self._reindex_swap(job, embedder, new_index, store, after)
+            for _, path in log.segments():
+                os.remove(path)
+            os.remove(checkpoint_path)
+            job.finish("done")
+            logger.info(f"Reindex finished: ntotal={new_index.ntotal}, model={job.model_id}")
+        except Exception as e:
+            logger.exception("Faiss reindex failed")
+            job.finish("failed", str(e))
+        finally:
+            log.close()
+            with self._lock.write():
+                self._reindex_deletes = None
+
+    @staticmethod
+    def _reindex_resume_point(job: ReindexJob, log: VectorLog, checkpoint_path: str, restart: bool) -> int:
+        """Last entry ID covered by a usable checkpoint, or 0 after clearing stale staging files."""
+        checkpoint = None
+        if not restart and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("model_id") != job.model_id or checkpoint.get("dim") != job.cfg.dim:
+                logger.info(f"Ignoring reindex checkpoint for {checkpoint.get('model_id')}")
+                checkpoint = None
+        if checkpoint is None:
+            for _, path in log.segments():
+                os.remove(path)
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            return 0
+        job.resumed_from = int(checkpoint["last_id"])
+        job.entries = int(checkpoint.get("entries", 0))
+        job.vectors = int(checkpoint.get("vectors", 0))
+        logger.info(f"Resuming reindex after entry {job.resumed_from} ({job.vectors} vectors staged)")
+        return job.resumed_from
+
+    @staticmethod
+    def _reindex_embedder(job: ReindexJob):
+        if job.model_id == get_embedder_model_id():
+            # Same model as the live index (e.g. a new index_type): share it instead of loading a copy
+            embedder = get_embedder()
+        else:
+            logger.info(f"Loading embedder for reindex: {job.model_id}")
+            embedder = _load_embedder(job.embed_cfg)
+        _validate_embedder_dim(embedder, job.cfg.dim)
+        return embedder
+
+    def _reindex_next(self, job: ReindexJob, embedder, after: int) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        """Embed the next batch of entries after `after`: `(last_entry_id, vector_ids, vectors)`, or None when done."""
+        rows = self.memory_client.index_texts(after, job.batch_size)
+        if not rows:
+            return None
+        ids = np.array([vector_id for _, vector_id, _ in rows], dtype='int64')
+        arr = np.asarray(encode_texts(embedder, [text for _, _, text in rows]), dtype='float32').reshape(len(rows), -1)
+        if arr.shape[1] != job.cfg.dim:
+            raise ValueError(f"New model produced {arr.shape[1]}-dim vectors, expected dim={job.cfg.dim}")
+        job.entries += len({entry_id for entry_id, _, _ in rows})
+        job.vectors += len(rows)
+        return rows[-1][0], ids, self.normalize_embedding(arr)
+
+    def _read_staged(self, log: VectorLog, verify: bool) -> Tuple[np.ndarray, np.ndarray]:
+        parts = [(ids, vectors) for _, ids, vectors in log.replay()]
+        if not parts:
+            return np.empty(0, dtype='int64'), np.empty((0, log.dim), dtype='float32')
+        ids = np.concatenate([p[0] for p in parts])
+        vectors = np.vstack([p[1] for p in parts])
+        # A batch re-embedded after an interrupted checkpoint is staged twice; keep its last copy
+        _, last = np.unique(ids[::-1], return_index=True)
+        keep = np.sort(len(ids) - 1 - last)
+        ids, vectors = ids[keep], vectors[keep]
+        if verify:
+            # Entries deleted while no reindex was running to record it
+            alive = self.memory_client.existing_ids(ids.tolist())
+            mask = np.array([int(i) in alive for i in ids], dtype=bool)
+            ids, vectors = ids[mask], vectors[mask]
+        return ids, vectors
+
+    def _reindex_build(self, job: ReindexJob, ids: np.ndarray, vectors: np.ndarray,
+                       staging: str) -> Tuple[faiss.Index, Optional[VectorStore]]:
+        cfg = job.cfg
+        started = time.perf_counter()
+        index_type = cfg.index_type if len(ids) and len(ids) >= cfg.migrate_threshold else "flat"
+        new_index = build_index(index_type, cfg.dim, vectors, ids, **self._index_build_params(cfg))
+        apply_default_search_params(new_index, cfg.nprobe, cfg.ef_search)
+        store = None
+        if cfg.rescore_factor > 0 and cfg.index_type in LOSSY_INDEX_TYPES:
+            if os.path.exists(staging + ".vectors"):
+                os.remove(staging + ".vectors")
+            store = VectorStore(staging + ".vectors", cfg.dim)
+            store.put(ids, vectors)
+        logger.info(f"Built {index_type} index for reindex: ntotal={new_index.ntotal} in {time.perf_counter() - started:.2f}s")
+        return new_index, store
+
+    def _reindex_swap(self, job: ReindexJob, embedder, new_index: faiss.Index, store: Optional[VectorStore], after: int):
+        """Catch up on entries added meanwhile, then make the new model and index live."""
+        global _embedder, _embed_cfg
+        cfg = job.cfg
+        # Adds wait for the snapshot lock (see _commit_add), so no entry appears after this catch-up
+        with self._snapshot_lock:
+            while True:
+                batch = self._reindex_next(job, embedder, after)
+                if batch is None:
+                    break
+                after, ids, vectors = batch
+                new_index.add_with_ids(vectors, ids)
+                if store is not None:
+                    store.put(ids, vectors)
+            # Write the new index before the old log goes; deletes from here on are logged again below
+            write_bytes_atomic(cfg.index_path, faiss.serialize_index(new_index))
+
+            with self._lock.write():
+                deletes = self._reindex_deletes or []
+                self._reindex_deletes = None
+                tombstones = IdBitmap()
+                if deletes:
+                    if supports_remove(new_index):
+                        new_index.remove_ids(np.array(deletes, dtype='int64'))
+                    else:
+                        tombstones.add(deletes)
+                # The old log and full-precision copies describe the old model's vectors
+                if self.vector_log is not None:
+                    self.vector_log.close()
+                    for _, path in self.vector_log.segments():
+                        os.remove(path)
+                    self.vector_log = None
+                if self.vector_store is not None:
+                    self.vector_store.close()
+                    self.vector_store = None
+
+                self.cfg = cfg
+                self.dim = int(cfg.dim)
+                self.index = new_index
+                self._mapped = False
+                self.tombstones = tombstones
+                self.generation += 1
+                _embed_cfg = job.embed_cfg
+                _embedder = embedder
+                if self.embedding_cache is not None:
+                    self.embedding_cache.model_id = job.model_id
+                    self.embedding_cache.lru.clear()
+                if store is not None:
+                    store.close()
+                    os.replace(store.path, self.vector_store_path)
+                    self.vector_store = VectorStore(self.vector_store_path, self.dim)
+                if cfg.vector_log_enabled:
+                    log = VectorLog(self.vector_log_prefix, self.dim, fsync=cfg.vector_log_fsync)
+                    for _, path in log.segments():
+                        os.remove(path)
+                    log.open()
+                    if deletes:
+                        log.append_delete(np.array(deletes, dtype='int64'))
+                    self.vector_log = log
+                if self.encode_pool is not None:
+                    # Worker processes hold the old model
+                    old_pool = self.encode_pool
+                    self.encode_pool = None
+                    if job.embed_cfg.get('device', 'cpu') == 'cpu':
+                        self.encode_pool = _make_encode_pool(old_pool._max_workers, cfg.embed_process_threads, job.embed_cfg)
+                    old_pool.shutdown(wait=False)
+            self._snapshot()
+
     def save(self):
+        """Snapshot the index: serialize under the read lock, write a temp file, rename.
+
+        The vector log is rotated at the same point, and the segments the snapshot
+        covers are deleted once it is in place. A writer also publishes the snapshot
+        to readers.
+        """
+        self._check_writable()
+        with self._snapshot_lock:
+            self._snapshot()
+        self._save_meta()
+
+    def _snapshot(self):
         try:
-            faiss.write_index(self.index, self.cfg.index_path)
+            if self.cfg.index_load_mode == "ondisk" and index_kind(self.index) == "ivf":
+                # Freshly built IVF index: move its lists to <index_path>.ivfdata so the
+                # index file stays small and the next start maps them instead of reading them
+                with self._lock.write():
+                    if not has_ondisk_invlists(self.index):
+                        move_invlists_ondisk(self.index, self.ivfdata_path)
+                        logger.info(f"Moved IVF inverted lists on disk: {self.ivfdata_path}")
+            started = time.perf_counter()
+            with self._lock.read():
+                # Writers are blocked, so the serialized index, the tombstones and the
+                # log cut describe the same state. A still-mapped index is unchanged
+                # since it was loaded, and must not be overwritten while its pages are mapped.
+                data = None if self._mapped else faiss.serialize_index(self.index)
+                tombstones = IdBitmap(self.tombstones.bits)
+                generation = self.generation
+                ntotal = int(self.index.ntotal)
+                cut = self.vector_log.rotate() if self.vector_log is not None else None
+            os.makedirs(os.path.dirname(self.cfg.index_path) or ".", exist_ok=True)
+            if self.cfg.role == "writer":
+                self._publish(data, tombstones, ntotal)
+            elif data is not None:
+                write_bytes_atomic(self.cfg.index_path, data)
+            if len(tombstones):
+                tombstones.save(self.tombstone_path)
+            elif os.path.exists(self.tombstone_path):
+                os.remove(self.tombstone_path)
+            if self.vector_store is not None:
+                # Rows of the log segments about to be deleted must be on disk first
+                self.vector_store.flush()
+            if cut is not None:
+                self.vector_log.truncate_through(cut)
+            self._snapshot_generation = generation
+            logger.info(f"Saved faiss snapshot to {self.cfg.index_path} in {time.perf_counter() - started:.2f}s")
         except Exception as e:
             logger.error(f"Failed to write faiss index: {e}")
             raise
-        self._save_meta()
+
+    def _publish(self, data, tombstones: IdBitmap, ntotal: int):
+        """Writer: write snapshot file N, point index_path and the generation file at it."""
+        previous = self.read_published()
+        seq = max(self.published_seq, int(previous["seq"]) if previous else 0) + 1
+        snap_path = self._snapshot_file(seq)
+        write_bytes_atomic(snap_path, data)
+        snap_tombstones = None
+        if len(tombstones):
+            snap_tombstones = snap_path + ".tombstones.npy"
+            tombstones.save(snap_tombstones)
+        # index_path becomes another name for the same file; copy where hard links are unavailable
+        tmp = self.cfg.index_path + ".tmp"
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            os.link(snap_path, tmp)
+            os.replace(tmp, self.cfg.index_path)
+        except OSError:
+            write_bytes_atomic(self.cfg.index_path, data)
+        # Readers switch over once this rename lands
+        write_bytes_atomic(self.generation_path, json.dumps({
+            "seq": seq,
+            "index": os.path.basename(snap_path),
+            "tombstones": os.path.basename(snap_tombstones) if snap_tombstones else None,
+            "ntotal": ntotal,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+        }).encode("utf-8"))
+        self.published_seq = seq
+        self._prune_published()
+
+    def _prune_published(self):
+        """Delete published snapshots older than the newest `published_snapshots_kept`.
+
+        Readers that still map an unlinked file keep reading it (POSIX); where the
+        OS refuses to delete a mapped file, the next publish retries.
+        """
+        prefix = self.cfg.index_path + ".snap."
+        for path in glob.glob(glob.escape(prefix) + "*"):
+            suffix = path[len(prefix):].split(".", 1)[0]
+            if suffix.isdigit() and int(suffix) <= self.published_seq - self.cfg.published_snapshots_kept:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.debug(f"Published snapshot {path} still in use: {e}")
 
     def _save_meta(self):
         # No longer needed as metadata is stored in SQLite database
         pass
 
     def delete(self, id: int) -> bool:
-        # FAISS does not support delete in IndexFlat; we can mark by rebuilding index without the id
+        """Delete an entry from the vector index, then from SQLite.
+
+        Flat and IVF indexes drop the vector with `remove_ids`. HNSW cannot, so the ID
+        is tombstoned and filtered at search time until the next compaction.
+        """
+        self._check_writable()
         sid = str(id)
-        if sid not in self.metadatas:
+        if self.memory_client and self.memory_client.get_memory_by_id(id) is None:
             return False
+        # Chunk vectors of a long document go with it (their rows are removed by a trigger)
+        vector_ids = [int(id)]
+        if self.memory_client and self._has_chunks:
+            vector_ids += self.memory_client.get_chunk_ids(id)
+
+        # Drop the vectors before the row: a failure in between leaves a row without a
+        # vector rather than a searchable vector whose row is gone
+        id_array = np.array(vector_ids, dtype='int64')
+        with self._lock.write():
+            self._make_writable()
+            self.generation += 1
+            if self.vector_log is not None:
+                self.vector_log.append_delete(id_array)
+            if self._rebuild_log is not None:
+                # The index being built does not know about this delete yet
+                self._rebuild_log.append(("delete", vector_ids))
+            if self._reindex_deletes is not None:
+                self._reindex_deletes.extend(vector_ids)
+            if supports_remove(self.index):
+                removed = self.index.remove_ids(id_array)
+                logger.info(f"Removed {removed} vector(s) for id {id} from faiss index")
+            else:
+                self.tombstones.add(vector_ids)
+                logger.info(f"Tombstoned id {id} ({len(vector_ids)} vector(s), {len(self.tombstones)} tombstones, ntotal={self.index.ntotal})")
+                self._maybe_compact()
 
         # remove metadata from SQLite database using MemoryAPIClient
+        success = True
         if self.memory_client:
-            success = self.memory_client.delete_memory(id)
-            if not success:
-                return False
+            success = self.memory_client.delete_memory(id, sync_faiss=False)
 
         # remove metadata from memory
-        del self.metadatas[sid]
-
-        # For safety, we leave index as-is (deletes not fully supported here)
-        return True
+        self.metadatas.pop(sid)
+        for vid in vector_ids:
+            self.chunk_parents.pop(vid)
+        return success
+
+
+class SearchMicroBatcher:
+    """Coalesce concurrent searches into one batched encode + `index.search`.
+
+    Queries that arrive within `window_ms` of the first one (or until `max_batch`
+    queries are waiting) share a batch. Queries are grouped by their nprobe/ef_search
+    knobs; each batch searches with the largest k and trims results per caller.
+    """
+
+    def __init__(self, kb: FaissKB, executor: BoundedExecutor, window_ms: float, max_batch: int):
+        self.kb = kb
+        self.executor = executor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._timers: Dict[Tuple[Any, ...], asyncio.TimerHandle] = {}
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks: set = set()
+
+    async def search(self, embedding: Optional[List[float]], query_text: Optional[str], k: int,
+                     nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        # Reject malformed queries up front so they cannot fail a shared batch
+        self.kb.check_query(embedding, query_text)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (nprobe, ef_search, filter_key(filters))
+        batch = self._pending.setdefault(key, [])
+        batch.append(((embedding, query_text), k, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        nprobe, ef_search, filters = key
+        try:
+            results = await self.executor.run(
+                self.kb.search_batch,
+                [query for query, _, _ in batch],
+                k=max(k for _, k, _ in batch),
+                nprobe=nprobe,
+                ef_search=ef_search,
+                filters=dict(filters) if filters else None,
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if len(batch) > 1:
+            logger.info(f"Served {len(batch)} searches with one batched index.search")
+        for (_, k, future), rows in zip(batch, results):
+            if not future.done():
+                future.set_result(rows[:k])
 
 
 # -------------------- MCP Server --------------------
 
 _kb: Optional[FaissKB] = None
+_search_batcher: Optional[SearchMicroBatcher] = None
+_search_executor: Optional[BoundedExecutor] = None
+_ingest_executor: Optional[BoundedExecutor] = None
 _embed_cfg = None
+# Set by the warm-up task once the embedder is loaded (model_error is set instead if it failed)
+_model_ready = False
+_model_error: Optional[str] = None
 
 
-@asynccontextmanager
-async def app_lifespan(app):
-    global _kb
-    # Resolve embedder config from file + env
-    embed_cfg = _read_embedder_config()
+def _validate_embedder_dim(embedder, dim: int):
+    model_dim = None
+    try:
+        # SentenceTransformer exposes embedding dimension
+        model_dim = getattr(embedder, 'get_sentence_embedding_dimension', None)
+        if callable(model_dim):
+            model_dim = model_dim()
+    except Exception:
+        model_dim = None
+
+    if model_dim is not None and int(model_dim) != int(dim):
+        raise ValueError(
+            f"Configured FAISS dim ({dim}) does not match embedder dimension ({model_dim}). "
+            "Update embedder_config.json or FAISS_DIM to match your model."
+        )
+
+
+def _load_and_warm_embedder(dim: int):
+    embedder = get_embedder(None)
+    _validate_embedder_dim(embedder, dim)
+    # One tiny encode pays for lazy kernel/graph initialization before the first real request
+    encode_texts(embedder, ["warm up"])
+
+
+async def _warm_up_embedder(cfg: FaissConfig):
+    """Load, validate and warm the embedder off the event loop."""
+    global _model_ready, _model_error
+    try:
+        with _startup_phase("model"):
+            await asyncio.to_thread(_load_and_warm_embedder, cfg.dim)
+        _model_ready = True
+        logger.info(f"Embedder ready; startup timings: {_startup_timings}")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # If embedder loading fails, warn but keep serving — embedding calls will raise if used.
+        _model_error = str(e)
+        logger.warning("Embedder validation warning: %s", e)
+
 
+def _faiss_config_from(embed_cfg: Dict[str, Any], **overrides) -> FaissConfig:
+    """FaissConfig for the device selected in `embed_cfg`; `overrides` win over the faiss.<device> section."""
     # If embed_cfg provides device-specific dims, prefer those
     device = embed_cfg.get('device', 'cpu')
     if device == 'cuda':
@@ -589,43 +2452,65 @@ async def app_lifespan(app):
     # Read knowledge_db_path from embedder_config.json root
     knowledge_db_path = embed_cfg.get('knowledge_db_path', 'knowledge.db')
 
-    cfg = FaissConfig(
+    # Any other FaissConfig field (index_type, nlist, ...) may be set per device in the faiss section
+    index_options = {}
+    if isinstance(faiss_cfg, dict):
+        index_options = {
+            k: v for k, v in faiss_cfg.items()
+            if k in FaissConfig.model_fields and k not in ('dim', 'index_path', 'meta_path', 'knowledge_db_path')
+        }
+    index_options.update(overrides)
+
+    return FaissConfig(
         dim=resolved_dim,
         index_path=index_path,
         meta_path=meta_path,
         knowledge_db_path=knowledge_db_path,
+        **index_options,
     )
 
+
+@asynccontextmanager
+async def app_lifespan(app):
+    global _kb, _search_batcher, _search_executor, _ingest_executor
+    # Resolve embedder config from file + env
+    embed_cfg = _read_embedder_config()
+
+    device = embed_cfg.get('device', 'cpu')
+    cfg = _faiss_config_from(embed_cfg, **({'role': _cli_args.role} if _cli_args.role else {}))
+
     # 配置FAISS
     _kb = FaissKB(cfg)
-    # Validate that the loaded embedder (if any) matches the FAISS dimensionality
-    try:
-        embedder = get_embedder(None)
-        model_dim = None
-        try:
-            # SentenceTransformer exposes embedding dimension
-            model_dim = getattr(embedder, 'get_sentence_embedding_dimension', None)
-            if callable(model_dim):
-                model_dim = model_dim()
-        except Exception:
-            model_dim = None
-
-        if model_dim is not None and int(model_dim) != int(cfg.dim):
-            raise ValueError(
-                f"Configured FAISS dim ({cfg.dim}) does not match embedder dimension ({model_dim}). "
-                "Update embedder_config.json or FAISS_DIM to match your model."
-            )
-    except Exception as e:
-        # If embedder loading fails, warn but allow server to continue — embedding calls will raise if used.
-        logger.warning("Embedder validation warning: %s", e)
+    # Let MemoryAPIClient.delete_memory route deletes through the KB so vectors are removed too
+    set_faiss_kb(_kb)
+
+    # Embedding and FAISS calls block for up to hundreds of ms; run them off the event loop
+    _search_executor = BoundedExecutor("faiss-search", cfg.search_workers, cfg.search_queue_size, cfg.queue_timeout_s)
+    _ingest_executor = BoundedExecutor("faiss-ingest", cfg.ingest_workers, cfg.ingest_queue_size, cfg.queue_timeout_s)
+    if cfg.embed_processes > 0 and device == 'cpu':
+        _kb.encode_pool = _make_encode_pool(cfg.embed_processes, cfg.embed_process_threads, embed_cfg)
+    if cfg.search_batch_window_ms > 0:
+        _search_batcher = SearchMicroBatcher(_kb, _search_executor, cfg.search_batch_window_ms, cfg.search_batch_max_size)
+    # Load the model in the background so the server accepts connections (and stdio
+    # clients get their initialize response) right away; /health?ready=1 reports when it is done.
+    warmup = asyncio.create_task(_warm_up_embedder(cfg))
+    logger.info(f"Startup timings before model load: {_startup_timings}")
     yield {"kb": _kb}
 
+    if not warmup.done():
+        warmup.cancel()
     # on shutdown, persist
     try:
-        if _kb:
+        if _kb and not _kb.read_only:
             _kb.save()
     except Exception:
         logger.exception("Error saving faiss store on shutdown")
+    if _kb:
+        _kb.close()
+    for executor in (_search_executor, _ingest_executor):
+        executor.shutdown()
+    if _kb and _kb.encode_pool is not None:
+        _kb.encode_pool.shutdown()
 
 
 # Parse command line args early so we can create the FastMCP with host/port before tools are
@@ -635,6 +2520,7 @@ parser = argparse.ArgumentParser(add_help=False)
 parser.add_argument("--transport", choices=["stdio", "streamable_http", "sse"], default=os.getenv("FAISS_TRANSPORT", "streamable_http"))
 parser.add_argument("--host", default=os.getenv("FAISS_HOST", "127.0.0.1"))
 parser.add_argument("--port", type=int, default=int(os.getenv("FAISS_PORT", "8001")))
+parser.add_argument("--role", choices=list(ROLES), default=os.getenv("FAISS_ROLE"), help="overrides faiss.<device>.role")
 _cli_args, _remaining = parser.parse_known_args()
 
 # Create the FastMCP instance used by decorators. We set host/port from CLI so server
@@ -654,12 +2540,114 @@ logger.info(
 # so simple HTTP clients can call tools without implementing full StreamableHTTP/SSE.
 @mcp.custom_route("/health", methods=["GET"])
 async def _health(request: Request):
-    return JSONResponse({
+    # Liveness by default; `?ready=1` turns it into a readiness probe that fails until the model is loaded
+    ready = _kb is not None and _model_ready
+    body = {
         "status": "ok",
+        "ready": ready,
+        "model_error": _model_error,
+        "startup_timings": _startup_timings,
+        "role": _kb.cfg.role if _kb else None,
+        "published_seq": _kb.published_seq if _kb else None,
         "sse_path": mcp.settings.sse_path,
         "message_path": mcp.settings.message_path,
         "streamable_http_path": mcp.settings.streamable_http_path,
-    })
+    }
+    if request.query_params.get("ready") in ("1", "true") and not ready:
+        body["status"] = "starting"
+        return JSONResponse(body, status_code=503)
+    return JSONResponse(body)
+
+
+@mcp.custom_route("/faiss/stats", methods=["GET"])
+async def _faiss_stats(request: Request):
+    if _kb is None:
+        return JSONResponse({"error": "Faiss KB not initialized"}, status_code=503)
+    return JSONResponse({"status": "ok", **_kb.stats()})
+
+
+def _to_jsonable(x):
+    """Slow path for tool results that are not plain JSON types (content blocks, models)."""
+    # primitives
+    if x is None or isinstance(x, (str, int, float, bool)):
+        return x
+    # numpy scalars/arrays (scores, ids)
+    if isinstance(x, (np.generic, np.ndarray)):
+        return x.tolist()
+    # lists/tuples
+    if isinstance(x, (list, tuple)):
+        return [_to_jsonable(i) for i in x]
+    # dicts
+    if isinstance(x, dict):
+        return {k: _to_jsonable(v) for k, v in x.items()}
+    # objects like ContentBlock/TextContent: prefer .text
+    text = getattr(x, 'text', None)
+    if isinstance(text, (str, int, float, bool)):
+        return text
+    # pydantic models
+    if hasattr(x, 'model_dump'):
+        try:
+            return _to_jsonable(x.model_dump())
+        except Exception:
+            pass
+    if hasattr(x, 'dict'):
+        try:
+            return _to_jsonable(x.dict())
+        except Exception:
+            pass
+    # fallback to string
+    try:
+        return str(x)
+    except Exception:
+        return repr(x)
+
+
+def _dumps(payload: Any) -> bytes:
+    """Serialize a compat-route response; orjson when installed, json otherwise.
+
+    Plain dicts/lists/numbers go through the serializer directly; only objects it
+    does not know (content blocks, pydantic models) are handed to `_to_jsonable`.
+    """
+    try:
+        if orjson is not None:
+            return orjson.dumps(payload, default=_to_jsonable,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(payload, default=_to_jsonable, ensure_ascii=False).encode("utf-8")
+    except Exception:
+        # Fallback: return stringified result
+        return json.dumps({k: str(v) for k, v in payload.items()}, ensure_ascii=False).encode("utf-8")
+
+
+def _unwrap_tool_result(result: Any) -> Any:
+    """Plain value from a `FastMCP.call_tool` result (content blocks, optionally with structured output)."""
+    if isinstance(result, tuple):
+        # Structured output wraps the return value as {"result": ...}; the text block holds it as JSON
+        result = result[0]
+    if isinstance(result, dict):
+        return result
+    texts = [getattr(block, "text", None) for block in result]
+    if len(texts) == 1 and texts[0] is not None:
+        try:
+            return json.loads(texts[0])
+        except ValueError:
+            return texts[0]
+    return texts
+
+
+async def _call_tool_raw(tool: str, arguments: Dict[str, Any]) -> Any:
+    # Tools return plain dicts; unwrap them from the content blocks so they are serialized as-is
+    return _unwrap_tool_result(await mcp.call_tool(tool, arguments or {}))
+
+
+async def _call_tool_entry(call: Any) -> Dict[str, Any]:
+    """One entry of a /call_tools batch; failures are reported in place."""
+    if not isinstance(call, dict) or not call.get("tool"):
+        return {"error": "missing tool name"}
+    try:
+        return {"result": await _call_tool_raw(call["tool"], call.get("arguments", {}))}
+    except Exception as e:
+        logger.exception(f"compat call_tools entry {call['tool']} failed")
+        return {"error": str(e)}
 
 
 @mcp.custom_route("/call_tool", methods=["POST"])
@@ -675,51 +2663,33 @@ async def _call_tool_compat(request: Request):
         return JSONResponse({"error": "missing tool name"}, status_code=400)
 
     try:
-        result = await mcp.call_tool(tool, arguments)
-        # Convert result into JSON-serializable form
-        def _to_jsonable(x):
-            # primitives
-            if x is None or isinstance(x, (str, int, float, bool)):
-                return x
-            # lists/tuples
-            if isinstance(x, (list, tuple)):
-                return [_to_jsonable(i) for i in x]
-            # dicts
-            if isinstance(x, dict):
-                return {k: _to_jsonable(v) for k, v in x.items()}
-            # objects like ContentBlock/TextContent: prefer .text
-            text = getattr(x, 'text', None)
-            if isinstance(text, (str, int, float, bool)):
-                return text
-            # pydantic models
-            if hasattr(x, 'model_dump'):
-                try:
-                    return _to_jsonable(x.model_dump())
-                except Exception:
-                    pass
-            if hasattr(x, 'dict'):
-                try:
-                    return _to_jsonable(x.dict())
-                except Exception:
-                    pass
-            # fallback to string
-            try:
-                return str(x)
-            except Exception:
-                return repr(x)
-
-        # Serialize to JSON string ourselves to avoid framework serialization errors
-        try:
-            body = json.dumps({"result": _to_jsonable(result)}, ensure_ascii=False)
-        except Exception:
-            # Fallback: return stringified result
-            body = json.dumps({"result": str(result)}, ensure_ascii=False)
-        return Response(body, media_type='application/json')
+        result = await _call_tool_raw(tool, arguments)
+        # Serialize to JSON ourselves to avoid framework serialization errors
+        return Response(_dumps({"result": result}), media_type='application/json')
     except Exception as e:
         logger.exception("compat call_tool failed")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+@mcp.custom_route("/call_tools", methods=["POST"])
+async def _call_tools_compat(request: Request):
+    """Batch form of /call_tool: `{"calls": [{"tool": ..., "arguments": {...}}, ...]}`.
+
+    Calls run concurrently (searches share the micro-batcher and search lane) and
+    `results` lists one `{"result": ...}` or `{"error": ...}` per call, in request order.
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        return JSONResponse({"error": "invalid json"}, status_code=400)
+
+    calls = payload.get("calls") if isinstance(payload, dict) else payload
+    if not isinstance(calls, list):
+        return JSONResponse({"error": "expected a list of calls"}, status_code=400)
+    results = await asyncio.gather(*(_call_tool_entry(call) for call in calls))
+    return Response(_dumps({"results": list(results)}), media_type='application/json')
+
+
 class DocumentItem(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
     metadata: Optional[Dict[str, Any]] = Field(
@@ -773,8 +2743,8 @@ async def faiss_add_items(params: List[AddItemsInput], ctx: Context) -> Dict[str
         
         # 根据提供的数据类型调用相应方法
         if has_documents :
-            # 只提供文档，系统自动嵌入
-            added = _kb.add_items(metadatas, documents)
+            # 只提供文档，系统自动嵌入（在ingest线程池中执行，不阻塞事件循环）
+            added = await _ingest_executor.run(_kb.add_items, metadatas, documents)
         else:
             raise ValueError("每个item必须提供document或embedding中的至少一个")
             
@@ -784,8 +2754,52 @@ async def faiss_add_items(params: List[AddItemsInput], ctx: Context) -> Dict[str
         return {"success": False, "error": str(e)}
 
 
-class SearchInput(BaseModel):
+class MetadataFilterInput(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    category: Optional[Union[str, List[str]]] = Field(
+        None,
+        description="（可选）按分类过滤，可传单个值或列表（列表内任一匹配）。"
+    )
+    type: Optional[Union[str, List[str]]] = Field(
+        None,
+        description="（可选）按类型过滤，可传单个值或列表（列表内任一匹配）。"
+    )
+    source: Optional[Union[str, List[str]]] = Field(
+        None,
+        description="（可选）按来源过滤，可传单个值或列表（列表内任一匹配）。"
+    )
+    tags: Optional[List[str]] = Field(
+        None,
+        description="（可选）按标签过滤，条目需包含列出的全部标签。"
+    )
+
+    def filters(self) -> Optional[Dict[str, Any]]:
+        """Metadata filter applied inside the index scan (fields are AND-ed)."""
+        values = {field: getattr(self, field) for field in FILTER_FIELDS}
+        return {field: value for field, value in values.items() if value} or None
+
+
+async def _vector_search(embedding: Optional[List[float]], query_text: Optional[str], k: int,
+                         nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                         filters: Optional[Dict[str, Any]] = None, min_score: Optional[float] = None,
+                         max_results: int = 1000) -> List[Dict[str, Any]]:
+    if _search_batcher is not None and min_score is None:
+        # Concurrent callers share one batched encode + index.search
+        return await _search_batcher.search(embedding, query_text, k, nprobe=nprobe, ef_search=ef_search, filters=filters)
+    return await _search_executor.run(
+        _kb.search,
+        embedding=embedding,
+        query_text=query_text,
+        k=k,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        filters=filters,
+        min_score=min_score,
+        max_results=max_results,
+    )
+
+
+class SearchInput(MetadataFilterInput):
     query_embedding: Optional[List[float]] = Field(
         None,
         description="（可选）查询的嵌入向量。维度需与FAISS配置匹配。"
@@ -798,13 +2812,35 @@ class SearchInput(BaseModel):
         default=5, 
         ge=1, 
         le=100,
-        description="返回最相似的前k个结果。默认值为5，范围1-100。"
+        description="返回最相似的前k个结果。默认值为5，范围1-100。指定min_score时k仅作为首轮检索数量。"
+    )
+    min_score: Optional[float] = Field(
+        None,
+        ge=-1.0,
+        le=1.0,
+        description="（可选）相似度阈值（余弦相似度）。指定后返回所有得分不低于该值的结果（按得分降序，最多max_results条），而不是固定的前k个。"
+    )
+    max_results: int = Field(
+        default=1000,
+        ge=1,
+        le=10000,
+        description="（可选）min_score模式下返回结果的上限。默认值为1000。"
+    )
+    nprobe: Optional[int] = Field(
+        None,
+        ge=1,
+        description="（可选，IVF索引）每次查询访问的倒排列表数。越大召回越高、延迟越大。默认使用配置值。"
+    )
+    ef_search: Optional[int] = Field(
+        None,
+        ge=1,
+        description="（可选，HNSW索引）查询时候选列表大小。越大召回越高、延迟越大。默认使用配置值。"
     )
 
 
 @mcp.tool(
     name="faiss_search",
-    description="在知识库中搜索相关条目。可使用自然语言查询（文本）或预计算的嵌入向量进行搜索。返回按相关性排序的最相似条目。\n\n参数格式：params={\"query_text\":\"搜索内容\",\"k\":5}\n\n参数示例：\n文本搜索：{\"query_text\":\"查找技术文档\",\"k\":5}\n向量搜索：{\"query_embedding\":[0.1,0.2,0.3,...],\"k\":10}\n简单搜索：{\"query_text\":\"hello world\"}",
+    description="在知识库中搜索相关条目。可使用自然语言查询（文本）或预计算的嵌入向量进行搜索。返回按相关性排序的最相似条目。\n\n参数格式：params={\"query_text\":\"搜索内容\",\"k\":5}\n\n参数示例：\n文本搜索：{\"query_text\":\"查找技术文档\",\"k\":5}\n向量搜索：{\"query_embedding\":[0.1,0.2,0.3,...],\"k\":10}\n简单搜索：{\"query_text\":\"hello world\"}\n过滤搜索：{\"query_text\":\"部署\",\"category\":\"technical\",\"tags\":[\"docker\"]}\n阈值搜索：{\"query_text\":\"部署\",\"min_score\":0.75}",
 )
 async def faiss_search(params: SearchInput, ctx: Context) -> Dict[str, Any]:
     global _kb
@@ -812,13 +2848,167 @@ async def faiss_search(params: SearchInput, ctx: Context) -> Dict[str, Any]:
         raise RuntimeError("Faiss KB not initialized")
 
     try:
-        results = _kb.search(embedding=params.query_embedding, query_text=params.query_text, k=params.k)
+        results = await _vector_search(
+            params.query_embedding,
+            params.query_text,
+            params.k,
+            nprobe=params.nprobe,
+            ef_search=params.ef_search,
+            filters=params.filters(),
+            min_score=params.min_score,
+            max_results=params.max_results,
+        )
         return {"success": True, "results": results}
     except Exception as e:
         logger.exception("faiss_search failed")
         return {"success": False, "error": str(e)}
 
 
+class HybridSearchInput(MetadataFilterInput):
+    query_text: str = Field(
+        ...,
+        min_length=1,
+        description="查询文本。同时用于BM25全文检索和向量检索。"
+    )
+    k: int = Field(
+        default=5,
+        ge=1,
+        le=100,
+        description="融合后返回的结果数量。默认值为5，范围1-100。"
+    )
+    candidate_k: Optional[int] = Field(
+        None,
+        ge=1,
+        le=500,
+        description="（可选）每路检索的候选数量。默认max(4*k, 20)。"
+    )
+    vector_weight: float = Field(
+        default=1.0,
+        ge=0,
+        description="向量检索在RRF融合中的权重。"
+    )
+    text_weight: float = Field(
+        default=1.0,
+        ge=0,
+        description="BM25全文检索在RRF融合中的权重。"
+    )
+    rrf_k: int = Field(
+        default=60,
+        ge=1,
+        description="RRF平滑常数：score = Σ weight / (rrf_k + rank)。"
+    )
+    nprobe: Optional[int] = Field(
+        None,
+        ge=1,
+        description="（可选，IVF索引）每次查询访问的倒排列表数。"
+    )
+    ef_search: Optional[int] = Field(
+        None,
+        ge=1,
+        description="（可选，HNSW索引）查询时候选列表大小。"
+    )
+
+
+@mcp.tool(
+    name="faiss_hybrid_search",
+    description="混合检索：并发执行FTS5 BM25全文检索和FAISS向量检索，并用加权RRF融合排序。每个结果同时返回融合分数score、vector_score/vector_rank和text_score/text_rank（未命中的一路为null）。支持与faiss_search相同的过滤参数。\n\n参数格式：params={\"query_text\":\"搜索内容\",\"k\":5}\n\n参数示例：\n{\"query_text\":\"docker 部署\",\"k\":5,\"text_weight\":0.5}",
+)
+async def faiss_hybrid_search(params: HybridSearchInput, ctx: Context) -> Dict[str, Any]:
+    global _kb
+    if _kb is None:
+        raise RuntimeError("Faiss KB not initialized")
+
+    try:
+        candidate_k = params.candidate_k or max(4 * params.k, 20)
+        filters = params.filters()
+        # BM25 and kNN run concurrently on the search executor
+        vector_hits, text_hits = await asyncio.gather(
+            _vector_search(None, params.query_text, candidate_k,
+                           nprobe=params.nprobe, ef_search=params.ef_search, filters=filters),
+            _search_executor.run(_kb.text_search, params.query_text, candidate_k, filters),
+        )
+        results = await _search_executor.run(
+            _kb.fuse_rrf, vector_hits, text_hits, params.k,
+            vector_weight=params.vector_weight, text_weight=params.text_weight, rrf_k=params.rrf_k,
+        )
+        return {"success": True, "results": results}
+    except Exception as e:
+        logger.exception("faiss_hybrid_search failed")
+        return {"success": False, "error": str(e)}
+
+
+class DeleteInput(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    id: int = Field(
+        ...,
+        ge=1,
+        description="要删除的条目ID（faiss_add_items返回的added_ids之一）。"
+    )
+
+
+@mcp.tool(
+    name="faiss_delete",
+    description="从知识库删除条目，同时删除SQLite记录和向量。支持remove_ids的索引（Flat/IVF）直接移除向量，HNSW索引使用墓碑标记并在后台压缩重建。\n\n参数格式：params={\"id\":123}",
+)
+async def faiss_delete(params: DeleteInput, ctx: Context) -> Dict[str, Any]:
+    global _kb
+    if _kb is None:
+        raise RuntimeError("Faiss KB not initialized")
+
+    try:
+        deleted = await _ingest_executor.run(_kb.delete, params.id)
+        return {"success": deleted, "id": params.id}
+    except Exception as e:
+        logger.exception("faiss_delete failed")
+        return {"success": False, "error": str(e)}
+
+
+class ReindexInput(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+    action: str = Field(
+        default="start",
+        description="start：开始（或从检查点继续）重建；status：查看进度；cancel：在当前批次后停止，保留检查点。"
+    )
+    device: Optional[str] = Field(
+        default=None,
+        description="目标设备配置节：cpu / gpu / nv_gpu。默认沿用当前设备，仅重新读取该设备的模型与索引配置。"
+    )
+    batch_size: int = Field(
+        default=256,
+        ge=1,
+        le=900,
+        description="每批重新编码的条目数，每批完成后写入检查点。"
+    )
+    restart: bool = Field(
+        default=False,
+        description="忽略已有检查点，从头重新编码。"
+    )
+
+
+@mcp.tool(
+    name="faiss_reindex",
+    description="更换 embedder_config.json 中的模型后，在后台用新模型重新编码全部知识条目并构建新索引；构建期间检索继续使用旧模型和旧索引，完成后原子切换。\n\n参数格式：params={\"action\":\"start\"}\n\n参数示例：\n{\"action\":\"start\",\"device\":\"nv_gpu\",\"batch_size\":256}\n{\"action\":\"status\"}\n{\"action\":\"cancel\"}",
+)
+async def faiss_reindex(params: ReindexInput, ctx: Context) -> Dict[str, Any]:
+    global _kb
+    if _kb is None:
+        raise RuntimeError("Faiss KB not initialized")
+
+    try:
+        if params.action == "status":
+            job = _kb.reindex_job
+            return {"success": True, "job": job.status() if job is not None else None}
+        if params.action == "cancel":
+            return {"success": True, "job": _kb.cancel_reindex()}
+        if params.action != "start":
+            return {"success": False, "error": f"Unknown action '{params.action}', expected start, status or cancel"}
+        status = await _ingest_executor.run(_kb.start_reindex, params.device, params.batch_size, params.restart)
+        return {"success": True, "job": status}
+    except Exception as e:
+        logger.exception("faiss_reindex failed")
+        return {"success": False, "error": str(e)}
+
+
 class SaveInput(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
     # 此工具无需参数，用于保存当前索引和元数据到磁盘
@@ -828,16 +3018,16 @@ class SaveInput(BaseModel):
     name="faiss_save",
     description="将FAISS索引和元数据持久化到磁盘。用于保存当前的知识库状态。\n\n参数格式：params={}\n\n参数示例：{}  # 无需参数，直接调用即可保存当前状态",
 )
-async def faiss_save(params: SaveInput, ctx: Context) -> str:
+async def faiss_save(params: SaveInput, ctx: Context) -> Dict[str, Any]:
     global _kb
     if _kb is None:
         raise RuntimeError("Faiss KB not initialized")
     try:
-        _kb.save()
-        return json.dumps({"success": True, "message": "Saved index and metadata"}, indent=2)
+        await _ingest_executor.run(_kb.save)
+        return {"success": True, "message": "Saved index and metadata"}
     except Exception as e:
         logger.exception("faiss_save failed")
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 def test_faiss_add_items():
@@ -882,6 +3072,7 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=8001)
     parser.add_argument("--test", action="store_true", help="运行接口测试")
     parser.add_argument("--device", choices=["cpu", "gpu", "nv_gpu"], default=None)
+    parser.add_argument("--role", choices=list(ROLES), default=None, help="single (default), writer or reader")
     args = parser.parse_args()
 
     # 初始化配置
@@ -9,7 +9,7 @@ Memory MCP Server中存储的记忆内容，无需通过MCP协议。
 import os
 import json
 import sqlite3
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from contextlib import contextmanager
 
@@ -159,6 +159,35 @@ class MemoryAPIClient:
                 """
             )
 
+            # Indexes backing metadata-filtered search (see filter_ids)
+            for column in ("category", "type", "source"):
+                cur.execute(f"CREATE INDEX IF NOT EXISTS idx_knowledge_entries_{column} ON knowledge_entries({column})")
+
+            # Chunks of long documents. Chunk IDs come from the knowledge_entries sequence
+            # (see reserve_ids) so they never collide with entry IDs in the FAISS index.
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS knowledge_chunks (
+                    id INTEGER PRIMARY KEY,
+                    parent_id INTEGER NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    start_offset INTEGER,
+                    end_offset INTEGER
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_chunks_parent ON knowledge_chunks(parent_id)")
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_knowledge_entries_delete_chunks
+                AFTER DELETE ON knowledge_entries
+                FOR EACH ROW
+                BEGIN
+                    DELETE FROM knowledge_chunks WHERE parent_id = OLD.id;
+                END;
+                """
+            )
+
             # Try to create an FTS5 virtual table for full-text search and helper triggers.
             try:
                 cur.execute(
@@ -285,6 +314,44 @@ class MemoryAPIClient:
             
             return results
 
+    @staticmethod
+    def fts_query(text: str) -> str:
+        """Turn free text into an FTS5 query: every whitespace-separated term quoted, OR-ed.
+
+        Quoting keeps punctuation and FTS operators in user text from breaking the
+        MATCH syntax; OR lets BM25 rank partial matches instead of requiring all terms.
+        """
+        terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+        return " OR ".join(f'"{t}"' for t in terms)
+
+    def bm25_search(self, query: str, limit: int = 10, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Rank entries with FTS5 BM25; returns `{"id", "score"}` (higher is better), best first.
+
+        Returns an empty list when FTS5 is not available.
+        """
+        match = self.fts_query(query)
+        if not match:
+            return []
+        where, args = self._filter_clause(**(filters or {}), table="k")
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='knowledge_entries_fts'")
+            if cursor.fetchone() is None:
+                return []
+            # bm25() is lower-is-better; negate it so both result lists sort descending
+            cursor.execute(
+                f"""
+                SELECT fts.rowid AS id, -bm25(knowledge_entries_fts) AS score
+                FROM knowledge_entries_fts fts
+                JOIN knowledge_entries k ON k.id = fts.rowid
+                WHERE knowledge_entries_fts MATCH ? AND {where}
+                ORDER BY bm25(knowledge_entries_fts)
+                LIMIT ?
+                """,
+                [match, *args, limit]
+            )
+            return [{"id": row["id"], "score": row["score"]} for row in cursor.fetchall()]
+
     def get_memory_by_id(self, memory_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific memory by ID."""
         with self.get_connection() as conn:
@@ -312,15 +379,228 @@ class MemoryAPIClient:
                 }
             return None
 
-    def delete_memory(self, memory_id: int) -> bool:
+    def get_memories_by_ids(self, memory_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get several memories in a single `WHERE id IN (...)` query, keyed by ID."""
+        ids = [int(i) for i in memory_ids]
+        if not ids:
+            return {}
+        results: Dict[int, Dict[str, Any]] = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Stay below SQLITE_MAX_VARIABLE_NUMBER on older builds (999)
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT id, title, content, type, category, tags, language, source, confidence, created_at, updated_at, metadata FROM knowledge_entries WHERE id IN ({placeholders})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    results[row["id"]] = {
+                        "id": row["id"],
+                        "title": row["title"],
+                        "content": row["content"],
+                        "type": row["type"],
+                        "category": row["category"],
+                        "tags": json.loads(row["tags"]) if row["tags"] else None,
+                        "language": row["language"],
+                        "source": row["source"],
+                        "confidence": row["confidence"],
+                        "created_at": row["created_at"],
+                        "updated_at": row["updated_at"],
+                        "metadata": json.loads(row["metadata"]) if row["metadata"] else None
+                    }
+        return results
+
+    def existing_ids(self, memory_ids: List[int]) -> set:
+        """Return the subset of `memory_ids` that still have a row in knowledge_entries or knowledge_chunks."""
+        ids = [int(i) for i in memory_ids]
+        found = set()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(ids), 450):
+                chunk = ids[start:start + 450]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT id FROM knowledge_entries WHERE id IN ({placeholders}) "
+                    f"UNION SELECT id FROM knowledge_chunks WHERE id IN ({placeholders})",
+                    chunk + chunk
+                )
+                found.update(row["id"] for row in cursor.fetchall())
+        return found
 
-        from faiss_mcp_server import getFdb
-        kb = getFdb()
-        if kb is not None:
-            kb.delete(memory_id)
-            logger.info("Deleted memory from Faiss index")
+    def reserve_ids(self, count: int) -> int:
+        """Atomically reserve `count` consecutive IDs from the knowledge_entries sequence.
+
+        Returns the first reserved ID. Later AUTOINCREMENT inserts continue after the
+        reserved range, so reserved IDs can be used for explicit-ID rows and chunks.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'knowledge_entries'")
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("SELECT COALESCE(MAX(id), 0) AS seq FROM knowledge_entries")
+                base = int(cursor.fetchone()["seq"])
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('knowledge_entries', ?)", (base + count,))
+            else:
+                base = int(row["seq"] or 0)
+                cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'knowledge_entries'", (base + count,))
+            conn.commit()
+            return base + 1
+
+    def store_memories_bulk(self, rows: List[Dict[str, Any]], chunks: Optional[List[Dict[str, Any]]] = None) -> List[int]:
+        """Insert entries under explicit IDs from `reserve_ids`, plus their chunk rows, in one transaction.
+
+        Each row has id, title, content and optionally type, category, tags, language,
+        source, confidence. Either every row is stored or none is.
+        """
+        if not rows:
+            return []
+        with self.get_connection() as conn:
+            try:
+                conn.executemany(
+                    "INSERT INTO knowledge_entries (id, title, content, type, category, tags, language, source, confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(
+                        int(r["id"]), r["title"], r["content"], r.get("type") or "business_knowledge", r.get("category"),
+                        json.dumps(r["tags"]) if r.get("tags") else None, r.get("language"), r.get("source"),
+                        float(r.get("confidence", 1.0)),
+                    ) for r in rows]
+                )
+                if chunks:
+                    conn.executemany(
+                        "INSERT INTO knowledge_chunks (id, parent_id, chunk_index, start_offset, end_offset) VALUES (?, ?, ?, ?, ?)",
+                        [(c["id"], c["parent_id"], c["chunk_index"], c.get("start_offset"), c.get("end_offset")) for c in chunks]
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return [int(r["id"]) for r in rows]
+
+    def delete_memories(self, ids: List[int]) -> int:
+        """Delete several entries (and, via trigger, their chunks) in one transaction."""
+        ids = [int(i) for i in ids]
+        deleted = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                cursor.execute(f"DELETE FROM knowledge_entries WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                deleted += cursor.rowcount
+            conn.commit()
+        return deleted
+
+    def index_texts(self, after_id: int, limit: int) -> List[Tuple[int, int, str]]:
+        """Texts held by the vector index for up to `limit` entries with id > `after_id`, in id order.
+
+        Returns `(entry_id, vector_id, text)` triples: one per chunk of a chunked entry
+        (see knowledge_chunks), otherwise one with `vector_id == entry_id` and the full
+        content. An empty list means no entries are left.
+        """
+        limit = max(1, min(int(limit), 900))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, content FROM knowledge_entries WHERE id > ? ORDER BY id LIMIT ?", (int(after_id), limit))
+            rows = cursor.fetchall()
+            if not rows:
+                return []
+            ids = [row["id"] for row in rows]
+            cursor.execute(
+                f"SELECT id, parent_id, start_offset, end_offset FROM knowledge_chunks WHERE parent_id IN ({','.join('?' * len(ids))}) "
+                "ORDER BY parent_id, chunk_index",
+                ids,
+            )
+            chunks: Dict[int, List[Any]] = {}
+            for chunk in cursor.fetchall():
+                chunks.setdefault(chunk["parent_id"], []).append(chunk)
+        texts: List[Tuple[int, int, str]] = []
+        for row in rows:
+            content = row["content"] or ""
+            if row["id"] in chunks:
+                texts.extend((row["id"], c["id"], content[c["start_offset"]:c["end_offset"]]) for c in chunks[row["id"]])
+            else:
+                texts.append((row["id"], row["id"], content))
+        return texts
+
+    def get_chunk_parents(self, ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Map chunk IDs to `{"parent_id", "chunk_index"}`; IDs that are not chunks are absent."""
+        ids = [int(i) for i in ids]
+        results: Dict[int, Dict[str, int]] = {}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT id, parent_id, chunk_index FROM knowledge_chunks WHERE id IN ({placeholders})", chunk)
+                for row in cursor.fetchall():
+                    results[row["id"]] = {"parent_id": row["parent_id"], "chunk_index": row["chunk_index"]}
+        return results
+
+    def get_chunk_ids(self, parent_id: int) -> List[int]:
+        """IDs of all chunks of a document."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM knowledge_chunks WHERE parent_id = ? ORDER BY chunk_index", (int(parent_id),))
+            return [row["id"] for row in cursor.fetchall()]
+
+    @staticmethod
+    def _filter_clause(category: Optional[List[str]] = None, type: Optional[List[str]] = None,
+                       source: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+                       table: str = "knowledge_entries"):
+        """SQL condition and arguments for a metadata filter on `table` (knowledge_entries or its alias)."""
+        clauses: List[str] = []
+        args: List[Any] = []
+        for column, values in (("category", category), ("type", type), ("source", source)):
+            if values:
+                clauses.append(f"{table}.{column} IN ({','.join('?' * len(values))})")
+                args.extend(values)
+        for tag in tags or []:
+            clauses.append(f"json_valid({table}.tags) AND EXISTS (SELECT 1 FROM json_each({table}.tags) WHERE value = ?)")
+            args.append(tag)
+        return " AND ".join(clauses) or "1", args
+
+    def filter_ids(self, category: Optional[List[str]] = None, type: Optional[List[str]] = None,
+                   source: Optional[List[str]] = None, tags: Optional[List[str]] = None) -> List[int]:
+        """IDs (entries and their chunks) matching a metadata filter.
+
+        Values within a field are OR-ed, fields are AND-ed, and every tag in `tags`
+        must be present.
+        """
+        where, args = self._filter_clause(category, type, source, tags)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+                WITH matched AS (SELECT id FROM knowledge_entries WHERE {where})
+                SELECT id FROM matched
+                UNION ALL
+                SELECT c.id FROM knowledge_chunks c JOIN matched m ON c.parent_id = m.id
+                """,
+                args
+            )
+            return [row["id"] for row in cursor.fetchall()]
+
+    def has_chunks(self) -> bool:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM knowledge_chunks LIMIT 1")
+            return cursor.fetchone() is not None
+
+    def delete_memory(self, memory_id: int, sync_faiss: bool = True) -> bool:
+        """Delete a memory by ID.
+
+        If a FAISS KB is registered via `set_faiss_kb`, it performs the delete so the
+        vector is dropped too; FaissKB itself calls back with `sync_faiss=False`.
+        """
+        if sync_faiss:
+            kb = get_faiss_kb()
+            if kb is not None:
+                deleted = kb.delete(memory_id)
+                logger.info("Deleted memory from Faiss index")
+                return deleted
 
-        """Delete a memory by ID."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM knowledge_entries WHERE id = ?", (memory_id,))
@@ -347,14 +627,14 @@ class MemoryAPIClient:
             result = cursor.fetchone()
             return result["count"] if result else 0
 
-    def store_memory(self, title: str, content: str, type: str = "business_knowledge", category: Optional[str] = None, tags: Optional[List[str]] = None, language: Optional[str] = None, source: Optional[str] = None, confidence: float = 1.0) -> int:
-        """Store a new memory (for testing purposes)."""
+    def store_memory(self, title: str, content: str, type: str = "business_knowledge", category: Optional[str] = None, tags: Optional[List[str]] = None, language: Optional[str] = None, source: Optional[str] = None, confidence: float = 1.0, memory_id: Optional[int] = None) -> int:
+        """Store a new memory (for testing purposes). `memory_id` inserts under an ID from `reserve_ids`."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             tags_str = json.dumps(tags) if tags else None
             cursor.execute(
-                "INSERT INTO knowledge_entries (title, content, type, category, tags, language, source, confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (title, content, type, category, tags_str, language, source, confidence)
+                "INSERT INTO knowledge_entries (id, title, content, type, category, tags, language, source, confidence) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (memory_id, title, content, type, category, tags_str, language, source, confidence)
             )
             memory_id = cursor.lastrowid
             if memory_id is None:
@@ -736,6 +1016,7 @@ async def get_faiss_statistics():
         return {
             "faiss_index": index_stats,
             "metadata": metadata_stats,
+            "search_cache": kb.search_cache.stats() if kb.search_cache is not None else None,
             "status": "ok"
         }
     except Exception as e:
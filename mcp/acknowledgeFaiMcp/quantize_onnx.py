@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Export a dynamic-INT8-quantized copy of the ONNX embedding model.
+
+Weights of MatMul/Gemm (and optionally other) nodes are stored as INT8 and
+activations are quantized on the fly, which typically gives 2-4x faster encoding
+on CPUExecutionProvider for BERT-style encoders at a small recall cost. Run
+bench_embedder.py to measure both on your machine.
+
+Usage:
+    python quantize_onnx.py                                   # gpu.onnx_path -> model.int8.onnx
+    python quantize_onnx.py --input ./model/model.onnx --output ./model/model.int8.onnx
+
+Then point `gpu.cpu_onnx_path` in embedder_config.json at the output; it is used
+whenever the ONNX embedder runs on CPUExecutionProvider.
+"""
+
+import argparse
+import json
+import os
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_input_path() -> str:
+    cfg_path = os.path.join(HERE, "embedder_config.json")
+    onnx_path = "./model/model.onnx"
+    if os.path.exists(cfg_path):
+        with open(cfg_path, "r", encoding="utf-8") as f:
+            onnx_path = json.load(f).get("gpu", {}).get("onnx_path", onnx_path)
+    return onnx_path if os.path.isabs(onnx_path) else os.path.normpath(os.path.join(HERE, onnx_path))
+
+
+def quantize(input_path: str, output_path: str, per_channel: bool = False, reduce_range: bool = False,
+             preprocess: bool = True) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = input_path
+    if preprocess:
+        # Shape inference + graph cleanup lets the quantizer cover more nodes
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        source = output_path + ".pre.onnx"
+        quant_pre_process(input_path, source, skip_symbolic_shape=False)
+    try:
+        quantize_dynamic(
+            model_input=source,
+            model_output=output_path,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            reduce_range=reduce_range,
+        )
+    finally:
+        if source != input_path and os.path.exists(source):
+            os.remove(source)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a dynamic INT8 copy of the ONNX embedding model")
+    parser.add_argument("--input", default=None, help="fp32 model (default: gpu.onnx_path from embedder_config.json)")
+    parser.add_argument("--output", default=None, help="quantized model (default: <input>.int8.onnx)")
+    parser.add_argument("--per-channel", action="store_true", help="per-channel weight scales (better accuracy, larger model)")
+    parser.add_argument("--reduce-range", action="store_true", help="7-bit weights; avoids saturation on CPUs without VNNI")
+    parser.add_argument("--no-preprocess", action="store_true", help="skip shape inference / graph optimization before quantizing")
+    args = parser.parse_args()
+
+    input_path = args.input or default_input_path()
+    output_path = args.output or os.path.splitext(input_path)[0] + ".int8.onnx"
+    if not os.path.exists(input_path):
+        raise SystemExit(f"ONNX model not found: {input_path}")
+
+    started = time.perf_counter()
+    quantize(input_path, output_path, per_channel=args.per_channel, reduce_range=args.reduce_range,
+             preprocess=not args.no_preprocess)
+    size_in = os.path.getsize(input_path) / 2**20
+    size_out = os.path.getsize(output_path) / 2**20
+    print(f"Quantized {input_path} ({size_in:.1f} MiB) -> {output_path} ({size_out:.1f} MiB) "
+          f"in {time.perf_counter() - started:.1f}s")
+    print('Set "cpu_onnx_path" in the gpu section of embedder_config.json to use it on CPU.')
+
+
+if __name__ == "__main__":
+    main()
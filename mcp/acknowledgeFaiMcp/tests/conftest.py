@@ -0,0 +1,81 @@
+import hashlib
+import os
+import sys
+import time
+
+import pytest
+
+# The server modules are run as scripts from their own directory, not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIM = 8
+
+
+class StubEmbedder:
+    """Deterministic stand-in for the sentence-transformers model: one fixed random vector per text."""
+
+    def __init__(self, dim: int = DIM):
+        self.dim = dim
+        self.calls = 0
+        self.texts = 0
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        import numpy as np
+        self.calls += 1
+        self.texts += len(texts)
+        rows = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            rows.append(np.random.default_rng(seed).standard_normal(self.dim).astype("float32"))
+        return np.stack(rows)
+
+
+@pytest.fixture
+def server():
+    pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+    pytest.importorskip("mcp")
+    import faiss_mcp_server
+    return faiss_mcp_server
+
+
+@pytest.fixture
+def embedder(server, monkeypatch):
+    stub = StubEmbedder()
+    monkeypatch.setattr(server, "get_embedder", lambda *args, **kwargs: stub)
+    return stub
+
+
+@pytest.fixture
+def make_kb(server, embedder, tmp_path):
+    """Build FaissKB instances over index and knowledge DB files in `tmp_path`."""
+    kbs = []
+
+    def make(**overrides):
+        params = {
+            "dim": DIM,
+            "index_path": str(tmp_path / "faiss.index"),
+            "knowledge_db_path": str(tmp_path / "knowledge.db"),
+            "vector_log_fsync": False,
+        }
+        params.update(overrides)
+        kb = server.FaissKB(server.FaissConfig(**params))
+        kbs.append(kb)
+        return kb
+
+    yield make
+    for kb in kbs:
+        kb.close()
+
+
+@pytest.fixture
+def wait_for_rebuild():
+    """Block until a KB's background rebuild (migration) has swapped in its index."""
+
+    def wait(kb, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while kb._rebuilding:
+            assert time.monotonic() < deadline, "background rebuild did not finish"
+            time.sleep(0.01)
+
+    return wait
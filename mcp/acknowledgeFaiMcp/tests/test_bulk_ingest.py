@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from fastapi import HTTPException
+
+from memory_api import MemoryAPIClient
+
+
+@pytest.fixture
+def client(tmp_path):
+    return MemoryAPIClient(str(tmp_path / "knowledge.db"))
+
+
+def test_reserved_ids_are_skipped_by_autoincrement(client):
+    first = client.reserve_ids(3)
+    assert client.reserve_ids(2) == first + 3
+    stored = client.store_memory(title="t", content="c")
+    assert stored == first + 5
+
+
+def test_bulk_insert_is_all_or_nothing(client):
+    start = client.reserve_ids(2)
+    rows = [{"id": start, "title": "a", "content": "a"}, {"id": start + 1, "title": "b", "content": "b", "tags": ["x"]}]
+    assert client.store_memories_bulk(rows) == [start, start + 1]
+    assert client.get_memory_by_id(start + 1)["tags"] == ["x"]
+
+    again = client.reserve_ids(1)
+    with pytest.raises(HTTPException):
+        # The second row reuses an existing id, so neither row is stored
+        client.store_memories_bulk([{"id": again, "title": "c", "content": "c"}, rows[0]])
+    assert client.get_memory_by_id(again) is None
+
+
+def test_add_items_stores_rows_under_vector_ids(make_kb):
+    kb = make_kb()
+    ids = kb.add_items(metadatas=[{"title": "first"}, {"category": "docs"}], documents=["one", "two"])
+    assert ids == list(range(ids[0], ids[0] + 2))
+    rows = [kb.memory_client.get_memory_by_id(i) for i in ids]
+    assert [r["content"] for r in rows] == ["one", "two"]
+    assert rows[0]["title"] == "first" and rows[1]["category"] == "docs"
+
+
+def test_failed_index_add_removes_rows(make_kb, monkeypatch):
+    kb = make_kb()
+    before = kb.memory_client.reserve_ids(1)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("index add failed")
+
+    monkeypatch.setattr(kb.index, "add_with_ids", fail)
+    with pytest.raises(RuntimeError, match="index add failed"):
+        kb.add_items(documents=["lost"])
+    assert kb.memory_client.get_memory_by_id(before + 1) is None
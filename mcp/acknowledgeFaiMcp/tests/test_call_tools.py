@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from starlette.requests import Request
+
+
+def post(handler, payload):
+    body = json.dumps(payload).encode("utf-8")
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def run():
+        request = Request({"type": "http", "method": "POST", "query_string": b"", "headers": []}, receive)
+        return await handler(request)
+
+    response = asyncio.run(run())
+    return response.status_code, json.loads(response.body)
+
+
+@pytest.fixture
+def live(server, make_kb, monkeypatch):
+    """Server globals wired to a stub-embedder KB, without the search micro-batcher."""
+    kb = make_kb()
+    kb.add_items([{"source": "a.md"}, {"source": "b.md"}], ["alpha document", "beta document"])
+    monkeypatch.setattr(server, "_kb", kb)
+    monkeypatch.setattr(server, "_search_batcher", None)
+    for name in ("_search_executor", "_ingest_executor"):
+        monkeypatch.setattr(server, name, server.BoundedExecutor(name, workers=1, max_pending=8, timeout=5.0))
+    yield server
+    server._search_executor.shutdown()
+    server._ingest_executor.shutdown()
+
+
+def test_call_tool_returns_the_tools_dict(live):
+    status, body = post(live._call_tool_compat, {"tool": "faiss_search", "arguments": {"params": {"query_text": "alpha document", "k": 1}}})
+    assert status == 200
+    assert body["result"]["success"] is True
+    assert body["result"]["results"][0]["metadata"]["document"] == "alpha document"
+
+
+def test_faiss_save_returns_an_object(live):
+    status, body = post(live._call_tool_compat, {"tool": "faiss_save", "arguments": {"params": {}}})
+    assert status == 200
+    assert body["result"] == {"success": True, "message": "Saved index and metadata"}
+
+
+def test_call_tool_rejects_missing_tool(live):
+    assert post(live._call_tool_compat, {"arguments": {}})[0] == 400
+
+
+def test_call_tools_reports_each_call_in_order(live):
+    status, body = post(live._call_tools_compat, {"calls": [
+        {"tool": "faiss_search", "arguments": {"params": {"query_text": "beta document", "k": 1}}},
+        {"arguments": {}},
+        {"tool": "no_such_tool", "arguments": {}},
+        {"tool": "faiss_search", "arguments": {"params": {"query_text": "alpha document", "k": 1}}},
+    ]})
+    assert status == 200
+    first, missing, unknown, last = body["results"]
+    assert first["result"]["results"][0]["metadata"]["document"] == "beta document"
+    assert missing == {"error": "missing tool name"}
+    assert "error" in unknown
+    assert last["result"]["results"][0]["metadata"]["document"] == "alpha document"
+
+
+def test_call_tools_expects_a_list(live):
+    assert post(live._call_tools_compat, {"calls": {"tool": "faiss_save"}})[0] == 400
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import chunk_spans
+
+LONG = "abcdefghij" "klmnopqrst" "uvwxyz0123" "456789"
+CHUNKING = {"chunk_size_tokens": 10, "chunk_overlap_tokens": 2}
+
+
+def test_chunk_spans_overlap_and_cover_the_text():
+    assert chunk_spans("short", None, size=10, overlap=2) == [(0, 5)]
+    spans = chunk_spans(LONG, None, size=10, overlap=2)
+    assert spans[0] == (0, 10)
+    assert spans[1] == (8, 18)
+    assert spans[-1][1] == len(LONG)
+    assert all(end - start <= 10 for start, end in spans)
+
+
+def test_long_documents_are_indexed_as_chunks(make_kb):
+    kb = make_kb(**CHUNKING)
+    long_id, short_id = kb.add_items(documents=[LONG, "tiny"])
+    chunks = len(chunk_spans(LONG, None, 10, 2))
+    assert kb.index.ntotal == chunks + 1
+
+    results = kb.search(query_text=LONG[8:18], k=2)
+    assert [r["id"] for r in results] == [long_id, short_id]
+    top = results[0]
+    assert top["metadata"]["document"] == LONG
+    assert top["chunks"][0]["chunk_index"] == 1
+    assert "chunks" not in results[1]
+
+
+def test_sum_aggregation_adds_chunk_scores(make_kb):
+    kb = make_kb(**CHUNKING)
+    kb.add_items(documents=[LONG])
+    best = max(kb.search(query_text=LONG[8:18], k=1)[0]["chunks"], key=lambda c: c["score"])["score"]
+
+    summed = make_kb(**CHUNKING, chunk_aggregation="sum").search(query_text=LONG[8:18], k=1)[0]
+    assert summed["score"] == pytest.approx(sum(c["score"] for c in summed["chunks"]))
+    assert len(summed["chunks"]) > 1 and summed["score"] != pytest.approx(best)
+
+
+def test_delete_removes_every_chunk(make_kb):
+    kb = make_kb(**CHUNKING)
+    long_id, short_id = kb.add_items(documents=[LONG, "tiny"])
+    assert kb.delete(long_id)
+    assert kb.index.ntotal == 1
+
+    # Chunk bookkeeping comes back from SQLite after a restart
+    reopened = make_kb(**CHUNKING)
+    assert [r["id"] for r in reopened.search(query_text=LONG, k=5)] == [short_id]
+
+
+def test_unknown_aggregation_is_rejected(make_kb):
+    with pytest.raises(ValueError, match="chunk_aggregation"):
+        make_kb(chunk_aggregation="mean")
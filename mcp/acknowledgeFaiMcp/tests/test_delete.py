@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+import memory_api
+from faiss_index import index_kind
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+def test_flat_delete_removes_vector_and_row(make_kb):
+    kb = make_kb()
+    ids = kb.add_items(documents=["keep me", "drop me"])
+    assert kb.delete(ids[1]) is True
+    assert kb.index.ntotal == 1
+    assert ids[1] not in _ids(kb.search(query_text="drop me", k=2))
+    assert kb.memory_client.get_memory_by_id(ids[1]) is None
+    assert kb.delete(ids[1]) is False
+    assert kb.index.ntotal == 1
+
+
+def test_vector_is_dropped_before_the_row(make_kb, monkeypatch):
+    kb = make_kb()
+    ids = kb.add_items(documents=["a", "b"])
+    delete_row = kb.memory_client.delete_memory
+    seen = {}
+
+    def checking_delete(memory_id, sync_faiss=True):
+        seen["ntotal"] = kb.index.ntotal
+        return delete_row(memory_id, sync_faiss=sync_faiss)
+
+    monkeypatch.setattr(kb.memory_client, "delete_memory", checking_delete)
+    assert kb.delete(ids[0])
+    assert seen["ntotal"] == 1
+
+
+def test_memory_api_delete_routes_through_kb(make_kb, monkeypatch):
+    kb = make_kb()
+    ids = kb.add_items(documents=["a", "b"])
+    monkeypatch.setattr(memory_api, "_faiss_kb", kb)
+    assert kb.memory_client.delete_memory(ids[0]) is True
+    assert kb.index.ntotal == 1
+    assert kb.memory_client.get_memory_by_id(ids[0]) is None
+
+
+def test_hnsw_delete_tombstones_and_persists(make_kb, wait_for_rebuild):
+    kb = make_kb(index_type="hnsw", migrate_threshold=1, hnsw_m=8, compact_tombstone_ratio=1.0)
+    ids = kb.add_items(documents=[f"document {i}" for i in range(10)])
+    wait_for_rebuild(kb)
+    assert index_kind(kb.index) == "hnsw"
+
+    assert kb.delete(ids[3])
+    assert ids[3] in kb.tombstones and kb.index.ntotal == 10
+    assert ids[3] not in _ids(kb.search(query_text="document 3", k=10))
+    kb.save()
+
+    restarted = make_kb(index_type="hnsw", migrate_threshold=1, hnsw_m=8, compact_tombstone_ratio=1.0)
+    assert ids[3] in restarted.tombstones
+    assert ids[3] not in _ids(restarted.search(query_text="document 3", k=10))
+
+
+def test_compaction_drops_tombstoned_vectors(make_kb, wait_for_rebuild):
+    kb = make_kb(index_type="hnsw", migrate_threshold=1, hnsw_m=8, compact_tombstone_ratio=0.2)
+    ids = kb.add_items(documents=[f"document {i}" for i in range(10)])
+    wait_for_rebuild(kb)
+
+    kb.delete(ids[0])
+    assert len(kb.tombstones) == 1
+    kb.delete(ids[1])
+    wait_for_rebuild(kb)
+    assert len(kb.tombstones) == 0
+    assert kb.index.ntotal == 8
+    assert index_kind(kb.index) == "hnsw"
+    assert not {ids[0], ids[1]} & set(_ids(kb.search(query_text="document 0", k=10)))
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import EmbeddingCache
+
+
+def test_cache_round_trip_per_model(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache(path, "model-a")
+    vectors = np.array([[0.5, -0.25], [1.0, 2.0]], dtype="float32")
+    cache.put_many(["first text", "second"], vectors)
+    cache.close()
+
+    reopened = EmbeddingCache(path, "model-a")
+    # Whitespace differences hash to the same entry
+    found = reopened.get_many(["  first   text ", "unknown", "second"])
+    np.testing.assert_allclose(found[0], vectors[0])
+    assert found[1] is None
+    np.testing.assert_allclose(found[2], vectors[1])
+    assert reopened.disk_hits == 2
+
+    assert EmbeddingCache(path, "model-b").get_many(["second"]) == [None]
+
+
+def test_kb_reuses_cached_embeddings(make_kb, embedder):
+    kb = make_kb()
+    ids = kb.add_items(documents=["cached document", "another document"])
+    assert embedder.texts == 2
+
+    assert kb.search(query_text="cached document", k=1)[0]["id"] == ids[0]
+    kb.add_items(documents=["another document"])
+    assert embedder.texts == 2
+
+
+def test_cache_can_be_disabled(make_kb, embedder):
+    kb = make_kb(embedding_cache_enabled=False)
+    assert kb.embedding_cache is None
+    kb.add_items(documents=["text"])
+    kb.search(query_text="text", k=1)
+    assert embedder.texts == 2
+
+
+def test_relative_paths_resolve_against_module_dir(server, make_kb, tmp_path, monkeypatch):
+    module_dir = os.path.dirname(os.path.abspath(server.__file__))
+    store = os.path.relpath(tmp_path / "store", module_dir)
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    kb = make_kb(index_path=os.path.join(store, "faiss.index"), knowledge_db_path=os.path.join(store, "knowledge.db"))
+    assert kb.cfg.index_path == str(tmp_path / "store" / "faiss.index")
+    assert kb.embedding_cache.path == str(tmp_path / "store" / "embedding_cache.db")
+    kb.add_items(documents=["text"])
+    kb.save()
+    stored = os.listdir(tmp_path / "store")
+    assert {"embedding_cache.db", "faiss.index", "knowledge.db"} <= set(stored)
+    assert os.listdir(elsewhere) == []
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+
+class RecordingPool(ThreadPoolExecutor):
+    """Thread stand-in for the encode process pool; records the shard sizes it was handed."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.shards = []
+
+    def submit(self, fn, texts, *args, **kwargs):
+        self.shards.append(len(texts))
+        return super().submit(fn, texts, *args, **kwargs)
+
+
+@pytest.fixture
+def pool():
+    pool = RecordingPool(max_workers=3)
+    yield pool
+    pool.shutdown()
+
+
+def texts(n):
+    return [f"document number {i}" for i in range(n)]
+
+
+def test_large_encodes_are_sharded_in_order(make_kb, embedder, pool):
+    kb = make_kb(embed_shard_size=4, embedding_cache_enabled=False)
+    batch = texts(10)
+    out = kb._encode_in_pool(pool, batch)
+
+    # Even share per process is 4 (ceil(10 / 3)), capped by embed_shard_size
+    assert pool.shards == [4, 4, 2]
+    np.testing.assert_allclose(out, embedder.encode(batch))
+
+
+def test_shards_are_an_even_share_per_process(make_kb, embedder, pool):
+    kb = make_kb(embed_shard_size=256, embedding_cache_enabled=False)
+    kb._encode_in_pool(pool, texts(7))
+    assert pool.shards == [3, 3, 1]
+
+
+def test_small_encodes_are_one_task(make_kb, embedder, pool):
+    kb = make_kb(embedding_cache_enabled=False)
+    kb._encode_in_pool(pool, texts(1))
+    assert pool.shards == [1]
+
+
+def test_add_items_encodes_on_the_pool(make_kb, embedder, pool):
+    kb = make_kb(embed_shard_size=2, embedding_cache_enabled=False)
+    kb.encode_pool = pool
+    ids = kb.add_items(documents=texts(5))
+    assert pool.shards == [2, 2, 1]
+
+    kb.encode_pool = None
+    assert kb.search(query_text="document number 3", k=1)[0]["id"] == ids[3]
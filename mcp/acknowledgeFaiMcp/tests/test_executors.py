@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import BoundedExecutor, RWLock
+
+
+def test_bounded_executor_runs_off_the_event_loop():
+    executor = BoundedExecutor("test", workers=1, max_pending=1, timeout=1.0)
+
+    async def run():
+        return await executor.run(lambda a, b=0: (threading.current_thread().name, a + b), 1, b=2)
+
+    try:
+        name, total = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert name.startswith("test") and total == 3
+
+
+def test_bounded_executor_rejects_when_queue_stays_full():
+    executor = BoundedExecutor("test", workers=1, max_pending=1, timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError, match="queue is full"):
+            await executor.run(lambda: None)
+        release.set()
+        assert await first is True
+        # The slot is free again once the first job finished
+        assert await executor.run(lambda: "ok") == "ok"
+        assert executor.pending == 0
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_rwlock_shares_reads_and_excludes_writes():
+    lock = RWLock()
+    both_reading = threading.Barrier(2, timeout=5)
+    events = []
+
+    def reader():
+        with lock.read():
+            both_reading.wait()
+            events.append("read")
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    with lock.write():
+        for t in readers:
+            t.start()
+        events.append("write")
+    for t in readers:
+        t.join(5)
+    # Both readers were inside the lock at once, and only after the writer left
+    assert events == ["write", "read", "read"]
+
+
+def test_searches_wait_for_writer(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=["document"])
+    results = []
+    with kb._lock.write():
+        t = threading.Thread(target=lambda: results.append(kb.search(query_text="document", k=1)))
+        t.start()
+        t.join(0.2)
+        assert t.is_alive() and not results
+    t.join(5)
+    assert len(results[0]) == 1
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import filter_key
+
+DOCS = ["deploy with docker", "deploy with ansible", "quarterly revenue", "hiring plan"]
+METAS = [
+    {"category": "technical", "source": "ops.md", "tags": ["docker", "deploy"]},
+    {"category": "technical", "source": "ops.md", "tags": ["deploy"]},
+    {"category": "business", "source": "finance.md", "tags": ["revenue"]},
+    {"category": "business", "type": "hr", "source": "people.md"},
+]
+
+
+@pytest.fixture
+def indexed(make_kb):
+    kb = make_kb()
+    return kb, kb.add_items(metadatas=METAS, documents=DOCS)
+
+
+def found(kb, **filters):
+    return {r["id"] for r in kb.search(query_text="deploy with docker", k=10, filters=filters)}
+
+
+def test_filter_key_is_canonical():
+    assert filter_key({"category": "a", "tags": ["y", "x", "x"]}) == filter_key({"tags": ["x", "y"], "category": ["a"]})
+    assert filter_key({}) is None and filter_key({"category": []}) is None
+    with pytest.raises(ValueError, match="Unknown filter fields"):
+        filter_key({"author": "me"})
+
+
+def test_fields_and_values_combine(indexed):
+    kb, ids = indexed
+    assert found(kb, category="technical") == {ids[0], ids[1]}
+    # Values within a field are OR-ed, fields are AND-ed
+    assert found(kb, source=["ops.md", "people.md"], category="business") == {ids[3]}
+    assert found(kb, type="hr") == {ids[3]}
+    # Every tag must be present
+    assert found(kb, tags=["deploy", "docker"]) == {ids[0]}
+    assert found(kb, category="missing") == set()
+
+
+def test_filter_sees_entries_added_after_caching(indexed):
+    kb, ids = indexed
+    assert found(kb, category="business") == {ids[2], ids[3]}
+    new_id, = kb.add_items(metadatas=[{"category": "business"}], documents=["new budget"])
+    assert found(kb, category="business") == {ids[2], ids[3], new_id}
+    kb.delete(ids[2])
+    assert found(kb, category="business") == {ids[3], new_id}
+
+
+def test_filtered_results_are_not_crowded_out(indexed):
+    kb, ids = indexed
+    # Only one entry matches; it is returned even though three others score higher
+    results = kb.search(query_text="deploy with docker", k=1, filters={"source": "people.md"})
+    assert [r["id"] for r in results] == [ids[3]]
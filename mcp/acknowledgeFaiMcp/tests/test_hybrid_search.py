@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from memory_api import MemoryAPIClient
+
+
+def test_fts_query_quotes_terms():
+    assert MemoryAPIClient.fts_query('docker "compose" AND') == '"docker" OR """compose""" OR "AND"'
+    assert MemoryAPIClient.fts_query("   ") == ""
+
+
+def test_fuse_rrf_weights_ranks(make_kb):
+    kb = make_kb()
+    a, b, c = kb.add_items(documents=["alpha", "beta", "gamma"])
+    vector_hits = [{"id": a, "score": 0.9, "metadata": None}, {"id": b, "score": 0.5, "metadata": None}]
+    text_hits = [{"id": c, "score": 7.0}, {"id": b, "score": 3.0}]
+
+    fused = kb.fuse_rrf(vector_hits, text_hits, k=3, rrf_k=60)
+    assert [d["id"] for d in fused] == [b, a, c]
+    assert fused[0]["score"] == pytest.approx(1 / 62 + 1 / 62)
+    assert (fused[0]["vector_rank"], fused[0]["text_rank"]) == (2, 2)
+    assert fused[1]["text_rank"] is None and fused[2]["vector_score"] is None
+    # Text-only hits get their metadata looked up
+    assert fused[2]["metadata"]["document"] == "gamma"
+
+    text_first = kb.fuse_rrf(vector_hits, text_hits, k=1, vector_weight=0.0, text_weight=1.0, rrf_k=60)
+    assert [d["id"] for d in text_first] == [c]
+
+
+def test_text_search_ranks_keyword_matches(make_kb):
+    kb = make_kb()
+    ids = kb.add_items(
+        metadatas=[{"category": "ops"}, {"category": "ops"}, {"category": "finance"}],
+        documents=["kubernetes rollout guide", "docker compose notes", "docker budget review"],
+    )
+    hits = kb.text_search("docker", k=5)
+    if not hits:
+        pytest.skip("SQLite build without FTS5")
+    assert {h["id"] for h in hits} == {ids[1], ids[2]}
+    assert [h["id"] for h in kb.text_search("docker", k=5, filters={"category": "ops"})] == [ids[1]]
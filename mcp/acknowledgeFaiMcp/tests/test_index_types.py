@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+faiss = pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_index import INDEX_TYPES, build_index, extract_vectors, index_kind, search_parameters
+
+DIM = 8
+BUILD_PARAMS = {"nlist": 4, "pq_m": 4, "pq_nbits": 4, "hnsw_m": 8, "ef_construction": 40}
+
+
+def _unit_vectors(n, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_build_index_keeps_ids(index_type):
+    vectors = _unit_vectors(200)
+    ids = np.arange(1000, 1200, dtype="int64")
+    index = build_index(index_type, DIM, vectors, ids, **BUILD_PARAMS)
+    assert index.ntotal == 200
+    assert sorted(extract_vectors(index)[0].tolist()) == ids.tolist()
+
+    params = search_parameters(index, nprobe=4, ef_search=64)
+    _, found = index.search(vectors[:1], 1, params=params) if params else index.search(vectors[:1], 1)
+    if index_type != "ivf_pq":
+        assert found[0][0] == 1000
+
+
+def test_ivf_pq_requires_pq_m_dividing_dim():
+    with pytest.raises(ValueError):
+        build_index("ivf_pq", DIM, _unit_vectors(50), np.arange(50), nlist=2, pq_m=3)
+
+
+def test_flat_migrates_in_background(make_kb, wait_for_rebuild):
+    kb = make_kb(index_type="hnsw", migrate_threshold=20, hnsw_m=8)
+    ids = kb.add_items(documents=[f"document {i}" for i in range(25)])
+    wait_for_rebuild(kb)
+    assert index_kind(kb.index) == "hnsw"
+    assert kb.index.ntotal == 25
+    assert kb.search(query_text="document 7", k=1)[0]["id"] == ids[7]
+
+
+def test_adds_during_migration_are_replayed(make_kb, wait_for_rebuild):
+    kb = make_kb(index_type="ivf_flat", migrate_threshold=20, nlist=2)
+    build = kb._build
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        return build(*args, **kwargs)
+
+    kb._build = slow_build
+    kb.add_items(documents=[f"document {i}" for i in range(20)])
+    assert started.wait(10)
+    # The flat index still serves searches and takes adds while the IVF index trains
+    late = kb.add_items(documents=["late document"])
+    assert index_kind(kb.index) == "flat"
+    assert kb.search(query_text="late document", k=1)[0]["id"] == late[0]
+    release.set()
+    wait_for_rebuild(kb)
+
+    assert index_kind(kb.index) == "ivf"
+    assert kb.index.ntotal == 21
+    assert kb.search(query_text="late document", k=1, nprobe=2)[0]["id"] == late[0]
+
+
+def test_startup_migrates_existing_flat_index(make_kb, wait_for_rebuild):
+    kb = make_kb()
+    kb.add_items(documents=[f"document {i}" for i in range(25)])
+    kb.save()
+    restarted = make_kb(index_type="hnsw", migrate_threshold=20, hnsw_m=8)
+    wait_for_rebuild(restarted)
+    assert index_kind(restarted.index) == "hnsw" and restarted.index.ntotal == 25
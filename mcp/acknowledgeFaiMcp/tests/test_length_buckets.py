@@ -0,0 +1,42 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import encode_texts, length_buckets
+
+
+def test_buckets_respect_token_budget_and_batch_size():
+    lengths = [5, 100, 7, 6, 90, 300, 8]
+    buckets = length_buckets(lengths, max_tokens=200, max_batch=3)
+    assert sorted(i for bucket in buckets for i in bucket) == list(range(len(lengths)))
+    for bucket in buckets:
+        assert len(bucket) <= 3
+        longest = max(lengths[i] for i in bucket)
+        assert len(bucket) == 1 or len(bucket) * longest <= 200
+    # Short rows are not padded to the long ones, and the oversized row is alone
+    assert [0, 3, 2] in buckets
+    assert [5] in buckets
+
+
+def test_encode_texts_returns_rows_in_input_order(server, embedder, monkeypatch):
+    # A whitespace tokenizer makes encode_texts build its own buckets
+    embedder.tokenizer = lambda texts, **kwargs: {"input_ids": [text.split() for text in texts]}
+    embedder.max_seq_length = None
+    batches = []
+    encode = embedder.encode
+
+    def recording(texts, **kwargs):
+        batches.append(list(texts))
+        return encode(texts, **kwargs)
+
+    monkeypatch.setattr(embedder, "encode", recording)
+    monkeypatch.setattr(server, "_batching_limits", lambda cfg: (12, 64))
+    texts = ["word " * 10, "short", "two words", "word " * 11, "three short words"]
+    out = encode_texts(embedder, texts)
+
+    np.testing.assert_array_equal(out, np.concatenate([encode([text]) for text in texts]))
+    # The two long texts cannot share a batch under the 12-token budget
+    assert len(batches) == 3
+    assert batches[0] == ["short", "two words", "three short words"]
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_index import has_ondisk_invlists, index_kind
+
+IVF = {"index_type": "ivf_flat", "migrate_threshold": 1, "nlist": 4}
+
+
+def build_ivf(make_kb, wait_for_rebuild, **overrides):
+    kb = make_kb(**IVF, **overrides)
+    ids = kb.add_items(documents=[f"document {i}" for i in range(40)])
+    wait_for_rebuild(kb)
+    assert index_kind(kb.index) == "ivf"
+    kb.save()
+    return kb, ids
+
+
+def test_mmap_index_is_searchable_and_reloaded_on_write(make_kb, wait_for_rebuild):
+    _, ids = build_ivf(make_kb, wait_for_rebuild)
+
+    kb = make_kb(**IVF, index_load_mode="mmap")
+    assert kb._mapped
+    assert kb.search(query_text="document 5", k=1, nprobe=4)[0]["id"] == ids[5]
+    # Saving a still-mapped index leaves the file alone
+    kb.save()
+
+    kb.add_items(documents=["new document"])
+    assert not kb._mapped
+    assert kb.index.ntotal == 41
+    kb.save()
+    assert make_kb(**IVF).index.ntotal == 41
+
+
+def test_mmap_flat_index_is_read_into_ram(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=["document"])
+    kb.save()
+    assert not make_kb(index_load_mode="mmap")._mapped
+
+
+def test_ondisk_moves_inverted_lists_next_to_index(make_kb, wait_for_rebuild):
+    kb, ids = build_ivf(make_kb, wait_for_rebuild, index_load_mode="ondisk")
+    assert has_ondisk_invlists(kb.index)
+    assert os.path.exists(kb.ivfdata_path)
+
+    reopened = make_kb(**IVF, index_load_mode="ondisk")
+    assert has_ondisk_invlists(reopened.index)
+    assert reopened.search(query_text="document 7", k=1, nprobe=4)[0]["id"] == ids[7]
+    assert reopened.delete(ids[7])
+    assert reopened.index.ntotal == 39
+
+
+def test_unknown_load_mode_is_rejected(make_kb):
+    with pytest.raises(ValueError, match="index_load_mode"):
+        make_kb(index_load_mode="lazy")
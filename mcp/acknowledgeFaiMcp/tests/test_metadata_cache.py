@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.keys() == ["a", "c"]
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_cache_size_zero_stores_nothing():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert len(cache) == 0 and "a" not in cache
+
+
+def test_startup_does_not_preload_metadata(make_kb):
+    kb = make_kb()
+    ids = kb.add_items(metadatas=[{"title": "alpha"}, {"title": "beta"}], documents=["alpha doc", "beta doc"])
+    kb.save()
+
+    restarted = make_kb()
+    assert len(restarted.metadatas) == 0
+    results = restarted.search(query_text="beta doc", k=2)
+    assert results[0]["id"] == ids[1]
+    assert results[0]["metadata"]["document"] == "beta doc"
+    assert {str(i) for i in ids} == set(restarted.metadatas.keys())
+
+
+def test_search_resolves_misses_beyond_cache_size(make_kb):
+    kb = make_kb(metadata_cache_size=1)
+    kb.add_items(documents=["one", "two", "three"])
+    kb.metadatas.clear()
+
+    results = kb.search(query_text="two", k=3)
+    assert len(results) == 3
+    assert all(r["metadata"] is not None for r in results)
+    assert len(kb.metadatas) == 1
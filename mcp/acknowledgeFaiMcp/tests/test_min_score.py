@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_index import index_kind
+
+DOCS = [f"document {i}" for i in range(40)]
+
+
+def expected_above(kb, threshold, **kwargs):
+    """IDs scoring at least `threshold`, from an exhaustive top-k search."""
+    return [hit["id"] for hit in kb.search(query_text="document 3", k=len(DOCS), **kwargs) if hit["score"] >= threshold]
+
+
+def threshold_after(kb, n, **kwargs):
+    """Threshold between the `n`-th and next best scores, so exactly `n + 1` hits reach it."""
+    hits = kb.search(query_text="document 3", k=len(DOCS), **kwargs)
+    return (hits[n]["score"] + hits[n + 1]["score"]) / 2
+
+
+def test_flat_returns_every_hit_above_the_threshold(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=DOCS)
+    threshold = threshold_after(kb, 9)
+
+    hits = kb.search(query_text="document 3", k=1, min_score=threshold)
+    assert [hit["id"] for hit in hits] == expected_above(kb, threshold)
+    assert len(hits) == 10
+    assert all(hit["score"] >= threshold for hit in hits)
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+
+
+def test_max_results_caps_threshold_hits(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=DOCS)
+    hits = kb.search(query_text="document 3", min_score=threshold_after(kb, 20), max_results=5)
+    assert [hit["id"] for hit in hits] == [hit["id"] for hit in kb.search(query_text="document 3", k=5)]
+
+
+def test_hnsw_threshold_grows_k_until_below(make_kb, wait_for_rebuild):
+    kb = make_kb(index_type="hnsw", migrate_threshold=20, hnsw_m=8)
+    kb.add_items(documents=DOCS)
+    wait_for_rebuild(kb)
+    assert index_kind(kb.index) == "hnsw"
+    threshold = threshold_after(kb, 12, ef_search=64)
+
+    # Starts from k=1 and doubles until the last hit falls below the threshold
+    hits = kb.search(query_text="document 3", k=1, ef_search=64, min_score=threshold)
+    assert [hit["id"] for hit in hits] == expected_above(kb, threshold, ef_search=64)
+
+
+def test_threshold_and_top_k_results_are_cached_apart(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=DOCS)
+    threshold = threshold_after(kb, 9)
+    assert len(kb.search(query_text="document 3", k=2)) == 2
+    assert len(kb.search(query_text="document 3", k=2, min_score=threshold)) == 10
+    assert len(kb.search(query_text="document 3", k=2)) == 2
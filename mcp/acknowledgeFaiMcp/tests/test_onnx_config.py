@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import _onnx_session_options, get_embedder_model_id
+
+
+def test_int8_model_gets_its_own_cache_key():
+    gpu = {"onnx_path": "./model/model.onnx", "tokenizer": "tok", "dim": 384}
+    fp32 = get_embedder_model_id({"device": "gpu", "gpu": gpu})
+    int8 = get_embedder_model_id({"device": "gpu", "gpu": dict(gpu, cpu_onnx_path="./model/model.int8.onnx")})
+    assert fp32 != int8
+
+
+def test_session_options_from_config():
+    ort = pytest.importorskip("onnxruntime")
+    so = _onnx_session_options(ort, {
+        "graph_optimization_level": "extended",
+        "intra_op_num_threads": 2,
+        "execution_mode": "parallel",
+    })
+    assert so.graph_optimization_level == ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    assert so.intra_op_num_threads == 2
+    assert so.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+
+    with pytest.raises(ValueError, match="graph_optimization_level"):
+        _onnx_session_options(ort, {"graph_optimization_level": "max"})
@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_index import index_type_of
+from vector_store import VectorStore
+
+DIM = 8
+
+
+def test_vector_store_round_trip(tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    store = VectorStore(path, DIM)
+    assert store.created
+    vectors = np.random.default_rng(0).random((3, DIM), dtype=np.float32)
+    store.put(np.array([2, 5, 3000]), vectors)
+    store.close()
+
+    reader = VectorStore(path, DIM, read_only=True)
+    assert not reader.created
+    got = reader.get(np.array([[5, 2], [4, 3000]]))
+    np.testing.assert_array_equal(got[0], vectors[[1, 0]])
+    # Unknown ids come back as zero rows
+    np.testing.assert_array_equal(got[1, 0], np.zeros(DIM, dtype=np.float32))
+    np.testing.assert_array_equal(got[1, 1], vectors[2])
+
+    with pytest.raises(ValueError, match="dim"):
+        VectorStore(path, DIM + 1)
+    with pytest.raises(FileNotFoundError):
+        VectorStore(str(tmp_path / "missing.f32"), DIM, read_only=True)
+
+
+def test_rescore_reorders_by_exact_score(server):
+    store_vectors = {1: [1.0, 0.0], 2: [0.0, 1.0], 3: [0.6, 0.8]}
+
+    class Store:
+        def get(self, ids):
+            return np.array([[store_vectors.get(int(i), [0.0, 0.0]) for i in row] for row in ids], dtype="float32")
+
+    D, I = server.FaissKB._rescore(Store(), np.array([[0.0, 1.0]], dtype="float32"), np.array([[1, 3, 2, -1]]), keep=2)
+    assert I.tolist() == [[2, 3]]
+    np.testing.assert_allclose(D, [[1.0, 0.8]])
+
+
+@pytest.mark.parametrize("index_type", ["sq", "ivf_sq"])
+def test_sq_index_scores_at_full_precision(make_kb, wait_for_rebuild, index_type):
+    kb = make_kb(index_type=index_type, migrate_threshold=1, nlist=2, sq_type="sq8")
+    ids = kb.add_items(documents=[f"document {i}" for i in range(50)])
+    wait_for_rebuild(kb)
+    assert index_type_of(kb.index) == index_type
+    assert kb.vector_store is not None
+
+    hit = kb.search(query_text="document 17", k=1, nprobe=2)[0]
+    assert hit["id"] == ids[17]
+    # Re-scored against the stored float32 vector, so the self-match is exact
+    assert hit["score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_rescoring_can_be_disabled(make_kb):
+    kb = make_kb(index_type="sq", rescore_factor=0)
+    assert kb.vector_store is None
+    with pytest.raises(ValueError, match="sq_type"):
+        make_kb(index_type="sq", sq_type="int4")
@@ -0,0 +1,111 @@
+import copy
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+
+class ReversedEmbedder:
+    """A "new model": embeds each text as the old stub embeds it reversed."""
+
+    def __init__(self, base):
+        self.base = base
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return self.base.encode([text[::-1] for text in texts], **kwargs)
+
+
+@pytest.fixture
+def models(server, embedder, tmp_path, monkeypatch):
+    """Point the live and the on-disk embedder config at `tmp_path`, with different model names."""
+    live = {
+        "device": "cpu",
+        "cpu": {"model_name": "stub-a", "dim": embedder.dim},
+        "faiss": {"cpu": {"index_path": str(tmp_path / "faiss.index"), "vector_log_fsync": False}},
+        "knowledge_db_path": str(tmp_path / "knowledge.db"),
+    }
+    on_disk = copy.deepcopy(live)
+    on_disk["cpu"]["model_name"] = "stub-b"
+    new_model = ReversedEmbedder(embedder)
+    monkeypatch.setattr(server, "_embed_cfg", live)
+    monkeypatch.setattr(server, "_embedder", embedder)
+    monkeypatch.setattr(server, "get_embedder", lambda *args, **kwargs: server._embedder)
+    monkeypatch.setattr(server, "_parse_embedder_config", lambda *args: copy.deepcopy(on_disk))
+    monkeypatch.setattr(server, "_load_embedder", lambda cfg=None: new_model)
+    return new_model
+
+
+def wait_for_reindex(kb, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while kb.reindex_job.active:
+        assert time.monotonic() < deadline, "reindex did not finish"
+        time.sleep(0.01)
+    return kb.reindex_job.status()
+
+
+def test_reindex_switches_model_and_index(server, make_kb, models):
+    kb = make_kb()
+    ids = kb.add_items(documents=[f"document {i}" for i in range(10)])
+
+    kb.start_reindex(batch_size=3)
+    status = wait_for_reindex(kb)
+    assert status["state"] == "done"
+    assert kb.index.ntotal == 10
+    assert server._embedder is models
+    assert kb.embedding_cache.model_id == server.get_embedder_model_id(server._embed_cfg)
+
+    calls = models.calls
+    assert kb.search(query_text="not indexed before", k=1)
+    assert models.calls == calls + 1
+    assert kb.search(query_text="document 4", k=1)[0]["id"] == ids[4]
+
+
+def test_writes_during_reindex_are_carried_over(make_kb, models, monkeypatch):
+    kb = make_kb()
+    ids = kb.add_items(documents=[f"document {i}" for i in range(6)])
+    started, release = threading.Event(), threading.Event()
+    reindex_next = kb._reindex_next
+
+    def blocking(job, embedder, after):
+        started.set()
+        assert release.wait(10)
+        return reindex_next(job, embedder, after)
+
+    monkeypatch.setattr(kb, "_reindex_next", blocking)
+    kb.start_reindex(batch_size=2)
+    assert started.wait(10)
+    assert kb.delete(ids[0])
+    late, = kb.add_items(documents=["late document"])
+    release.set()
+
+    assert wait_for_reindex(kb)["state"] == "done"
+    assert kb.index.ntotal == 6
+    assert kb.search(query_text="late document", k=1)[0]["id"] == late
+    assert ids[0] not in {r["id"] for r in kb.search(query_text="document 0", k=10)}
+
+
+def test_cancelled_reindex_resumes_from_checkpoint(make_kb, models, monkeypatch):
+    kb = make_kb()
+    kb.add_items(documents=[f"document {i}" for i in range(6)])
+    reindex_next = kb._reindex_next
+
+    def cancel_after_first(job, embedder, after):
+        batch = reindex_next(job, embedder, after)
+        kb.cancel_reindex()
+        return batch
+
+    monkeypatch.setattr(kb, "_reindex_next", cancel_after_first)
+    kb.start_reindex(batch_size=2)
+    assert wait_for_reindex(kb)["state"] == "cancelled"
+
+    monkeypatch.setattr(kb, "_reindex_next", reindex_next)
+    kb.start_reindex(batch_size=2)
+    status = wait_for_reindex(kb)
+    assert status["state"] == "done" and status["resumed_from"] is not None
+    assert kb.index.ntotal == 6
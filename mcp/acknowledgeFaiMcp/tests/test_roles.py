@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+QUIET = {"publish_interval_s": 60, "reader_poll_interval_s": 60}
+
+
+def test_reader_serves_published_snapshots(make_kb):
+    writer = make_kb(role="writer", **QUIET)
+    first = writer.add_items(documents=["first document"])
+    writer.save()
+
+    reader = make_kb(role="reader", **QUIET)
+    assert reader.published_seq == writer.published_seq
+    assert reader.search(query_text="first document", k=1)[0]["id"] == first[0]
+    assert not reader.reload_published()
+
+    second = writer.add_items(documents=["second document"])
+    writer.save()
+    assert reader.reload_published()
+    assert reader.index.ntotal == 2
+    assert reader.search(query_text="second document", k=1)[0]["id"] == second[0]
+
+
+def test_reader_rejects_writes(make_kb):
+    make_kb(role="writer", **QUIET)
+    reader = make_kb(role="reader", **QUIET)
+    assert reader.vector_log is None
+    for write in (lambda: reader.add_items(documents=["x"]), lambda: reader.delete(1), reader.save):
+        with pytest.raises(RuntimeError, match="read-only replica"):
+            write()
+
+
+def test_writer_prunes_old_snapshots(make_kb, tmp_path):
+    writer = make_kb(role="writer", published_snapshots_kept=2, **QUIET)
+    for i in range(4):
+        writer.add_items(documents=[f"document {i}"])
+        writer.save()
+    snapshots = sorted(p for p in os.listdir(tmp_path) if ".snap." in p)
+    assert snapshots == [f"faiss.index.snap.{seq:06d}" for seq in (writer.published_seq - 1, writer.published_seq)]
+    assert writer.read_published()["ntotal"] == 4
+
+
+def test_unknown_role_is_rejected(make_kb):
+    with pytest.raises(ValueError, match="Unknown role"):
+        make_kb(role="primary")
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+
+def executor(server):
+    return server.BoundedExecutor("test-search", workers=2, max_pending=8, timeout=5.0)
+
+
+def test_search_batch_matches_single_searches(make_kb, embedder):
+    kb = make_kb()
+    kb.add_items(documents=[f"document {i}" for i in range(10)])
+    queries = [(None, "query three"), (None, "query seven")]
+    calls = embedder.calls
+
+    batched = kb.search_batch(queries, k=3)
+    assert embedder.calls == calls + 1
+    assert batched == [kb.search(query_text=text, k=3) for _, text in queries]
+
+
+def test_concurrent_searches_share_one_batch(server, make_kb, monkeypatch):
+    kb = make_kb()
+    ids = kb.add_items(documents=[f"document {i}" for i in range(10)])
+    batches = []
+    search_batch = kb.search_batch
+
+    def recording(queries, **kwargs):
+        batches.append(len(queries))
+        return search_batch(queries, **kwargs)
+
+    monkeypatch.setattr(kb, "search_batch", recording)
+
+    async def run():
+        batcher = server.SearchMicroBatcher(kb, executor(server), window_ms=50, max_batch=32)
+        return await asyncio.gather(
+            batcher.search(None, "document 1", k=1),
+            batcher.search(None, "document 2", k=3),
+            batcher.search(None, "document 4", k=2),
+        )
+
+    results = asyncio.run(run())
+    assert batches == [3]
+    assert [len(rows) for rows in results] == [1, 3, 2]
+    assert [rows[0]["id"] for rows in results] == [ids[1], ids[2], ids[4]]
+
+
+def test_full_batch_flushes_without_waiting(server, make_kb):
+    kb = make_kb()
+    kb.add_items(documents=["only document"])
+
+    async def run():
+        batcher = server.SearchMicroBatcher(kb, executor(server), window_ms=60_000, max_batch=2)
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.search(None, "only document", k=1),
+            batcher.search(None, "only document", k=1),
+        ), timeout=5)
+
+    assert all(len(rows) == 1 for rows in asyncio.run(run()))
+
+
+def test_batch_failure_reaches_every_caller(server, make_kb, monkeypatch):
+    kb = make_kb()
+    kb.add_items(documents=["document"])
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(kb, "search_batch", fail)
+
+    async def run():
+        batcher = server.SearchMicroBatcher(kb, executor(server), window_ms=10, max_batch=32)
+        return await asyncio.gather(
+            batcher.search(None, "a", k=1),
+            batcher.search(None, "b", k=1),
+            return_exceptions=True,
+        )
+
+    assert [str(e) for e in asyncio.run(run())] == ["index unavailable"] * 2
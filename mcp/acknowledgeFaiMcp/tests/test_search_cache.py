@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from faiss_mcp_server import SearchResultCache
+
+
+def test_cache_drops_entries_from_older_generations():
+    cache = SearchResultCache(max_entries=10, max_bytes=1 << 20)
+    cache.put("q", 1, [(3, 0.5), (4, 0.25)])
+    assert cache.get("q", 1) == [(3, 0.5), (4, 0.25)]
+    assert cache.get("q", 2) is None
+    assert cache.get("q", 1) is None
+    assert cache.stats()["stale"] == 1 and cache.bytes == 0
+
+
+def test_cache_evicts_by_count_and_bytes():
+    cache = SearchResultCache(max_entries=2, max_bytes=1 << 20)
+    for key in "abc":
+        cache.put(key, 0, [(1, 1.0)])
+    assert cache.get("a", 0) is None and cache.get("c", 0) is not None
+
+    small = SearchResultCache(max_entries=10, max_bytes=2 * (12 + SearchResultCache.ENTRY_OVERHEAD))
+    for key in "abc":
+        small.put(key, 0, [(1, 1.0)])
+    assert small.stats()["entries"] == 2
+
+
+def test_repeated_search_skips_the_index(make_kb, monkeypatch):
+    kb = make_kb()
+    ids = kb.add_items(documents=[f"document {i}" for i in range(5)])
+    scans = []
+    search_vectors = kb._search_vectors
+
+    def counting(vec, *args):
+        scans.append(len(vec))
+        return search_vectors(vec, *args)
+
+    monkeypatch.setattr(kb, "_search_vectors", counting)
+    first = kb.search(query_text="document 2", k=2)
+    assert kb.search(query_text="document 2", k=2) == first
+    assert scans == [1]
+    # Another k is another entry
+    kb.search(query_text="document 2", k=3)
+    assert scans == [1, 1]
+
+    # Adds and deletes make cached results stale
+    assert kb.delete(ids[2])
+    assert ids[2] not in [r["id"] for r in kb.search(query_text="document 2", k=2)]
+    late, = kb.add_items(documents=["document 2"])
+    assert kb.search(query_text="document 2", k=1)[0]["id"] == late
+    assert len(scans) == 4
+
+
+def test_cache_can_be_disabled(make_kb):
+    assert make_kb(search_cache_size=0).search_cache is None
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("mcp")
+
+from starlette.requests import Request
+
+
+def health(server, query: bytes = b""):
+    response = asyncio.run(server._health(Request({"type": "http", "method": "GET", "query_string": query, "headers": []})))
+    return response.status_code, json.loads(response.body)
+
+
+@pytest.fixture
+def fresh(server, monkeypatch):
+    monkeypatch.setattr(server, "_model_ready", False)
+    monkeypatch.setattr(server, "_model_error", None)
+    return server
+
+
+def test_ready_probe_waits_for_warm_up(fresh, make_kb, embedder, monkeypatch):
+    monkeypatch.setattr(fresh, "_kb", make_kb())
+    assert health(fresh)[0] == 200
+    status, body = health(fresh, b"ready=1")
+    assert status == 503 and body["status"] == "starting"
+
+    asyncio.run(fresh._warm_up_embedder(fresh.FaissConfig(dim=embedder.dim)))
+    assert embedder.calls == 1
+    status, body = health(fresh, b"ready=1")
+    assert status == 200 and body["ready"] and "model" in body["startup_timings"]
+
+
+def test_failed_warm_up_is_reported(fresh, embedder):
+    embedder.get_sentence_embedding_dimension = lambda: embedder.dim + 1
+    asyncio.run(fresh._warm_up_embedder(fresh.FaissConfig(dim=embedder.dim)))
+    assert not fresh._model_ready
+    assert "does not match embedder dimension" in fresh._model_error
+    assert health(fresh, b"ready=1")[1]["model_error"] == fresh._model_error
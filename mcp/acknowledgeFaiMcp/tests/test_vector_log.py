@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_log import OP_ADD, OP_DELETE, VectorLog
+
+
+DIM = 4
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM), dtype=np.float32)
+
+
+def _open_log(tmp_path):
+    log = VectorLog(str(tmp_path / "index.vlog"), DIM, fsync=False)
+    log.open()
+    return log
+
+
+def test_replay_round_trip(tmp_path):
+    log = _open_log(tmp_path)
+    vectors = _vectors(3)
+    log.append_add(np.array([1, 2, 3], dtype="int64"), vectors)
+    log.append_delete(np.array([2], dtype="int64"))
+    log.close()
+
+    records = list(VectorLog(log.prefix, DIM).replay())
+    assert [op for op, _, _ in records] == [OP_ADD, OP_DELETE]
+    op, ids, replayed = records[0]
+    assert ids.tolist() == [1, 2, 3]
+    np.testing.assert_array_equal(replayed, vectors)
+    assert records[1][1].tolist() == [2] and records[1][2] is None
+
+
+@pytest.mark.parametrize("cut", [1, 4, 20])
+def test_replay_stops_at_torn_tail(tmp_path, cut):
+    log = _open_log(tmp_path)
+    log.append_add(np.array([1], dtype="int64"), _vectors(1))
+    log.append_add(np.array([2], dtype="int64"), _vectors(1, seed=1))
+    log.close()
+    path = log.segments()[-1][1]
+    # Crash mid-append: the last record is cut short
+    os.truncate(path, os.path.getsize(path) - cut)
+
+    records = list(VectorLog(log.prefix, DIM).replay())
+    assert [ids.tolist() for _, ids, _ in records] == [[1]]
+
+
+def test_replay_rejects_bad_crc(tmp_path):
+    log = _open_log(tmp_path)
+    log.append_delete(np.array([7], dtype="int64"))
+    log.append_delete(np.array([8], dtype="int64"))
+    log.close()
+    path = log.segments()[-1][1]
+    with open(path, "r+b") as f:
+        # Flip a byte in the last record's ids
+        f.seek(-8, os.SEEK_END)
+        byte = f.read(1)
+        f.seek(-8, os.SEEK_END)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    records = list(VectorLog(log.prefix, DIM).replay())
+    assert [ids.tolist() for _, ids, _ in records] == [[7]]
+
+
+def test_torn_tail_does_not_hide_later_segments(tmp_path):
+    log = _open_log(tmp_path)
+    log.append_delete(np.array([1], dtype="int64"))
+    first = log.segments()[-1][1]
+    log.rotate()
+    log.append_delete(np.array([2], dtype="int64"))
+    log.close()
+    with open(first, "ab") as f:
+        f.write(b"D\x01")
+
+    records = list(VectorLog(log.prefix, DIM).replay())
+    assert [ids.tolist() for _, ids, _ in records] == [[1], [2]]
+
+
+def test_truncate_through_keeps_current_segment(tmp_path):
+    log = _open_log(tmp_path)
+    log.append_delete(np.array([1], dtype="int64"))
+    closed = log.rotate()
+    log.append_delete(np.array([2], dtype="int64"))
+    log.truncate_through(closed)
+    log.close()
+
+    assert [seq for seq, _ in log.segments()] == [closed + 1]
+    records = list(VectorLog(log.prefix, DIM).replay())
+    assert [ids.tolist() for _, ids, _ in records] == [[2]]
+
+
+def test_replay_skips_segment_with_other_dim(tmp_path):
+    log = _open_log(tmp_path)
+    log.append_delete(np.array([1], dtype="int64"))
+    log.close()
+
+    assert list(VectorLog(log.prefix, DIM + 1).replay()) == []
+
+
+def test_kb_replays_writes_since_last_snapshot(make_kb):
+    from faiss_index import index_ids
+
+    kb = make_kb()
+    ids = kb.add_items(documents=["saved document"])
+    kb.save()
+    late = kb.add_items(documents=["unsaved document", "deleted document"])
+    assert kb.delete(late[1])
+    kb.close()
+
+    # Restart without a final save: the index file only has the first document
+    reopened = make_kb()
+    assert sorted(index_ids(reopened.index).tolist()) == [ids[0], late[0]]
+    assert reopened.search(query_text="unsaved document", k=1)[0]["id"] == late[0]
+
+
+def test_save_truncates_covered_segments(make_kb):
+    kb = make_kb()
+    kb.add_items(documents=["document"])
+    kb.save()
+    assert kb.vector_log.records == 0
+    assert len(kb.vector_log.segments()) == 1
+
+
+def test_kb_creates_missing_index_directory(make_kb, tmp_path):
+    index_path = tmp_path / "not" / "yet" / "faiss.index"
+    kb = make_kb(index_path=str(index_path))
+    kb.add_items(documents=["document"])
+    kb.save()
+    assert index_path.exists()
+    assert make_kb(index_path=str(index_path)).index.ntotal == 1
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Append-only vector log for crash-safe FAISS persistence.
+
+Every add (ids + float32 vectors) and delete (ids) applied to the in-memory index
+is appended to the current log segment before the call returns. A snapshot of the
+index rotates the log to a new segment and, once the snapshot is safely renamed
+into place, deletes the segments it covers. On startup, segments newer than the
+snapshot are replayed.
+
+Segment file `<prefix>.<seq:06d>`:
+    header   b"FAISSVL1" + uint32 dim
+    record   op (b"A" | b"D") + uint32 n + n * int64 ids [+ n * dim float32] + uint32 crc32
+
+A torn record at the end of a segment (crash mid-append) fails its CRC and ends
+the replay of that segment.
+"""
+
+import glob
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FAISSVL1"
+_FILE_HEADER = struct.Struct("<8sI")
+_RECORD_HEADER = struct.Struct("<cI")
+_CRC = struct.Struct("<I")
+
+OP_ADD = b"A"
+OP_DELETE = b"D"
+
+
+def write_bytes_atomic(path: str, data) -> None:
+    """Write `data` to `path` via a fsynced temp file and an atomic rename."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(memoryview(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class VectorLog:
+    """Segmented append-only log of index mutations."""
+
+    def __init__(self, prefix: str, dim: int, fsync: bool = True):
+        self.prefix = prefix
+        self.dim = int(dim)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self.seq = 0
+        # Records appended to the current segment
+        self.records = 0
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """Existing segments as `(seq, path)`, oldest first."""
+        found = []
+        for path in glob.glob(glob.escape(self.prefix) + ".*"):
+            suffix = path[len(self.prefix) + 1:]
+            if suffix.isdigit():
+                found.append((int(suffix), path))
+        return sorted(found)
+
+    def replay(self) -> Iterator[Tuple[bytes, np.ndarray, Optional[np.ndarray]]]:
+        """Yield `(op, ids, vectors)` for every intact record of the existing segments."""
+        for seq, path in self.segments():
+            with open(path, "rb") as f:
+                header = f.read(_FILE_HEADER.size)
+                if len(header) < _FILE_HEADER.size:
+                    continue
+                magic, dim = _FILE_HEADER.unpack(header)
+                if magic != MAGIC or dim != self.dim:
+                    logger.warning(f"Skipping vector log segment {path}: magic={magic!r} dim={dim}, expected dim={self.dim}")
+                    continue
+                while True:
+                    record = self._read_record(f)
+                    if record is None:
+                        break
+                    yield record
+
+    def _read_record(self, f) -> Optional[Tuple[bytes, np.ndarray, Optional[np.ndarray]]]:
+        head = f.read(_RECORD_HEADER.size)
+        if not head:
+            return None
+        if len(head) < _RECORD_HEADER.size:
+            logger.warning(f"Truncated record header in {f.name}, ignoring the tail")
+            return None
+        op, n = _RECORD_HEADER.unpack(head)
+        size = n * 8 + (n * self.dim * 4 if op == OP_ADD else 0)
+        payload = f.read(size)
+        crc = f.read(_CRC.size)
+        if len(payload) < size or len(crc) < _CRC.size or _CRC.unpack(crc)[0] != zlib.crc32(head + payload):
+            logger.warning(f"Torn record in {f.name}, ignoring the tail")
+            return None
+        ids = np.frombuffer(payload, dtype="<i8", count=n).astype("int64")
+        vectors = None
+        if op == OP_ADD:
+            vectors = np.frombuffer(payload, dtype="<f4", offset=n * 8).reshape(n, self.dim).astype("float32")
+        return op, ids, vectors
+
+    def open(self) -> None:
+        """Start appending to a new segment after the existing ones."""
+        with self._lock:
+            existing = self.segments()
+            self._open_segment((existing[-1][0] if existing else 0) + 1)
+
+    def _open_segment(self, seq: int) -> None:
+        self.seq = seq
+        self._file = open(f"{self.prefix}.{seq:06d}", "ab")
+        self._file.write(_FILE_HEADER.pack(MAGIC, self.dim))
+        self._sync()
+        self.records = 0
+
+    def _sync(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _append(self, op: bytes, ids: np.ndarray, vectors: Optional[np.ndarray] = None) -> None:
+        ids = np.ascontiguousarray(ids, dtype="<i8")
+        payload = ids.tobytes()
+        if vectors is not None:
+            payload += np.ascontiguousarray(vectors, dtype="<f4").tobytes()
+        head = _RECORD_HEADER.pack(op, ids.shape[0])
+        with self._lock:
+            self._file.write(head + payload + _CRC.pack(zlib.crc32(head + payload)))
+            self._sync()
+            self.records += 1
+
+    def append_add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        self._append(OP_ADD, ids, vectors)
+
+    def append_delete(self, ids: np.ndarray) -> None:
+        self._append(OP_DELETE, ids)
+
+    def rotate(self) -> int:
+        """Close the current segment, start the next one and return the closed seq."""
+        with self._lock:
+            closed = self.seq
+            self._file.close()
+            self._open_segment(closed + 1)
+            return closed
+
+    def truncate_through(self, seq: int) -> None:
+        """Delete segments up to and including `seq` (covered by a snapshot)."""
+        for s, path in self.segments():
+            if s <= seq and s != self.seq:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove vector log segment {path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Full-precision vector store for re-scoring candidates of a compressed index.
+
+Vectors are kept as float32 rows of a memory-mapped file, row number = external
+ID, so a lookup is one fancy-index into the mapping and only the pages of the
+rows actually touched are read. The file is grown (sparsely, where the file
+system allows) when an ID beyond the current capacity is written.
+
+File `<index_path>.vectors`:
+    header   b"FAISSFV1" + uint32 dim + 4 bytes padding
+    rows     capacity * dim float32
+"""
+
+import logging
+import os
+import struct
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FAISSFV1"
+_HEADER = struct.Struct("<8sI4x")
+
+# Smallest capacity (rows) allocated when the file grows
+MIN_CAPACITY = 1024
+
+
+class VectorStore:
+    """ID-addressed float32 vectors in a memory-mapped file."""
+
+    def __init__(self, path: str, dim: int, read_only: bool = False):
+        self.path = path
+        self.dim = int(dim)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._array: Optional[np.memmap] = None
+        self.capacity = 0
+        # True when this process created the file (callers backfill existing vectors)
+        self.created = not os.path.exists(path)
+        if self.created:
+            if read_only:
+                raise FileNotFoundError(path)
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, self.dim))
+        else:
+            with open(path, "rb") as f:
+                magic, file_dim = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or file_dim != self.dim:
+                raise ValueError(f"{path} holds dim={file_dim} vectors (magic={magic!r}), expected dim={self.dim}")
+        self._map()
+
+    @property
+    def row_bytes(self) -> int:
+        return self.dim * 4
+
+    def _map(self) -> None:
+        rows = (os.path.getsize(self.path) - _HEADER.size) // self.row_bytes
+        self._array = None
+        if rows > 0:
+            self._array = np.memmap(self.path, dtype="float32", mode="r" if self.read_only else "r+",
+                                    offset=_HEADER.size, shape=(rows, self.dim))
+        self.capacity = rows
+
+    def _grow(self, rows: int) -> None:
+        capacity = max(rows, self.capacity * 2, MIN_CAPACITY)
+        if self._array is not None:
+            self._array.flush()
+        # Drop the mapping before resizing the file (required on Windows)
+        self._array = None
+        with open(self.path, "r+b") as f:
+            f.truncate(_HEADER.size + capacity * self.row_bytes)
+        self._map()
+        logger.info(f"Grew full-precision vector store {self.path} to {capacity} rows")
+
+    def put(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Store `vectors` under `ids` (overwriting earlier rows)."""
+        ids = np.asarray(ids, dtype="int64")
+        if ids.size == 0:
+            return
+        with self._lock:
+            need = int(ids.max()) + 1
+            if need > self.capacity:
+                self._grow(need)
+            self._array[ids] = np.asarray(vectors, dtype="float32")
+
+    def get(self, ids: np.ndarray) -> np.ndarray:
+        """Vectors for `ids` (any shape) as `ids.shape + (dim,)`; unknown IDs give zero rows."""
+        ids = np.asarray(ids, dtype="int64")
+        if self.read_only and ids.size and int(ids.max()) >= self.capacity:
+            # Another process grew the file since it was mapped
+            with self._lock:
+                self._map()
+        out = np.zeros(ids.shape + (self.dim,), dtype="float32")
+        array = self._array
+        if array is None:
+            return out
+        inside = (ids >= 0) & (ids < array.shape[0])
+        out[inside] = array[ids[inside]]
+        return out
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._array is not None and not self.read_only:
+                self._array.flush()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._array = None
@@ -7,14 +7,17 @@ database structure, relationships, and data to understand business patterns.
 """
 
 import os
+import re
 import json
+import time
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional, List, Dict, Any, TypedDict
 from enum import Enum
 from contextlib import asynccontextmanager
+import aiomysql
 import pymysql
-import pymysql.cursors
 
 from pydantic import BaseModel, Field, ConfigDict
 from mcp.server.fastmcp import FastMCP, Context
@@ -51,55 +54,346 @@ class ConnectionConfig(BaseModel):
     database: Optional[str] = Field(default=None, description="Default database to use")
     charset: str = Field(default="utf8mb4", description="Character set")
 
+    # Connection pool
+    pool_min_size: int = Field(default=1, description="Connections opened at startup and kept idle", ge=0)
+    pool_max_size: int = Field(default=10, description="Max concurrent connections (= max queries in flight)", ge=1)
+    pool_recycle: int = Field(default=3600, description="Reconnect connections idle for longer than this many seconds (-1 = never)", ge=-1)
+    acquire_timeout: float = Field(default=10.0, description="Seconds to wait for a free connection before failing", gt=0)
+    health_check_interval: float = Field(default=30.0, description="Ping a connection before use if it was idle this many seconds (0 = always)", ge=0)
+
+    # Schema metadata cache
+    schema_cache_ttl: float = Field(default=300.0, description="Seconds before a database's cached schema is reloaded in full", gt=0)
+    schema_validate_interval: float = Field(default=30.0, description="Seconds between CREATE_TIME/UPDATE_TIME checks of cached tables (0 = every call)", ge=0)
+
 
 # ==================== Shared Database Client ====================
 
 class DatabaseClient:
-    """Shared MySQL client for connection pooling."""
+    """Shared MySQL client backed by an aiomysql connection pool.
+
+    Each query runs on its own pooled connection, so concurrent tool calls run in
+    parallel (up to `pool_max_size`) without blocking the event loop.
+    """
 
     def __init__(self, config: ConnectionConfig):
         self.config = config
-        self.connection = None
-    
+        self.pool: Optional[aiomysql.Pool] = None
+        self._pool_lock = asyncio.Lock()
+
     async def connect(self):
-        """Establish connection to MySQL."""
-        if self.connection is None or not self.connection.open:
-            self.connection = pymysql.connect(
+        """Create the connection pool (opens `pool_min_size` connections)."""
+        async with self._pool_lock:
+            if self.pool is not None and not self.pool.closed:
+                return
+            self.pool = await aiomysql.create_pool(
                 host=self.config.host,
                 port=self.config.port,
                 user=self.config.user,
                 password=self.config.password,
-                database=self.config.database,
+                db=self.config.database,
                 charset=self.config.charset,
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=True
+                cursorclass=aiomysql.DictCursor,
+                autocommit=True,
+                minsize=self.config.pool_min_size,
+                maxsize=self.config.pool_max_size,
+                pool_recycle=self.config.pool_recycle,
+            )
+            logger.info(
+                f"Connected to MySQL: {self.config.host}:{self.config.port} "
+                f"(pool {self.config.pool_min_size}-{self.config.pool_max_size})"
             )
-            logger.info(f"Connected to MySQL: {self.config.host}:{self.config.port}")
 
     async def close(self):
-        """Close MySQL connection."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-            logger.info("MySQL connection closed")
+        """Close all pooled connections."""
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+            logger.info("MySQL connection pool closed")
+
+    async def _acquire(self) -> aiomysql.Connection:
+        """Take a healthy connection from the pool, waiting at most `acquire_timeout` seconds."""
+        await self.connect()
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), timeout=self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(
+                f"No MySQL connection available within {self.config.acquire_timeout}s "
+                f"(all {self.config.pool_max_size} in use)"
+            )
+        # Connections idle for a while may have been dropped by the server (wait_timeout) or a proxy
+        idle = asyncio.get_running_loop().time() - conn.last_usage
+        if idle >= self.config.health_check_interval:
+            try:
+                await conn.ping(reconnect=True)
+            except Exception:
+                conn.close()
+                self.pool.release(conn)
+                raise
+        return conn
 
     async def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
-        """Execute SQL query and return results."""
-        await self.connect()
+        """Execute SQL query on a pooled connection and return results."""
+        conn = await self._acquire()
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params or ())
-                results = cursor.fetchall()
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params or ())
+                results = await cursor.fetchall()
                 return [dict(row) for row in results]
         except pymysql.Error as e:
             logger.error(f"Query error: {e}")
             raise
+        finally:
+            self.pool.release(conn)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Current pool occupancy."""
+        if self.pool is None:
+            return {"size": 0, "free": 0, "max_size": self.config.pool_max_size}
+        return {"size": self.pool.size, "free": self.pool.freesize, "max_size": self.pool.maxsize}
+
+
+# ==================== Schema Metadata Cache ====================
+
+def like_to_regex(pattern: str) -> "re.Pattern":
+    """Compile a SQL LIKE pattern (`%`, `_`, backslash escapes) to a case-insensitive regex."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        out.append(".*" if c == "%" else "." if c == "_" else re.escape(c))
+        i += 1
+    return re.compile("".join(out) + r"\Z", re.IGNORECASE | re.DOTALL)
+
+
+def _in_clause(column: str, names: Optional[List[str]]) -> str:
+    return f" AND {column} IN ({', '.join(['%s'] * len(names))})" if names else ""
+
+
+class SchemaCache:
+    """Per-database cache of INFORMATION_SCHEMA metadata: tables, columns, indexes and foreign keys.
+
+    An entry is reloaded in full after `schema_cache_ttl` seconds. In between, at
+    most every `schema_validate_interval` seconds, the cheap TABLES query is re-run:
+    table stats are refreshed, and tables whose CREATE_TIME/UPDATE_TIME changed (or
+    that appeared or disappeared) have their columns, indexes and foreign keys
+    reloaded. Columns and indexes of a table are loaded on first use unless the
+    entry was loaded with `details=True` (startup warm-up, `mysql_refresh_schema`).
+
+    Note: MySQL 8 caches TABLES statistics for `information_schema_stats_expiry`
+    seconds (default 86400), so some changes only show up through the TTL.
+    """
+
+    # Above this many changed tables, foreign keys are reloaded for the whole database
+    MAX_TARGETED_TABLES = 500
+
+    def __init__(self, db: "DatabaseClient"):
+        self.db = db
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.revalidations = 0
+
+    async def get(self, database: str, force: bool = False, details: bool = False) -> Dict[str, Any]:
+        """Cached metadata of `database`; `force` reloads it now."""
+        config = self.db.config
+        lock = self._locks.setdefault(database, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(database)
+            now = time.monotonic()
+            if entry is None or force or now - entry["loaded_at"] >= config.schema_cache_ttl:
+                entry = await self._load(database, details)
+                self._entries[database] = entry
+            elif now - entry["validated_at"] >= config.schema_validate_interval:
+                await self._revalidate(database, entry)
+            else:
+                self.hits += 1
+            return entry
+
+    async def table_details(self, database: str, entry: Dict[str, Any], table: str) -> Dict[str, Any]:
+        """`{"columns", "indexes"}` of one table, loaded into `entry` on first use."""
+        details = entry["details"].get(table)
+        if details is None:
+            loaded = await self._load_details(database, [table])
+            details = loaded.get(table, {"columns": [], "indexes": []})
+            entry["details"][table] = details
+        return details
+
+    @staticmethod
+    def resolve_table(entry: Dict[str, Any], name: str) -> Optional[str]:
+        """Cached spelling of table `name`: the exact name, else its only case-insensitive match.
+
+        The uncached queries compared TABLE_NAME in SQL, where the collation (and
+        lower_case_table_names) usually makes names case-insensitive.
+        """
+        if name in entry["tables"]:
+            return name
+        matches = [t for t in entry["tables"] if t.lower() == name.lower()]
+        return matches[0] if len(matches) == 1 else None
+
+    def invalidate(self, database: Optional[str] = None):
+        """Drop one database's entry, or all entries."""
+        if database is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(database, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "databases": sorted(self._entries),
+            "hits": self.hits,
+            "loads": self.loads,
+            "revalidations": self.revalidations,
+        }
+
+    async def _load(self, database: str, details: bool) -> Dict[str, Any]:
+        started = time.monotonic()
+        queries = [self._query_schema(database), self._query_tables(database), self._query_foreign_keys(database)]
+        if details:
+            queries.append(self._load_details(database))
+        # Independent INFORMATION_SCHEMA queries run on separate pooled connections
+        results = await asyncio.gather(*queries)
+        schema, tables, foreign_keys = results[:3]
+        entry = {
+            "schema": schema,
+            "tables": tables,
+            "foreign_keys": foreign_keys,
+            "details": results[3] if details else {},
+            "loaded_at": started,
+            "validated_at": started,
+        }
+        self.loads += 1
+        logger.info(
+            f"Loaded schema of `{database}`: {len(tables)} tables, {len(foreign_keys)} foreign key columns"
+            f"{', with columns and indexes' if details else ''} in {time.monotonic() - started:.2f}s"
+        )
+        return entry
+
+    async def _revalidate(self, database: str, entry: Dict[str, Any]):
+        tables = await self._query_tables(database)
+        old = entry["tables"]
+        changed = [name for name, t in tables.items()
+                   if name not in old or (old[name]["create_time"], old[name]["update_time"]) != (t["create_time"], t["update_time"])]
+        removed = [name for name in old if name not in tables]
+        entry["tables"] = tables
+        entry["validated_at"] = time.monotonic()
+        self.revalidations += 1
+        if not changed and not removed:
+            return
+        stale = set(changed) | set(removed)
+        for name in stale:
+            entry["details"].pop(name, None)
+        if len(changed) > self.MAX_TARGETED_TABLES:
+            entry["foreign_keys"] = await self._query_foreign_keys(database)
+        else:
+            fresh = await self._query_foreign_keys(database, changed) if changed else []
+            # Stable sort keeps each constraint's columns in ORDINAL_POSITION order
+            entry["foreign_keys"] = sorted(
+                [fk for fk in entry["foreign_keys"] if fk["child_table"] not in stale] + fresh,
+                key=lambda fk: (fk["child_table"], fk["constraint_name"]),
+            )
+        logger.info(f"Schema of `{database}` changed: {len(changed)} table(s) new/changed, {len(removed)} removed")
+
+    async def _query_schema(self, database: str) -> Optional[Dict[str, Any]]:
+        rows = await self.db.execute_query("""
+            SELECT
+                SCHEMA_NAME as name,
+                DEFAULT_CHARACTER_SET_NAME as charset,
+                DEFAULT_COLLATION_NAME as collation,
+                SCHEMA_COMMENT as comment
+            FROM INFORMATION_SCHEMA.SCHEMATA
+            WHERE SCHEMA_NAME = %s
+        """, (database,))
+        return rows[0] if rows else None
+
+    async def _query_tables(self, database: str) -> Dict[str, Dict[str, Any]]:
+        rows = await self.db.execute_query("""
+            SELECT
+                TABLE_NAME as name,
+                TABLE_TYPE as type,
+                ENGINE as engine,
+                TABLE_ROWS as `rows`,
+                DATA_LENGTH as data_length,
+                INDEX_LENGTH as index_length,
+                TABLE_COMMENT as comment,
+                CREATE_TIME as create_time,
+                UPDATE_TIME as update_time
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME
+        """, (database,))
+        tables = {}
+        for row in rows:
+            data, index = int(row["data_length"] or 0), int(row["index_length"] or 0)
+            row["data_mb"] = round(data / 1024 / 1024, 2)
+            row["index_mb"] = round(index / 1024 / 1024, 2)
+            row["size_mb"] = round((data + index) / 1024 / 1024, 2)
+            tables[row["name"]] = row
+        return tables
+
+    async def _query_foreign_keys(self, database: str, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return await self.db.execute_query(f"""
+            SELECT
+                TABLE_NAME as child_table,
+                COLUMN_NAME as child_column,
+                CONSTRAINT_NAME as constraint_name,
+                REFERENCED_TABLE_NAME as parent_table,
+                REFERENCED_COLUMN_NAME as parent_column
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = %s
+                AND REFERENCED_TABLE_NAME IS NOT NULL{_in_clause("TABLE_NAME", tables)}
+            ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+        """, (database, *(tables or [])))
+
+    async def _load_details(self, database: str, tables: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Columns and indexes of `tables` (all tables when None), keyed by table name."""
+        params = (database, *(tables or []))
+        columns, indexes = await asyncio.gather(
+            self.db.execute_query(f"""
+                SELECT
+                    TABLE_NAME as table_name,
+                    COLUMN_NAME as name,
+                    COLUMN_TYPE as type,
+                    IS_NULLABLE = 'YES' as nullable,
+                    COLUMN_KEY as `key`,
+                    COLUMN_DEFAULT as `default`,
+                    EXTRA as extra,
+                    COLUMN_COMMENT as comment
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = %s{_in_clause("TABLE_NAME", tables)}
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """, params),
+            self.db.execute_query(f"""
+                SELECT
+                    TABLE_NAME as table_name,
+                    INDEX_NAME as name,
+                    GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) as columns,
+                    NON_UNIQUE = 0 as is_unique,
+                    INDEX_TYPE as type
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = %s{_in_clause("TABLE_NAME", tables)}
+                GROUP BY TABLE_NAME, INDEX_NAME, NON_UNIQUE, INDEX_TYPE
+                ORDER BY TABLE_NAME, INDEX_NAME
+            """, params),
+        )
+        details: Dict[str, Dict[str, Any]] = {name: {"columns": [], "indexes": []} for name in (tables or [])}
+        for key, rows in (("columns", columns), ("indexes", indexes)):
+            for row in rows:
+                table = row.pop("table_name")
+                details.setdefault(table, {"columns": [], "indexes": []})[key].append(row)
+        return details
 
 
 # ==================== Lifespan Management ====================
 
 # Global database client instance
 _db_client: Optional[DatabaseClient] = None
+_schema_cache: Optional[SchemaCache] = None
 
 def get_db_client() -> DatabaseClient:
     """Get the global database client instance."""
@@ -107,10 +401,24 @@ def get_db_client() -> DatabaseClient:
         raise RuntimeError("Database client not initialized")
     return _db_client
 
+def get_schema_cache() -> SchemaCache:
+    """Get the global schema metadata cache."""
+    if _schema_cache is None:
+        raise RuntimeError("Schema cache not initialized")
+    return _schema_cache
+
+
+async def _warm_schema_cache(database: str):
+    """Load the default database's full schema in the background so first calls hit the cache."""
+    try:
+        await get_schema_cache().get(database, details=True)
+    except Exception as e:
+        logger.warning(f"Schema cache warm-up for `{database}` failed: {e}")
+
 @asynccontextmanager
 async def app_lifespan(app):
     """Manage database client lifecycle with startup connection test."""
-    global _db_client
+    global _db_client, _schema_cache
 
     # Load configuration from environment
     host = os.getenv("MYSQL_HOST")
@@ -119,6 +427,13 @@ async def app_lifespan(app):
     password = os.getenv("MYSQL_PASSWORD", "")
     database = os.getenv("MYSQL_DATABASE")
     charset = os.getenv("MYSQL_CHARSET", "utf8mb4")
+    pool_min_size = os.getenv("MYSQL_POOL_MIN_SIZE")
+    pool_max_size = os.getenv("MYSQL_POOL_MAX_SIZE")
+    pool_recycle = os.getenv("MYSQL_POOL_RECYCLE")
+    acquire_timeout = os.getenv("MYSQL_POOL_ACQUIRE_TIMEOUT")
+    health_check_interval = os.getenv("MYSQL_POOL_HEALTH_CHECK_INTERVAL")
+    schema_cache_ttl = os.getenv("MYSQL_SCHEMA_CACHE_TTL")
+    schema_validate_interval = os.getenv("MYSQL_SCHEMA_VALIDATE_INTERVAL")
 
     # Validate required config
     if not host:
@@ -132,7 +447,14 @@ async def app_lifespan(app):
         user=user,
         password=password,
         database=database,
-        charset=charset
+        charset=charset,
+        pool_min_size=int(pool_min_size) if pool_min_size else 1,
+        pool_max_size=int(pool_max_size) if pool_max_size else 10,
+        pool_recycle=int(pool_recycle) if pool_recycle else 3600,
+        acquire_timeout=float(acquire_timeout) if acquire_timeout else 10.0,
+        health_check_interval=float(health_check_interval) if health_check_interval else 30.0,
+        schema_cache_ttl=float(schema_cache_ttl) if schema_cache_ttl else 300.0,
+        schema_validate_interval=float(schema_validate_interval) if schema_validate_interval else 30.0,
     )
 
     logger.info(f"Connecting to MySQL: {config.host}:{config.port}/{config.database or '(no default db)'}")
@@ -142,14 +464,21 @@ async def app_lifespan(app):
     # Test connection on startup
     try:
         await _db_client.connect()
+        await _db_client.execute_query("SELECT 1")
         logger.info("MySQL connection established successfully")
     except Exception as e:
         logger.error(f"Failed to connect to MySQL: {e}")
         raise
 
+    _schema_cache = SchemaCache(_db_client)
+    warmup = asyncio.create_task(_warm_schema_cache(config.database)) if config.database else None
+
     yield {"db": _db_client}
 
     # Cleanup
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    _schema_cache = None
     await _db_client.close()
     _db_client = None
 
@@ -399,56 +728,30 @@ async def database_overview(params: DatabaseOverviewInput, ctx: Context) -> str:
     Returns:
         str: Database overview information.
     """
-    db: DatabaseClient = get_db_client()
-
     try:
         target_db = params.database or get_db_client().config.database
 
         if not target_db:
             return "Error: No database specified. Please provide database name or configure default database."
 
-        info_parts = []
-
-        # Get basic info
-        basic_info = await db.execute_query("""
-            SELECT
-                SCHEMA_NAME as name,
-                DEFAULT_CHARACTER_SET_NAME as charset,
-                DEFAULT_COLLATION_NAME as collation,
-                SCHEMA_COMMENT as comment
-            FROM INFORMATION_SCHEMA.SCHEMATA
-            WHERE SCHEMA_NAME = %s
-        """, (target_db,))
-
-        if not basic_info:
+        entry = await get_schema_cache().get(target_db)
+        if not entry["schema"]:
             return f"Error: Database '{target_db}' not found"
 
-        info = basic_info[0]
-        info_parts.append(info)
+        info = dict(entry["schema"])
+        tables = entry["tables"].values()
 
         # Get table count
         if params.include_table_count:
-            table_count_result = await db.execute_query("""
-                SELECT COUNT(*) as count
-                FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
-            """, (target_db,))
-            info["table_count"] = table_count_result[0]["count"]
+            info["table_count"] = sum(1 for t in tables if t["type"] == "BASE TABLE")
 
         # Get size
         if params.include_size:
-            size_result = await db.execute_query("""
-                SELECT
-                    ROUND(SUM(data_length + index_length) / 1024 / 1024, 2) as size_mb,
-                    ROUND(SUM(data_length) / 1024 / 1024, 2) as data_mb,
-                    ROUND(SUM(index_length) / 1024 / 1024, 2) as index_mb
-                FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_SCHEMA = %s
-            """, (target_db,))
-            size_info = size_result[0]
-            info["size_mb"] = size_info["size_mb"]
-            info["data_mb"] = size_info["data_mb"]
-            info["index_mb"] = size_info["index_mb"]
+            data = sum(int(t["data_length"] or 0) for t in tables)
+            index = sum(int(t["index_length"] or 0) for t in tables)
+            info["size_mb"] = round((data + index) / 1024 / 1024, 2)
+            info["data_mb"] = round(data / 1024 / 1024, 2)
+            info["index_mb"] = round(index / 1024 / 1024, 2)
 
         if params.response_format == ResponseFormat.MARKDOWN:
             lines = [f"# Database: `{target_db}`", ""]
@@ -530,42 +833,23 @@ async def list_tables(params: ListTablesInput, ctx: Context) -> str:
     Returns:
         str: Formatted list of tables with metadata.
     """
-    db: DatabaseClient = get_db_client()
-
     try:
         target_db = params.database or get_db_client().config.database
 
         if not target_db:
             return "Error: No database specified. Please provide database name or configure default database."
 
-        # Build query
-        table_types = "'BASE TABLE', 'VIEW'" if params.include_views else "'BASE TABLE'"
-
-        query = f"""
-            SELECT
-                TABLE_NAME as name,
-                TABLE_TYPE as type,
-                ENGINE as engine,
-                TABLE_ROWS as rows,
-                ROUND((DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024, 2) as size_mb,
-                TABLE_COMMENT as comment
-            FROM INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = %s
-                AND TABLE_TYPE IN ({table_types})
-        """
-
-        params_list = [target_db]
-
-        if params.table_pattern:
-            query += " AND TABLE_NAME LIKE %s"
-            params_list.append(params.table_pattern)
-
-        query += " ORDER BY TABLE_NAME"
+        entry = await get_schema_cache().get(target_db)
+        table_types = ("BASE TABLE", "VIEW") if params.include_views else ("BASE TABLE",)
+        pattern = like_to_regex(params.table_pattern) if params.table_pattern else None
 
+        results = [
+            {key: t[key] for key in ("name", "type", "engine", "rows", "size_mb", "comment")}
+            for t in entry["tables"].values()
+            if t["type"] in table_types and (pattern is None or pattern.match(t["name"]))
+        ]
         if params.limit:
-            query += f" LIMIT {params.limit}"
-
-        results = await db.execute_query(query, tuple(params_list))
+            results = results[:params.limit]
 
         if params.response_format == ResponseFormat.MARKDOWN:
             if not results:
@@ -672,99 +956,59 @@ async def get_table_schema(params: GetTableSchemaInput, ctx: Context) -> str:
     Returns:
         str: Formatted table schema information.
     """
-    db: DatabaseClient = get_db_client()
-
     try:
         target_db = params.database or get_db_client().config.database
 
         if not target_db:
             return "Error: No database specified. Please provide database name or configure default database."
 
-        # Get basic table info
-        table_info = await db.execute_query("""
-            SELECT
-                TABLE_NAME,
-                ENGINE,
-                TABLE_ROWS,
-                ROUND((DATA_LENGTH + INDEX_LENGTH) / 1024 / 1024, 2) as size_mb,
-                TABLE_COMMENT,
-                CREATE_TIME,
-                UPDATE_TIME
-            FROM INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        """, (target_db, params.table))
-
-        if not table_info:
+        cache = get_schema_cache()
+        entry = await cache.get(target_db)
+        name = cache.resolve_table(entry, params.table)
+        if name is None:
             return f"Error: Table '{params.table}' not found in database '{target_db}'"
-
-        info = table_info[0]
+        table = entry["tables"][name]
 
         # Get columns
-        columns = await db.execute_query("""
-            SELECT
-                COLUMN_NAME as name,
-                COLUMN_TYPE as type,
-                IS_NULLABLE = 'YES' as nullable,
-                COLUMN_KEY as key,
-                COLUMN_DEFAULT as default,
-                EXTRA as extra,
-                COLUMN_COMMENT as comment
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-            ORDER BY ORDINAL_POSITION
-        """, (target_db, params.table))
+        details = await cache.table_details(target_db, entry, name)
+        columns = details["columns"]
 
         result = {
             "database": target_db,
-            "table": params.table,
-            "engine": info["ENGINE"],
-            "rows": info["TABLE_ROWS"],
-            "size_mb": info["size_mb"],
-            "comment": info["TABLE_COMMENT"],
+            "table": name,
+            "engine": table["engine"],
+            "rows": table["rows"],
+            "size_mb": table["size_mb"],
+            "comment": table["comment"],
             "columns": columns
         }
 
         # Get indexes
         if params.include_indexes:
-            indexes = await db.execute_query("""
-                SELECT
-                    INDEX_NAME as name,
-                    GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) as columns,
-                    NON_UNIQUE = 0 as is_unique,
-                    INDEX_TYPE as type
-                FROM INFORMATION_SCHEMA.STATISTICS
-                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-                GROUP BY INDEX_NAME, NON_UNIQUE, INDEX_TYPE
-                ORDER BY INDEX_NAME
-            """, (target_db, params.table))
-            result["indexes"] = indexes
+            result["indexes"] = details["indexes"]
 
         # Get foreign keys
         if params.include_foreign_keys:
-            foreign_keys = await db.execute_query("""
-                SELECT
-                    CONSTRAINT_NAME as constraint_name,
-                    COLUMN_NAME as column_name,
-                    REFERENCED_TABLE_NAME as referenced_table,
-                    REFERENCED_COLUMN_NAME as referenced_column
-                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                WHERE TABLE_SCHEMA = %s
-                    AND TABLE_NAME = %s
-                    AND REFERENCED_TABLE_NAME IS NOT NULL
-                ORDER BY CONSTRAINT_NAME, ORDINAL_POSITION
-            """, (target_db, params.table))
-            result["foreign_keys"] = foreign_keys
+            result["foreign_keys"] = [
+                {
+                    "constraint_name": fk["constraint_name"],
+                    "column_name": fk["child_column"],
+                    "referenced_table": fk["parent_table"],
+                    "referenced_column": fk["parent_column"],
+                }
+                for fk in entry["foreign_keys"] if fk["child_table"] == name
+            ]
 
         if params.response_format == ResponseFormat.MARKDOWN:
-            lines = [f"# Table Schema: `{target_db}`.`{params.table}`", ""]
+            lines = [f"# Table Schema: `{target_db}`.`{name}`", ""]
 
             # Basic info
             lines.append("## Basic Information")
-            lines.append(f"- **Engine**: {info['ENGINE']}")
-            lines.append(f"- **Rows**: {info['TABLE_ROWS']:,}" if info['TABLE_ROWS'] else "- **Rows**: N/A")
-            lines.append(f"- **Size**: {info['size_mb']} MB")
-            if info['TABLE_COMMENT']:
-                lines.append(f"- **Comment**: {info['TABLE_COMMENT']}")
+            lines.append(f"- **Engine**: {table['engine']}")
+            lines.append(f"- **Rows**: {table['rows']:,}" if table['rows'] else "- **Rows**: N/A")
+            lines.append(f"- **Size**: {table['size_mb']} MB")
+            if table['comment']:
+                lines.append(f"- **Comment**: {table['comment']}")
             lines.append("")
 
             # Columns
@@ -1180,43 +1424,24 @@ async def list_foreign_key_relationships(params: ListForeignKeyRelationshipsInpu
     Returns:
         str: Foreign key relationship information.
     """
-    db: DatabaseClient = get_db_client()
-
     try:
         target_db = params.database or get_db_client().config.database
 
         if not target_db:
             return "Error: No database specified. Please provide database name or configure default database."
 
-        # Build query
-        query = """
-            SELECT
-                TABLE_NAME as child_table,
-                COLUMN_NAME as child_column,
-                CONSTRAINT_NAME as constraint_name,
-                REFERENCED_TABLE_NAME as parent_table,
-                REFERENCED_COLUMN_NAME as parent_column
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-            WHERE TABLE_SCHEMA = %s
-                AND REFERENCED_TABLE_NAME IS NOT NULL
-        """
-
-        params_list = [target_db]
+        cache = get_schema_cache()
+        entry = await cache.get(target_db)
+        results = entry["foreign_keys"]
 
         if params.table:
+            name = cache.resolve_table(entry, params.table) or params.table
             if params.direction == "outgoing":
-                query += " AND TABLE_NAME = %s"
-                params_list.append(params.table)
+                results = [r for r in results if r["child_table"] == name]
             elif params.direction == "incoming":
-                query += " AND REFERENCED_TABLE_NAME = %s"
-                params_list.append(params.table)
+                results = [r for r in results if r["parent_table"] == name]
             else:  # both
-                query += " AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)"
-                params_list.extend([params.table, params.table])
-
-        query += " ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION"
-
-        results = await db.execute_query(query, tuple(params_list))
+                results = [r for r in results if name in (r["child_table"], r["parent_table"])]
 
         if params.response_format == ResponseFormat.MARKDOWN:
             if not results:
@@ -1389,6 +1614,99 @@ async def execute_custom_query(params: ExecuteCustomQueryInput, ctx: Context) ->
         return f"Error: Failed to execute query: {str(e)}"
 
 
+# ==================== Tool: Refresh Schema Cache ====================
+
+class RefreshSchemaInput(BaseModel):
+    """Input for refreshing the schema metadata cache."""
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+
+    database: Optional[str] = Field(
+        default=None,
+        description="Database name. If not provided, uses default database from connection."
+    )
+    all_databases: bool = Field(
+        default=False,
+        description="Drop the cached schema of every database instead (reloaded on next use)"
+    )
+    response_format: ResponseFormat = Field(
+        default=ResponseFormat.MARKDOWN,
+        description="Output format: 'markdown' for human-readable or 'json' for machine-readable"
+    )
+
+
+@mcp.tool(
+    name="mysql_refresh_schema",
+    annotations={
+        "title": "Refresh Schema Cache",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def refresh_schema(params: RefreshSchemaInput, ctx: Context) -> str:
+    """
+    Reload cached schema metadata (tables, columns, indexes, foreign keys) after DDL changes.
+
+    mysql_list_tables, mysql_get_table_schema, mysql_list_foreign_key_relationships and
+    mysql_database_overview answer from this cache; it also refreshes itself on a TTL
+    and when a table's CREATE_TIME/UPDATE_TIME changes.
+
+    Args:
+        params (RefreshSchemaInput): Input parameters containing:
+            - database (Optional[str]): Database name
+            - all_databases (bool): Drop every cached database
+            - response_format (ResponseFormat): Output format
+
+    Returns:
+        str: Summary of the reloaded schema.
+    """
+    cache = get_schema_cache()
+
+    try:
+        if params.all_databases:
+            cache.invalidate()
+            result = {"invalidated": "all", "cache": cache.stats()}
+        else:
+            target_db = params.database or get_db_client().config.database
+
+            if not target_db:
+                return "Error: No database specified. Please provide database name or configure default database."
+
+            started = time.monotonic()
+            entry = await cache.get(target_db, force=True, details=True)
+            if not entry["schema"]:
+                cache.invalidate(target_db)
+                return f"Error: Database '{target_db}' not found"
+            result = {
+                "database": target_db,
+                "tables": len(entry["tables"]),
+                "columns": sum(len(d["columns"]) for d in entry["details"].values()),
+                "indexes": sum(len(d["indexes"]) for d in entry["details"].values()),
+                "foreign_key_columns": len(entry["foreign_keys"]),
+                "seconds": round(time.monotonic() - started, 3),
+                "cache": cache.stats(),
+            }
+
+        if params.response_format == ResponseFormat.MARKDOWN:
+            if params.all_databases:
+                return "Schema cache cleared for all databases; schemas are reloaded on next use."
+            lines = [f"# Schema Refreshed: `{result['database']}`", ""]
+            lines.append(f"- **Tables**: {result['tables']}")
+            lines.append(f"- **Columns**: {result['columns']}")
+            lines.append(f"- **Indexes**: {result['indexes']}")
+            lines.append(f"- **Foreign Key Columns**: {result['foreign_key_columns']}")
+            lines.append(f"- **Load Time**: {result['seconds']}s")
+            return "\n".join(lines)
+
+        else:
+            return json.dumps(result, indent=2)
+
+    except Exception as e:
+        logger.error(f"Error refreshing schema: {e}")
+        return f"Error: Failed to refresh schema: {str(e)}"
+
+
 # ==================== Main Entry Point ====================
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The server modules are run as scripts from their own directory, not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiomysql")
+pytest.importorskip("dotenv")
+pytest.importorskip("mcp")
+
+# The server parses its CLI flags on import
+_argv, sys.argv = sys.argv, sys.argv[:1]
+try:
+    import mysql_mcp_server as server
+finally:
+    sys.argv = _argv
+
+
+@pytest.mark.parametrize("pattern, name, matches", [
+    ("%user%", "app_USERS", True),
+    ("%user%", "orders", False),
+    ("order\\_%", "order_items", True),
+    ("order\\_%", "orderitems", False),
+    ("a_c", "abc", True),
+    ("a_c", "abcd", False),
+    ("a.c", "abc", False),
+    ("100%", "100_pct", True),
+])
+def test_like_to_regex(pattern, name, matches):
+    assert bool(server.like_to_regex(pattern).match(name)) is matches
+
+
+class FakeDB:
+    """Answers the INFORMATION_SCHEMA queries of SchemaCache from `tables`."""
+
+    def __init__(self, ttl=300.0, validate_interval=30.0):
+        self.config = SimpleNamespace(schema_cache_ttl=ttl, schema_validate_interval=validate_interval)
+        self.tables = {"users": 1, "orders": 1}
+        self.queries = []
+
+    async def execute_query(self, query, params=None):
+        source = query.split("FROM INFORMATION_SCHEMA.")[1].split()[0]
+        self.queries.append(source)
+        if source == "SCHEMATA":
+            return [{"name": params[0], "charset": "utf8mb4", "collation": "utf8mb4_0900_ai_ci", "comment": ""}]
+        if source == "TABLES":
+            return [
+                {"name": name, "type": "BASE TABLE", "engine": "InnoDB", "rows": 0, "data_length": 16384,
+                 "index_length": 0, "comment": "", "create_time": 1, "update_time": version}
+                for name, version in sorted(self.tables.items())
+            ]
+        if source == "COLUMNS":
+            names = params[1:] or sorted(self.tables)
+            return [{"table_name": name, "name": "id", "type": "int"} for name in names]
+        return []
+
+
+def _get(cache, **kwargs):
+    return asyncio.run(cache.get("app", **kwargs))
+
+
+def test_hit_within_validate_interval():
+    db = FakeDB()
+    cache = server.SchemaCache(db)
+    first = _get(cache)
+    assert _get(cache) is first
+    assert (cache.loads, cache.hits, cache.revalidations) == (1, 1, 0)
+    assert db.queries.count("TABLES") == 1
+
+
+def test_reload_after_ttl():
+    db = FakeDB()
+    cache = server.SchemaCache(db)
+    entry = _get(cache)
+    entry["loaded_at"] -= db.config.schema_cache_ttl
+    assert _get(cache) is not entry
+    assert cache.loads == 2
+
+
+def test_revalidate_drops_changed_tables():
+    db = FakeDB()
+    cache = server.SchemaCache(db)
+    entry = _get(cache, details=True)
+    assert set(entry["details"]) == {"users", "orders"}
+
+    db.tables["users"] = 2
+    db.tables["items"] = 1
+    del db.tables["orders"]
+    entry["validated_at"] -= db.config.schema_validate_interval
+    assert _get(cache) is entry
+    assert cache.revalidations == 1 and cache.loads == 1
+    assert set(entry["tables"]) == {"users", "items"}
+    # Details of changed or removed tables are reloaded on next use
+    assert entry["details"] == {}
+
+    details = asyncio.run(cache.table_details("app", entry, "users"))
+    assert [c["name"] for c in details["columns"]] == ["id"]
+
+
+def test_invalidate_and_force():
+    db = FakeDB()
+    cache = server.SchemaCache(db)
+    _get(cache)
+    cache.invalidate("app")
+    _get(cache)
+    _get(cache, force=True)
+    assert cache.loads == 3
+    assert cache.stats()["databases"] == ["app"]
+
+
+def test_resolve_table_falls_back_to_case_insensitive_match():
+    entry = {"tables": {"users": {}, "Orders": {}, "orders": {}}}
+    assert server.SchemaCache.resolve_table(entry, "users") == "users"
+    assert server.SchemaCache.resolve_table(entry, "USERS") == "users"
+    assert server.SchemaCache.resolve_table(entry, "orders") == "orders"
+    # Two tables differ only in case: no guessing
+    assert server.SchemaCache.resolve_table(entry, "ORDERS") is None
+    assert server.SchemaCache.resolve_table(entry, "items") is None
+
+
+def test_get_table_schema_ignores_case(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(server, "_db_client", db)
+    monkeypatch.setattr(server, "_schema_cache", server.SchemaCache(db))
+    params = server.GetTableSchemaInput(database="app", table="Users", response_format=server.ResponseFormat.JSON)
+    result = json.loads(asyncio.run(server.get_table_schema(params, None)))
+    assert result["table"] == "users"
+    assert [c["name"] for c in result["columns"]] == ["id"]
+
+    missing = server.GetTableSchemaInput(database="app", table="items")
+    assert asyncio.run(server.get_table_schema(missing, None)).startswith("Error: Table 'items' not found")